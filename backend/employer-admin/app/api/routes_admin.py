@@ -10,6 +10,7 @@ from app.models.internship import Internship
 from app.models.student import Student
 from app.models.application import Application
 from beanie import PydanticObjectId
+from app.services.document_cache import invalidate_cached_internship
 
 # --- Validation Models ---
 class InternshipStatusUpdate(BaseModel):
@@ -142,6 +143,7 @@ async def update_internship_status(internship_id: str, payload: InternshipStatus
             
     internship.updated_at = datetime.utcnow()
     await internship.save()
+    invalidate_cached_internship(internship.id)
     
     return {"message": f"Internship status updated to {payload.status}"}
 
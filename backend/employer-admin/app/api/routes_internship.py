@@ -10,6 +10,7 @@ from beanie import PydanticObjectId
 from app.models.internship import Internship
 from app.models.employer_profile import EmployerProfile
 from app.auth.deps import EmployerUser, get_current_employer
+from app.services.document_cache import invalidate_cached_internship
 
 router = APIRouter(
     prefix="/employer/internships",
@@ -259,6 +260,7 @@ async def update_internship(
 
     internship.updated_at = datetime.utcnow()
     await internship.save()
+    invalidate_cached_internship(internship.id)
     return InternshipOut.from_doc(internship)
 
 
@@ -279,6 +281,7 @@ async def close_internship(
     internship.closed_at = datetime.utcnow()
     internship.updated_at = datetime.utcnow()
     await internship.save()
+    invalidate_cached_internship(internship.id)
     return InternshipOut.from_doc(internship)
 
 
@@ -299,3 +302,4 @@ async def delete_closed_internship(
         )
 
     await internship.delete()
+    invalidate_cached_internship(internship.id)
@@ -380,6 +380,7 @@ async def faiss_health():
     try:
         from app.services.faiss_service import get_faiss_service
         from app.services.embedding_service import get_embedding_service
+        from app.services.document_cache import get_internship_cache
         
         faiss_service = get_faiss_service()
         embedding_service = get_embedding_service()
@@ -387,10 +388,14 @@ async def faiss_health():
         return {
             "status": "healthy",
             "faiss_index_size": faiss_service.get_index_size(),
+            "faiss_tombstones": faiss_service.tombstones,
             "embedding_dimension": embedding_service.dimension,
             "embedding_model": embedding_service.model_name,
             "duplicate_threshold": faiss_service.duplicate_threshold,
             "device": embedding_service.device,
+            "embedding_backend": type(embedding_service.model).__name__,
+            "embedding_batcher": embedding_service.batcher.get_stats(),
+            "internship_cache": get_internship_cache().get_stats(),
         }
     
     except Exception as e:
@@ -12,6 +12,25 @@ class Settings(BaseSettings):
     FIREBASE_SERVICE_ACCOUNT_PATH: str
     FIREBASE_ADMIN_SERVICE_ACCOUNT_PATH: str
     
+    # Micro-batching of query/internship encodes
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_QUEUE_MAX_SIZE: int = 1024
+
+    # Inference backend: "torch" or "onnx" (needs onnxruntime; falls back to torch)
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_ONNX_QUANTIZE: bool = True
+    EMBEDDING_ONNX_CACHE_DIR: str = str(BASE_DIR / "data" / "onnx")  # Exported graphs, reused across restarts
+
+    # FAISS persistence: writes are WAL-logged and flushed in the background
+    FAISS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    FAISS_FLUSH_MAX_MUTATIONS: int = 100
+    FAISS_WAL_FSYNC: bool = False
+
+    # LRU of internships hydrated for semantic search (0 entries disables it)
+    INTERNSHIP_CACHE_MAX_ENTRIES: int = 1024
+    INTERNSHIP_CACHE_TTL_SECONDS: float = 300.0
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -35,6 +35,10 @@ async def lifespan(app: FastAPI):
         
         logger.info("Initializing FAISS service...")
         faiss_service = get_faiss_service()
+        if faiss_service.needs_rebuild:
+            from app.services.internship_service import get_internship_service
+            logger.info("Rebuilding FAISS index from MongoDB...")
+            await get_internship_service().rebuild_faiss_index()
         logger.info(f"FAISS service ready (index size: {faiss_service.get_index_size()})")
         
         if faiss_service.get_index_size() == 0:
@@ -53,11 +57,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down application...")
     
-    # Save FAISS index on shutdown
+    # Stop background persistence and flush pending FAISS writes
     try:
         from app.services.faiss_service import get_faiss_service
         faiss_service = get_faiss_service()
-        faiss_service.save_index()
+        faiss_service.close()
         logger.info("FAISS index saved")
     except Exception as e:
         logger.error(f"Error saving FAISS index: {e}")
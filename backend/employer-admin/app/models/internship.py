@@ -2,7 +2,7 @@
 from datetime import datetime
 from typing import Optional, List, Union
 from beanie import Document, PydanticObjectId
-from pydantic import Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Internship(Document):
@@ -53,4 +53,42 @@ class Internship(Document):
             [("created_at", -1)],
             [("is_active", 1)],
         ]
-#sdd
\ No newline at end of file
+#sdd
+
+class InternshipSearchView(BaseModel):
+    """
+    Projection of Internship without the embedding vector. Search results
+    only need the display fields, so hydration skips the 384 floats per hit.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: Optional[Union[str, PydanticObjectId]] = Field(default=None, alias="_id")
+    owner_uid: str
+    organisation_name: str
+    title: str
+
+    description: str
+    responsibilities: Optional[str] = None
+    requirements: Optional[str] = None
+    perks: Optional[str] = None
+    skills: Optional[List[str]] = None
+
+    location: str
+    state: Optional[str] = None
+    city: Optional[str] = None
+
+    stipend: Optional[int] = None
+    sector: Optional[str] = None
+
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    duration_days: Optional[int] = None
+    duration_weeks: Optional[float] = None
+    duration_months: Optional[float] = None
+
+    status: str = "active"
+    is_active: bool = True
+    closed_at: Optional[datetime] = None
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
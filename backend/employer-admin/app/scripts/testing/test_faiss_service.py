@@ -0,0 +1,483 @@
+# File: scripts/testing/test_faiss_service.py
+"""
+Behaviour tests for the employer FAISS index: tombstones and compaction,
+id-mapped labels, WAL persistence and the readers-writer lock
+"""
+import pytest
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+import faiss
+from pathlib import Path
+from typing import List
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from app.services import faiss_service
+from app.services.faiss_service import FAISSService, ReadWriteLock, INDEX_FORMAT_VERSION
+
+DIM = 8
+
+
+def make_vectors(count: int, seed: int = 7) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, DIM)).astype("float32")
+
+
+def make_service(tmp_path, **kwargs) -> FAISSService:
+    service = FAISSService(dimension=DIM, index_path=str(tmp_path / "internships.index"), **kwargs)
+    service.initialize_index()
+    return service
+
+
+def reopen(service: FAISSService) -> FAISSService:
+    """A fresh process on the same files: load the saved pair, then replay the WAL"""
+    restarted = FAISSService(dimension=DIM, index_path=service.index_path)
+    assert restarted.load_index()
+    restarted.replay_wal()
+    return restarted
+
+
+def live_ids(service: FAISSService) -> List[str]:
+    return sorted(service.labels)
+
+
+def nearest(service: FAISSService, vector: np.ndarray, k: int = 1):
+    return service.search(vector.tolist(), k=k)
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Poll until another thread reaches the expected lock state"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for lock state"
+        time.sleep(0.001)
+
+
+class TestReadWriteLock:
+    """Test the lock shared by searches and index mutations"""
+    
+    def test_readers_share_the_lock(self):
+        """Two readers hold the lock at the same time"""
+        lock = ReadWriteLock()
+        both_inside = threading.Barrier(2, timeout=5)
+        
+        def reader():
+            with lock.read():
+                both_inside.wait()
+        
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        assert not both_inside.broken
+    
+    def test_waiting_writer_blocks_new_readers(self):
+        """A writer queued behind a reader goes before readers that arrive later"""
+        lock = ReadWriteLock()
+        order = []
+        release_first = threading.Event()
+        
+        def first_reader():
+            with lock.read():
+                release_first.wait(5)
+        
+        def writer():
+            with lock.write():
+                order.append("writer")
+        
+        def late_reader():
+            with lock.read():
+                order.append("reader")
+        
+        threads = [threading.Thread(target=first_reader)]
+        threads[0].start()
+        wait_for(lambda: lock._readers == 1)
+        threads.append(threading.Thread(target=writer))
+        threads[1].start()
+        wait_for(lambda: lock._writers_waiting == 1)
+        threads.append(threading.Thread(target=late_reader))
+        threads[2].start()
+        wait_for(lambda: lock._readers_waiting == 1)
+        
+        release_first.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        assert order == ["writer", "reader"]
+    
+    def test_waiting_readers_go_before_next_writer(self):
+        """Back-to-back writers cannot starve the readers queued between them"""
+        lock = ReadWriteLock()
+        order = []
+        release_writer = threading.Event()
+        
+        def first_writer():
+            with lock.write():
+                release_writer.wait(5)
+        
+        def reader():
+            with lock.read():
+                order.append("reader")
+        
+        def second_writer():
+            with lock.write():
+                order.append("writer")
+        
+        threads = [threading.Thread(target=first_writer)]
+        threads[0].start()
+        wait_for(lambda: lock._writer)
+        threads.append(threading.Thread(target=reader))
+        threads[1].start()
+        wait_for(lambda: lock._readers_waiting == 1)
+        threads.append(threading.Thread(target=second_writer))
+        threads[2].start()
+        wait_for(lambda: lock._writers_waiting == 1)
+        
+        release_writer.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        assert order == ["reader", "writer"]
+
+
+class TestIndexMutations:
+    """Test deletes and updates against search results"""
+    
+    def test_remove_then_search(self, tmp_path):
+        """A removed document is never returned, even for its own vector"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(10)
+        service.add_vectors_batch(vectors.tolist(), [f"doc{i}" for i in range(10)])
+        
+        assert service.remove_vector("doc3")
+        assert not service.remove_vector("doc3")
+        assert service.get_index_size() == 9
+        assert service.tombstones == 1
+        
+        hits = nearest(service, vectors[3], k=10)
+        assert len(hits) == 9
+        assert "doc3" not in [doc_id for doc_id, _ in hits]
+        assert nearest(service, vectors[4])[0][0] == "doc4"
+    
+    def test_update_then_search(self, tmp_path):
+        """An update serves the new vector and drops the old one"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(10)
+        service.add_vectors_batch(vectors.tolist(), [f"doc{i}" for i in range(10)])
+        
+        replacement = make_vectors(1, seed=99)[0]
+        service.update_vector(replacement.tolist(), "doc2")
+        
+        assert service.get_index_size() == 10
+        assert service.tombstones == 1
+        doc_id, distance = nearest(service, replacement)[0]
+        assert doc_id == "doc2" and distance == pytest.approx(0.0, abs=1e-5)
+        old_hit = dict(nearest(service, vectors[2], k=10))
+        assert old_hit["doc2"] > 1e-3
+    
+    def test_repeated_id_in_batch_keeps_last_row(self, tmp_path):
+        """The same id twice in one batch leaves only the later vector live"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(3)
+        service.add_vectors_batch(vectors.tolist(), ["a", "b", "a"])
+        
+        assert live_ids(service) == ["a", "b"]
+        assert service.tombstones == 1
+        assert dict(nearest(service, vectors[2], k=2))["a"] == pytest.approx(0.0, abs=1e-5)
+    
+    def test_label_collision_is_probed(self, tmp_path, monkeypatch):
+        """Ids hashing to the same label get distinct labels and both stay searchable"""
+        monkeypatch.setattr(faiss_service, "doc_label", lambda doc_id: 42)
+        service = make_service(tmp_path)
+        vectors = make_vectors(3)
+        service.add_vectors_batch(vectors.tolist(), ["a", "b", "c"])
+        
+        assert sorted(service.labels.values()) == [42, 43, 44]
+        for i, doc_id in enumerate(["a", "b", "c"]):
+            assert nearest(service, vectors[i])[0][0] == doc_id
+        
+        service.remove_vector("b")
+        service.add_vector(vectors[1].tolist(), "d")
+        assert service.labels["d"] == 43
+        
+        service.save_index()
+        restarted = reopen(service)
+        assert restarted.labels == service.labels
+        assert nearest(restarted, vectors[1])[0][0] == "d"
+    
+    def test_rebuild_probes_collisions(self, tmp_path, monkeypatch):
+        """rebuild_index assigns the same probed labels as incremental adds"""
+        monkeypatch.setattr(faiss_service, "doc_label", lambda doc_id: 7)
+        service = make_service(tmp_path)
+        vectors = make_vectors(3)
+        service.rebuild_index(vectors.tolist(), ["a", "b", "c"])
+        
+        assert service.labels == {"a": 7, "b": 8, "c": 9}
+        for i, doc_id in enumerate(["a", "b", "c"]):
+            assert nearest(service, vectors[i])[0][0] == doc_id
+
+
+class TestCompaction:
+    """Test background compaction of tombstoned rows"""
+    
+    def test_compaction_drops_tombstones(self, tmp_path):
+        """Compaction shrinks the index and leaves search results unchanged"""
+        service = make_service(tmp_path, min_compaction_tombstones=10**6)
+        vectors = make_vectors(40)
+        service.add_vectors_batch(vectors.tolist(), [f"doc{i}" for i in range(40)])
+        for i in range(0, 40, 2):
+            service.remove_vector(f"doc{i}")
+        before = [nearest(service, vectors[i], k=5) for i in range(40)]
+        
+        assert service.compact()
+        assert service.index.ntotal == 20
+        assert service.tombstones == 0
+        assert [nearest(service, vectors[i], k=5) for i in range(40)] == before
+    
+    def test_mutations_during_build_are_carried_over(self, tmp_path, monkeypatch):
+        """Appends and deletes made while the new index builds survive the swap"""
+        service = make_service(tmp_path, min_compaction_tombstones=10**6)
+        vectors = make_vectors(24)
+        service.add_vectors_batch(vectors[:20].tolist(), [f"doc{i}" for i in range(20)])
+        for i in range(5):
+            service.remove_vector(f"doc{i}")
+        
+        build_index = service._new_index
+        
+        def new_index_with_concurrent_writes():
+            # Runs outside the lock, while compact() is between snapshot and swap
+            service.add_vectors_batch(vectors[20:24].tolist(), [f"doc{i}" for i in range(20, 24)])
+            service.remove_vector("doc10")
+            service.update_vector(vectors[0].tolist(), "doc11")
+            return build_index()
+        
+        monkeypatch.setattr(service, "_new_index", new_index_with_concurrent_writes)
+        assert service.compact()
+        monkeypatch.setattr(service, "_new_index", build_index)
+        
+        expected = sorted(f"doc{i}" for i in range(5, 24) if i != 10)
+        assert live_ids(service) == expected
+        assert service.get_index_size() == len(expected)
+        # Only the rows tombstoned mid-build remain: doc10 and doc11's old vector
+        assert service.tombstones == 2
+        for i in range(20, 24):
+            assert nearest(service, vectors[i])[0][0] == f"doc{i}"
+        assert "doc10" not in [doc_id for doc_id, _ in nearest(service, vectors[10], k=30)]
+        assert nearest(service, vectors[0])[0][0] == "doc11"
+    
+    def test_concurrent_appends_and_searches(self, tmp_path):
+        """Writers, searches and compactions interleave without losing documents"""
+        service = make_service(tmp_path, min_compaction_tombstones=8, compaction_threshold=0.1)
+        vectors = make_vectors(200)
+        errors = []
+        
+        def writer(start: int):
+            try:
+                for i in range(start, start + 50):
+                    service.add_vector(vectors[i].tolist(), f"doc{i}")
+                    if i % 3 == 0:
+                        service.remove_vector(f"doc{i}")
+            except Exception as e:
+                errors.append(e)
+        
+        def searcher():
+            try:
+                for i in range(100):
+                    hits = service.search(vectors[i].tolist(), k=5)
+                    distances = [distance for _, distance in hits]
+                    assert distances == sorted(distances)
+                    assert len({doc_id for doc_id, _ in hits}) == len(hits)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=writer, args=(start,)) for start in range(0, 200, 50)]
+        threads.append(threading.Thread(target=searcher))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        if service._compaction_thread is not None:
+            service._compaction_thread.join(timeout=60)
+        service.compact()
+        
+        assert not errors
+        expected = sorted(f"doc{i}" for i in range(200) if i % 3 != 0)
+        assert live_ids(service) == expected
+        assert service.get_index_size() == len(expected)
+        for i in range(1, 200, 3):
+            assert nearest(service, vectors[i])[0][0] == f"doc{i}"
+    
+    def test_rebuild_during_compaction_wins(self, tmp_path, monkeypatch):
+        """A compaction racing with rebuild_index discards its own result"""
+        service = make_service(tmp_path, min_compaction_tombstones=10**6)
+        vectors = make_vectors(10)
+        service.add_vectors_batch(vectors.tolist(), [f"doc{i}" for i in range(10)])
+        service.remove_vector("doc0")
+        
+        build_index = service._new_index
+        calls = []
+        
+        def new_index_with_rebuild():
+            calls.append(1)
+            if len(calls) == 1:
+                service.rebuild_index(vectors[:3].tolist(), ["doc0", "doc1", "doc2"])
+            return build_index()
+        
+        monkeypatch.setattr(service, "_new_index", new_index_with_rebuild)
+        assert not service.compact()
+        assert live_ids(service) == ["doc0", "doc1", "doc2"]
+
+
+class TestPersistence:
+    """Test the write-ahead log, atomic flushes and migration"""
+    
+    def test_save_crash_load_replays_wal(self, tmp_path):
+        """Writes after the last flush are recovered from the log on restart"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(12)
+        service.add_vectors_batch(vectors[:8].tolist(), [f"doc{i}" for i in range(8)])
+        service.save_index()
+        assert not service.is_dirty
+        
+        # Crash: logged but never flushed
+        service.add_vector(vectors[8].tolist(), "doc8")
+        service.remove_vector("doc1")
+        service.update_vector(vectors[9].tolist(), "doc2")
+        assert service.is_dirty
+        
+        restarted = FAISSService(dimension=DIM, index_path=service.index_path)
+        assert restarted.load_index()
+        assert live_ids(restarted) == sorted(f"doc{i}" for i in range(8))
+        assert restarted.replay_wal() == 3
+        assert live_ids(restarted) == live_ids(service)
+        for i in (0, 8, 9):
+            assert nearest(restarted, vectors[i]) == nearest(service, vectors[i])
+        
+        # New records continue the sequence, and a flush truncates the log
+        restarted.add_vector(vectors[10].tolist(), "doc10")
+        restarted.save_index()
+        assert restarted._read_wal() == []
+        assert live_ids(reopen(restarted)) == live_ids(restarted)
+    
+    def test_flush_keeps_only_newer_records(self, tmp_path):
+        """Records logged after a flush's snapshot stay in the log"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(4)
+        service.add_vector(vectors[0].tolist(), "doc0")
+        service.save_index()
+        service.add_vector(vectors[1].tolist(), "doc1")
+        
+        records = service._read_wal()
+        assert [record["ids"] for record in records] == [["doc1"]]
+        assert records[0]["seq"] > service._flushed_seq
+    
+    def test_torn_wal_record_is_skipped(self, tmp_path):
+        """A half-written last line from a crash does not block recovery"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(2)
+        service.add_vector(vectors[0].tolist(), "doc0")
+        service.save_index()
+        service.add_vector(vectors[1].tolist(), "doc1")
+        with open(service.wal_path, "a") as f:
+            f.write('{"seq": 99, "op": "add", "ids": ["doc')
+        
+        assert live_ids(reopen(service)) == ["doc0", "doc1"]
+    
+    def test_crash_mid_save_keeps_previous_pair(self, tmp_path, monkeypatch):
+        """A flush that dies before the table is replaced leaves the old pair loadable"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(6)
+        service.add_vectors_batch(vectors[:4].tolist(), [f"doc{i}" for i in range(4)])
+        service.save_index()
+        committed = json.loads(Path(service.meta_path).read_text())
+        service.add_vectors_batch(vectors[4:].tolist(), ["doc4", "doc5"])
+        
+        real_replace = os.replace
+        
+        def crash_on_commit(src, dst):
+            if dst == service.meta_path:
+                raise KeyboardInterrupt
+            return real_replace(src, dst)
+        
+        monkeypatch.setattr(faiss_service.os, "replace", crash_on_commit)
+        with pytest.raises(KeyboardInterrupt):
+            service.save_index()
+        monkeypatch.setattr(faiss_service.os, "replace", real_replace)
+        
+        assert json.loads(Path(service.meta_path).read_text()) == committed
+        restarted = FAISSService(dimension=DIM, index_path=service.index_path)
+        assert restarted.load_index()
+        assert restarted.get_index_size() == 4
+        assert restarted.replay_wal() == 1
+        assert live_ids(restarted) == [f"doc{i}" for i in range(6)]
+        
+        # The next successful flush removes the orphaned index file
+        restarted.save_index()
+        index_files = [name for name in os.listdir(tmp_path) if restarted._index_file_pattern.fullmatch(name)]
+        assert index_files == [json.loads(Path(service.meta_path).read_text())["index_file"]]
+    
+    def test_unreadable_index_needs_rebuild(self, tmp_path):
+        """A corrupt saved index is not papered over by replaying the log"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(3)
+        service.add_vectors_batch(vectors[:2].tolist(), ["doc0", "doc1"])
+        service.save_index()
+        service.add_vector(vectors[2].tolist(), "doc2")
+        index_file = json.loads(Path(service.meta_path).read_text())["index_file"]
+        with open(tmp_path / index_file, "ab") as f:
+            f.write(b"corrupt")
+        
+        restarted = FAISSService(dimension=DIM, index_path=service.index_path)
+        assert not restarted.load_index()
+        assert restarted.needs_rebuild
+        assert restarted._wal_seq == service._wal_seq
+        
+        restarted.rebuild_index(vectors.tolist(), ["doc0", "doc1", "doc2"])
+        assert not restarted.needs_rebuild
+        assert live_ids(reopen(restarted)) == ["doc0", "doc1", "doc2"]
+    
+    def test_rebuild_does_not_resurrect_dropped_documents(self, tmp_path):
+        """A crash after rebuild_index restores the rebuilt catalogue, not the old one"""
+        service = make_service(tmp_path)
+        vectors = make_vectors(3)
+        service.add_vectors_batch(vectors[:2].tolist(), ["a", "b"])
+        service.save_index()
+        service.add_vector(vectors[2].tolist(), "c")
+        
+        service.rebuild_index(vectors[:1].tolist(), ["a"])
+        assert service._read_wal() == []
+        
+        restarted = FAISSService(dimension=DIM, index_path=service.index_path)
+        assert restarted.load_index()
+        assert restarted.replay_wal() == 0
+        assert live_ids(restarted) == ["a"]
+    
+    def test_legacy_ids_file_is_migrated(self, tmp_path):
+        """A positional index with .ids/.tombstones files loads into the id-mapped format"""
+        vectors = make_vectors(5)
+        index_path = str(tmp_path / "internships.index")
+        legacy = faiss.IndexHNSWFlat(DIM, 32)
+        legacy.add(vectors)
+        faiss.write_index(legacy, index_path)
+        # Row 1 was deleted; "b" was later re-added at row 4
+        Path(index_path + ".ids").write_text("a\nb\nc\nd\nb\n")
+        Path(index_path + ".tombstones").write_text("1\n")
+        
+        service = FAISSService(dimension=DIM, index_path=index_path)
+        assert service.load_index()
+        assert live_ids(service) == ["a", "b", "c", "d"]
+        assert service.get_index_size() == 4
+        assert nearest(service, vectors[4])[0][0] == "b"
+        assert nearest(service, vectors[0])[0][0] == "a"
+        assert service.is_dirty
+        
+        service.save_index()
+        meta = json.loads(Path(service.meta_path).read_text())
+        assert meta["format_version"] == INDEX_FORMAT_VERSION
+        assert not os.path.exists(index_path)
+        restarted = reopen(service)
+        assert live_ids(restarted) == ["a", "b", "c", "d"]
+        assert nearest(restarted, vectors[4])[0][0] == "b"
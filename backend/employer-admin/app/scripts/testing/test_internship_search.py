@@ -0,0 +1,226 @@
+# File: scripts/testing/test_internship_search.py
+"""
+Behaviour tests for semantic search hydration: the internship LRU and
+the batched $in fetch behind it
+"""
+import pytest
+import asyncio
+import sys
+import numpy as np
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from bson import ObjectId
+from app.models.internship import Internship, InternshipSearchView
+from app.services import document_cache, internship_service
+from app.services.document_cache import DocumentLRUCache
+from app.services.faiss_service import FAISSService
+from app.services.internship_service import InternshipService
+
+DIM = 8
+
+
+def stored_id(doc_id: str):
+    return ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id
+
+
+class FakeEmbeddingService:
+    """Returns preset query vectors instead of running the model"""
+    
+    def __init__(self, queries: Dict[str, np.ndarray]):
+        self.queries = queries
+    
+    async def generate_embedding_async(self, text: str) -> List[float]:
+        return self.queries[text].tolist()
+
+
+class FakeFind:
+    """Stands in for the Beanie query returned by Internship.find"""
+    
+    def __init__(self, collection: "FakeInternships", query: Dict):
+        self.collection = collection
+        self.query = query
+    
+    async def to_list(self) -> List[InternshipSearchView]:
+        if self.collection.during_fetch is not None:
+            self.collection.during_fetch()
+        wanted = self.query["_id"]["$in"]
+        # MongoDB returns $in matches in storage order, not request order
+        return [doc for key, doc in self.collection.documents.items() if key in wanted]
+
+
+class FakeInternships:
+    """In-memory internships collection keyed by stored _id"""
+    
+    def __init__(self, documents: List[InternshipSearchView]):
+        self.documents = {stored_id(str(doc.id)): doc for doc in documents}
+        self.queries = []
+        self.during_fetch = None
+    
+    def find(self, query: Dict, projection_model=None) -> FakeFind:
+        assert projection_model is InternshipSearchView
+        self.queries.append(query["_id"]["$in"])
+        return FakeFind(self, query)
+
+
+def make_view(doc_id: str, title: str = None) -> InternshipSearchView:
+    return InternshipSearchView(
+        id=doc_id,
+        owner_uid="owner",
+        organisation_name="Org",
+        title=title or f"Internship {doc_id}",
+        description="Description",
+        location="Remote",
+    )
+
+
+@pytest.fixture
+def search_setup(tmp_path, monkeypatch):
+    """InternshipService over a real FAISS index, a fake collection and preset queries"""
+    ids = [str(ObjectId()) for _ in range(5)] + ["legacy-string-id"]
+    vectors = np.random.default_rng(5).standard_normal((len(ids), DIM)).astype("float32")
+    faiss = FAISSService(dimension=DIM, index_path=str(tmp_path / "internships.index"))
+    faiss.initialize_index()
+    faiss.add_vectors_batch(vectors.tolist(), ids)
+    
+    collection = FakeInternships([make_view(doc_id) for doc_id in ids])
+    cache = DocumentLRUCache(max_entries=16, ttl_seconds=60)
+    queries = {f"like {i}": vectors[i] for i in range(len(ids))}
+    monkeypatch.setattr(internship_service, "get_embedding_service", lambda: FakeEmbeddingService(queries))
+    monkeypatch.setattr(internship_service, "get_faiss_service", lambda: faiss)
+    monkeypatch.setattr(internship_service, "get_internship_cache", lambda: cache)
+    monkeypatch.setattr(Internship, "find", collection.find)
+    return InternshipService(), ids, collection
+
+
+class TestDocumentCache:
+    """Test the LRU of hydrated internships"""
+    
+    def test_lru_eviction(self):
+        """The least recently read entry is evicted first"""
+        cache = DocumentLRUCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get_many(["a"]) == {"a": 1}
+        cache.set("c", 3)
+        
+        assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 3 and stats["misses"] == 1
+    
+    def test_entries_expire(self, monkeypatch):
+        """Entries older than ttl_seconds miss and are dropped"""
+        now = [1000.0]
+        monkeypatch.setattr(document_cache.time, "monotonic", lambda: now[0])
+        cache = DocumentLRUCache(max_entries=4, ttl_seconds=10)
+        cache.set("a", 1)
+        
+        now[0] += 9.9
+        assert cache.get_many(["a"]) == {"a": 1}
+        now[0] += 0.1
+        assert cache.get_many(["a"]) == {}
+        assert cache.get_stats()["entries"] == 0
+    
+    def test_set_after_invalidation_is_dropped(self):
+        """A value read before an invalidation is not cached by a late set"""
+        cache = DocumentLRUCache(max_entries=4, ttl_seconds=60)
+        cache.set("a", "old")
+        generation = cache.generation
+        assert cache.invalidate("a")
+        assert not cache.invalidate("a")
+        
+        cache.set("a", "old", generation)
+        assert cache.get_many(["a"]) == {}
+        cache.set("a", "new", cache.generation)
+        assert cache.get_many(["a"]) == {"a": "new"}
+        
+        generation = cache.generation
+        cache.clear()
+        cache.set("b", "old", generation)
+        assert cache.get_many(["b"]) == {}
+    
+    def test_disabled_cache(self):
+        """max_entries=0 turns every lookup into a miss"""
+        cache = DocumentLRUCache(max_entries=0)
+        cache.set("a", 1)
+        assert not cache.enabled
+        assert cache.get_many(["a"]) == {}
+
+
+class TestSearchHydration:
+    """Test _fetch_search_documents and the search results built from it"""
+    
+    def test_one_query_for_all_misses(self, search_setup):
+        """Misses are fetched in one $in query; hits come from the cache"""
+        service, ids, collection = search_setup
+        
+        documents = asyncio.run(service._fetch_search_documents(ids[:3]))
+        assert sorted(documents) == sorted(ids[:3])
+        assert collection.queries == [[ObjectId(doc_id) for doc_id in ids[:3]]]
+        
+        documents = asyncio.run(service._fetch_search_documents(ids[1:4]))
+        assert sorted(documents) == sorted(ids[1:4])
+        assert collection.queries[1] == [ObjectId(ids[3])]
+        
+        asyncio.run(service._fetch_search_documents(ids[:4]))
+        assert len(collection.queries) == 2
+    
+    def test_string_ids_are_not_converted(self, search_setup):
+        """Ids that are not ObjectIds are looked up as stored"""
+        service, ids, collection = search_setup
+        documents = asyncio.run(service._fetch_search_documents(["legacy-string-id", ids[0]]))
+        
+        assert sorted(documents) == sorted(["legacy-string-id", ids[0]])
+        assert collection.queries == [["legacy-string-id", ObjectId(ids[0])]]
+    
+    def test_missing_documents_are_absent(self, search_setup):
+        """Ids deleted from MongoDB are left out instead of failing the fetch"""
+        service, ids, collection = search_setup
+        ghost = str(ObjectId())
+        documents = asyncio.run(service._fetch_search_documents([ghost, ids[0]]))
+        
+        assert list(documents) == [ids[0]]
+        assert service.document_cache.get_many([ghost]) == {}
+    
+    def test_fetch_racing_an_update_is_not_cached(self, search_setup):
+        """An update that invalidates during the fetch keeps the old document out of the LRU"""
+        service, ids, collection = search_setup
+        collection.during_fetch = lambda: service.document_cache.invalidate(ids[0])
+        
+        documents = asyncio.run(service._fetch_search_documents([ids[0]]))
+        assert documents[ids[0]].title == f"Internship {ids[0]}"
+        assert service.document_cache.get_many([ids[0]]) == {}
+        
+        # The next search reads the updated document
+        collection.during_fetch = None
+        collection.documents[ObjectId(ids[0])] = make_view(ids[0], title="Updated")
+        documents = asyncio.run(service._fetch_search_documents([ids[0]]))
+        assert documents[ids[0]].title == "Updated"
+        assert service.document_cache.get_many([ids[0]])[ids[0]].title == "Updated"
+    
+    def test_results_keep_faiss_order(self, search_setup):
+        """Hits are returned in rank order whatever order MongoDB returns them in"""
+        service, ids, collection = search_setup
+        ranked = service.faiss_service.search(service.embedding_service.queries["like 4"].tolist(), k=4)
+        
+        results = asyncio.run(service.search_similar_internships("like 4", top_k=4))
+        assert [str(item["internship"].id) for item in results] == [doc_id for doc_id, _ in ranked]
+        assert str(results[0]["internship"].id) == ids[4]
+        assert results[0]["similarity_percentage"] == pytest.approx(100.0, abs=1e-3)
+        scores = [item["similarity_score"] for item in results]
+        assert scores == sorted(scores)
+    
+    def test_results_skip_removed_documents(self, search_setup):
+        """A hit whose document is gone from MongoDB is dropped, the rest keep their rank"""
+        service, ids, collection = search_setup
+        ranked = [doc_id for doc_id, _ in service.faiss_service.search(
+            service.embedding_service.queries["like 1"].tolist(), k=3
+        )]
+        del collection.documents[stored_id(ranked[1])]
+        
+        results = asyncio.run(service.search_similar_internships("like 1", top_k=3))
+        assert [str(item["internship"].id) for item in results] == [ranked[0], ranked[2]]
@@ -0,0 +1,114 @@
+# app/services/document_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class DocumentLRUCache:
+    """
+    In-process LRU of recently served documents, keyed by id string.
+    
+    Entries also expire after ttl_seconds, which bounds staleness for writes
+    made by other workers or services that cannot invalidate this process.
+    max_entries=0 disables the cache (every get misses, set is a no-op).
+    
+    A fetch that races with an update must not re-cache the old document:
+    callers read generation before querying and pass it to set(), which
+    drops the value if anything was invalidated in between.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, name: str = "documents"):
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the cached, unexpired subset of keys"""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or now >= entry[1]:
+                    if entry is not None:
+                        del self._entries[key]
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[0]
+                self.hits += 1
+        return found
+    
+    def set(self, key: str, value: Any, generation: Optional[int] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            self.generation += 1
+            if self._entries.pop(key, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+    
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global singleton instance
+_internship_cache: Optional[DocumentLRUCache] = None
+
+
+def get_internship_cache() -> DocumentLRUCache:
+    """Get or create the cache of internships served by semantic search."""
+    global _internship_cache
+    if _internship_cache is None:
+        from app.config import settings
+        _internship_cache = DocumentLRUCache(
+            max_entries=settings.INTERNSHIP_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.INTERNSHIP_CACHE_TTL_SECONDS,
+            name="internships",
+        )
+    return _internship_cache
+
+
+def invalidate_cached_internship(internship_id: Any):
+    """Drop an internship from the search cache after it is updated, closed or deleted."""
+    get_internship_cache().invalidate(str(internship_id))
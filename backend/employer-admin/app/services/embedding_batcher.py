@@ -0,0 +1,232 @@
+# app/services/embedding_batcher.py
+"""
+Micro-batching front end for a sentence-transformer model.
+
+Concurrent single-text encodes are queued and handed to one worker thread,
+which waits up to max_wait_ms (or until max_batch_size texts are queued) and
+runs a single batched forward pass. Each caller blocks on, or awaits, its own
+future. The module has no app imports so both backends ship the same file.
+"""
+import asyncio
+import bisect
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingQueueFullError(RuntimeError):
+    """Raised when the encode queue stays full for longer than the enqueue timeout"""
+
+
+class Histogram:
+    """Fixed-bucket histogram; bucket i counts observations <= bounds[i]"""
+    
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += value
+            self.count += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"le_{bound:g}" for bound in self.bounds] + ["le_inf"]
+            return {
+                "buckets": dict(zip(labels, self.counts)),
+                "count": self.count,
+                "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            }
+
+
+class _EncodeRequest:
+    __slots__ = ("text", "future", "enqueued_at")
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatchEncoder:
+    """
+    Coalesces concurrent encodes into batched forward passes.
+    
+    encode_batch receives a list of texts and must return one row per text.
+    encode() is for synchronous callers (including executor threads) and
+    encode_async() for coroutines; both return a 1-D float32 vector. When the
+    queue is full, encode() waits up to enqueue_timeout_seconds for room but
+    encode_async() fails at once, so the event loop never blocks.
+    """
+    
+    LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+    BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+    
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], Any],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        enqueue_timeout_seconds: float = 1.0,
+        name: str = "embeddings"
+    ):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000.0
+        self.enqueue_timeout_seconds = enqueue_timeout_seconds
+        self.name = name
+        
+        self._queue: "queue.Queue[Optional[_EncodeRequest]]" = queue.Queue(maxsize=max(1, max_queue_size))
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        
+        self.latency_ms = Histogram(self.LATENCY_BUCKETS_MS)
+        self.batch_sizes = Histogram(self.BATCH_SIZE_BUCKETS)
+        self.requests = 0
+        self.batches = 0
+        self.rejected = 0
+        self.errors = 0
+    
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    
+    def submit(self, text: str, wait: bool = True) -> Future:
+        """
+        Queue one text; the returned future resolves to its vector. With
+        wait=False a full queue raises immediately instead of blocking.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name}: encoder is closed")
+        self._ensure_worker()
+        
+        request = _EncodeRequest(text)
+        try:
+            if wait:
+                self._queue.put(request, timeout=self.enqueue_timeout_seconds)
+            else:
+                self._queue.put_nowait(request)
+        except queue.Full:
+            self.rejected += 1
+            raise EmbeddingQueueFullError(
+                f"{self.name}: encode queue full ({self._queue.maxsize} pending)"
+            )
+        self.requests += 1
+        return request.future
+    
+    def encode(self, text: str) -> np.ndarray:
+        """Encode one text, blocking until its batch has run"""
+        return self.submit(text).result()
+    
+    async def encode_async(self, text: str) -> np.ndarray:
+        """Encode one text without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(text, wait=False))
+    
+    def close(self, timeout: float = 5.0):
+        """Stop the worker after draining queued requests"""
+        self._closed = True
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(None, timeout=timeout)
+            worker.join(timeout)
+        self._worker = None
+    
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters plus latency (queue + encode, ms) and batch-size histograms"""
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000.0,
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self._queue.maxsize,
+            "requests": self.requests,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "latency_ms": self.latency_ms.snapshot(),
+            "batch_size": self.batch_sizes.snapshot(),
+        }
+    
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f"{self.name}-batcher", daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+            
+            self._run_batch(batch)
+            if stop:
+                return
+    
+    def _run_batch(self, batch: List[_EncodeRequest]):
+        # Drop requests whose callers gave up; the rest can no longer be cancelled
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        # Identical texts in one batch are encoded once
+        unique_texts: Dict[str, int] = {}
+        for request in batch:
+            unique_texts.setdefault(request.text, len(unique_texts))
+        
+        try:
+            vectors = np.asarray(self.encode_batch(list(unique_texts)), dtype='float32')
+            vectors = vectors.reshape(len(unique_texts), -1)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"{self.name}: batched encode of {len(batch)} texts failed: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        
+        self.batches += 1
+        self.batch_sizes.observe(len(batch))
+        done = time.monotonic()
+        for request in batch:
+            request.future.set_result(vectors[unique_texts[request.text]].copy())
+            self.latency_ms.observe((done - request.enqueued_at) * 1000.0)
@@ -1,8 +1,9 @@
 # app/services/embedding_service.py
 import logging
 from typing import List, Optional
-from sentence_transformers import SentenceTransformer
-import torch
+
+from app.services.embedding_batcher import MicroBatchEncoder
+from app.services.sentence_encoder import BACKEND_ONNX, BACKEND_TORCH, load_sentence_encoder
 
 logger = logging.getLogger(__name__)
 
@@ -11,20 +12,55 @@ class EmbeddingService:
     """
     Service for generating semantic embeddings using sentence-transformers.
     Uses all-MiniLM-L6-v2 model (384 dimensions).
+    Concurrent encodes are coalesced into batched forward passes; the model
+    runs on PyTorch or, with backend="onnx", on ONNX Runtime.
     """
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 1024,
+        backend: str = BACKEND_TORCH,
+        onnx_cache_dir: Optional[str] = None,
+        onnx_quantize: bool = True,
+    ):
         self.model_name = model_name
         self.model = None
         self.dimension = 384  # all-MiniLM-L6-v2 dimension
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.backend = backend
+        self.onnx_cache_dir = onnx_cache_dir
+        self.onnx_quantize = onnx_quantize
+        self.device = self._select_device(backend)
+        self.batcher = MicroBatchEncoder(
+            self._encode_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            max_queue_size=max_queue_size,
+            name="employer-embeddings",
+        )
         logger.info(f"EmbeddingService initialized with device: {self.device}")
     
+    @staticmethod
+    def _select_device(backend: str) -> str:
+        """ONNX Runtime runs on CPU; torch is only imported for the PyTorch backend."""
+        if backend == BACKEND_ONNX:
+            return "cpu"
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    
     def load_model(self):
         """Load the sentence transformer model."""
         if self.model is None:
-            logger.info(f"Loading embedding model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name, device=self.device)
+            logger.info(f"Loading embedding model: {self.model_name} ({self.backend})")
+            self.model = load_sentence_encoder(
+                self.model_name,
+                backend=self.backend,
+                device=self.device,
+                cache_dir=self.onnx_cache_dir,
+                quantize=self.onnx_quantize,
+            )
             logger.info("Embedding model loaded successfully")
     
     def build_internship_text(
@@ -96,6 +132,16 @@ class EmbeddingService:
             return duration_days / 30.0
         return None
     
+    def _encode_batch(self, texts: List[str]):
+        """One forward pass over a micro-batch (runs on the batcher thread)."""
+        return self.model.encode(
+            texts,
+            batch_size=self.batcher.max_batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,  # L2 normalization
+            show_progress_bar=False,
+        )
+    
     def generate_embedding(self, text: str) -> List[float]:
         """
         Generate embedding vector for given text.
@@ -105,12 +151,20 @@ class EmbeddingService:
             self.load_model()
         
         try:
-            # Generate embedding
-            embedding = self.model.encode(
-                text,
-                convert_to_numpy=True,
-                normalize_embeddings=True  # L2 normalization
-            )
+            return self.batcher.encode(text).tolist()
+        except Exception as e:
+            logger.error(f"Error generating embedding: {e}")
+            raise
+    
+    async def generate_embedding_async(self, text: str) -> List[float]:
+        """
+        Same as generate_embedding, awaited instead of blocking the event loop.
+        """
+        if self.model is None:
+            self.load_model()
+        
+        try:
+            embedding = await self.batcher.encode_async(text)
             return embedding.tolist()
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
@@ -144,6 +198,35 @@ class EmbeddingService:
         )
         logger.debug(f"Generated text for embedding: {text}")
         return self.generate_embedding(text)
+    
+    async def generate_internship_embedding_async(
+        self,
+        skills: Optional[List[str]] = None,
+        location: Optional[str] = None,
+        state: Optional[str] = None,
+        city: Optional[str] = None,
+        sector: Optional[str] = None,
+        stipend: Optional[int] = None,
+        duration_days: Optional[int] = None,
+        duration_weeks: Optional[float] = None,
+        duration_months: Optional[float] = None,
+    ) -> List[float]:
+        """
+        Same as generate_internship_embedding, awaited instead of blocking the event loop.
+        """
+        text = self.build_internship_text(
+            skills=skills,
+            location=location,
+            state=state,
+            city=city,
+            sector=sector,
+            stipend=stipend,
+            duration_days=duration_days,
+            duration_weeks=duration_weeks,
+            duration_months=duration_months,
+        )
+        logger.debug(f"Generated text for embedding: {text}")
+        return await self.generate_embedding_async(text)
 
 
 # Global singleton instance
@@ -154,6 +237,14 @@ def get_embedding_service() -> EmbeddingService:
     """Get or create the global embedding service instance."""
     global _embedding_service
     if _embedding_service is None:
-        _embedding_service = EmbeddingService()
+        from app.config import settings
+        _embedding_service = EmbeddingService(
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            max_queue_size=settings.EMBEDDING_QUEUE_MAX_SIZE,
+            backend=settings.EMBEDDING_BACKEND,
+            onnx_cache_dir=settings.EMBEDDING_ONNX_CACHE_DIR,
+            onnx_quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+        )
         _embedding_service.load_model()
     return _embedding_service
@@ -1,20 +1,127 @@
 # app/services/faiss_service.py
+import base64
+import hashlib
+import json
 import logging
 import os
+import re
+import time
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import numpy as np
 import faiss
 import threading
+from contextlib import contextmanager
 from app.config import BASE_DIR
 
 logger = logging.getLogger(__name__)
 
+INDEX_FORMAT_VERSION = 3
+_READABLE_FORMAT_VERSIONS = (2, 3)  # 2: unversioned index file beside the table
+_LABEL_MASK = (1 << 63) - 1
+_DEAD = -1  # Label of a tombstoned row
+
+
+def doc_label(doc_id: str) -> int:
+    """Stable non-negative int64 label for a MongoDB ObjectId string."""
+    digest = hashlib.blake2b(doc_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & _LABEL_MASK
+
+
+def _file_checksum(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _fsync_path(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer. Waiting writers block new readers,
+    so a steady stream of searches cannot starve index mutations; when a
+    writer releases, the readers already waiting go before the next writer,
+    so back-to-back mutations cannot starve searches either.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        self._readers_waiting = 0
+        self._reader_passes = 0
+    
+    @contextmanager
+    def read(self):
+        with self._cond:
+            self._readers_waiting += 1
+            while self._writer or (self._writers_waiting and not self._reader_passes):
+                self._cond.wait()
+            self._readers_waiting -= 1
+            if self._reader_passes:
+                self._reader_passes -= 1
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers or self._reader_passes:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._reader_passes = self._readers_waiting
+                self._cond.notify_all()
+
 
 class FAISSService:
     """
     Service for managing FAISS index for fast similarity search and duplicate detection.
     Uses HNSWFlat index with L2 metric for efficient approximate nearest neighbor search.
+    
+    Vectors are stored in an IndexIDMap2 under stable int64 labels derived
+    from the ObjectId, so the labels travel inside the index file instead of
+    depending on row positions. HNSW cannot delete in place: deletes and
+    updates tombstone the old row by relabeling it -1 (filtered out of search
+    results, with over-fetch) and updates append the new vector. Once
+    tombstones exceed compaction_threshold of the index, a background thread
+    rebuilds it from the live vectors.
+    
+    Searches (HNSW search is safe for concurrent readers) and snapshotting
+    for persistence take the read side of a readers-writer lock; only
+    structural mutations take the write side.
+    
+    Mutations are appended to a write-ahead log and mark the index dirty; a
+    background thread flushes a snapshot at most every flush_interval_seconds
+    (sooner after flush_max_mutations writes), and startup replays the log
+    entries newer than the last flush.
+    
+    Each flush writes the index to a new content-addressed file and then
+    replaces the id table, which names that file; the table replace is the
+    commit point, so a crash mid-flush leaves the previous pair loadable.
+    If saved files exist but cannot be loaded, needs_rebuild is set and the
+    index must be rebuilt from MongoDB rather than from the log alone.
     """
     
     def __init__(
@@ -25,6 +132,11 @@ class FAISSService:
         m: int = 32,
         ef_search: int = 64,
         ef_construction: int = 80,
+        compaction_threshold: float = 0.2,
+        min_compaction_tombstones: int = 64,
+        flush_interval_seconds: float = 5.0,
+        flush_max_mutations: int = 100,
+        wal_fsync: bool = False,
     ):
         self.dimension = dimension
         # Use BASE_DIR to construct absolute path if relative path provided
@@ -33,27 +145,72 @@ class FAISSService:
         elif not os.path.isabs(index_path):
             index_path = str(BASE_DIR / index_path)
         self.index_path = index_path
+        self.meta_path = index_path + ".meta.json"
+        self._index_file_pattern = re.compile(re.escape(os.path.basename(index_path)) + r"\.[0-9a-f]{16}")
+        self.wal_path = index_path + ".wal"
         self.duplicate_threshold = duplicate_threshold
         self.m = m
         self.ef_search = ef_search
         self.ef_construction = ef_construction
+        self.compaction_threshold = compaction_threshold
+        self.min_compaction_tombstones = min_compaction_tombstones
+        
+        self.index: Optional[faiss.IndexIDMap2] = None
+        self.doc_ids: Dict[int, str] = {}  # Live label -> MongoDB ObjectId
+        self.labels: Dict[str, int] = {}  # Live MongoDB ObjectId -> label
+        self.rows: Dict[int, int] = {}  # Live label -> row in the underlying HNSW index
+        self.tombstones = 0
+        self.lock = ReadWriteLock()  # Searches share it; mutations are exclusive
+        self._generation = 0  # Bumped whenever self.index is replaced
+        self.needs_rebuild = False  # Saved index unreadable; rebuild from MongoDB
+        self._compaction_thread: Optional[threading.Thread] = None
         
-        self.index: Optional[faiss.IndexHNSWFlat] = None
-        self.id_map: List[str] = []  # Maps FAISS index position to MongoDB ObjectId
-        self.lock = threading.Lock()  # Thread-safe operations
+        # Write-ahead log and debounced persistence
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_max_mutations = flush_max_mutations
+        self.wal_fsync = wal_fsync
+        self._wal_file = None
+        self._wal_seq = 0  # Sequence number of the last logged mutation
+        self._flushed_seq = 0  # Last sequence number contained in the saved index
+        self._mutations = 0  # Mutations not yet flushed
+        self._dirty_since = 0.0
+        self._save_lock = threading.Lock()  # One flush at a time
+        self._flush_requested = threading.Event()
+        self._stop_persistence = threading.Event()
+        self._persistence_thread: Optional[threading.Thread] = None
         
         logger.info(
             f"FAISSService initialized with dimension={dimension}, "
             f"duplicate_threshold={duplicate_threshold}"
         )
     
+    def _new_index(self) -> faiss.IndexIDMap2:
+        hnsw = faiss.IndexHNSWFlat(self.dimension, self.m)
+        hnsw.hnsw.efConstruction = self.ef_construction
+        hnsw.hnsw.efSearch = self.ef_search
+        return faiss.IndexIDMap2(hnsw)
+    
+    def _row_labels(self, index: Optional[faiss.IndexIDMap2] = None) -> np.ndarray:
+        """Writable view of the row -> label table inside an IndexIDMap2."""
+        index = index if index is not None else self.index
+        if index.id_map.size() == 0:
+            return np.zeros(0, dtype=np.int64)
+        return faiss.rev_swig_ptr(index.id_map.data(), index.id_map.size())
+    
     def initialize_index(self):
         """Create a new FAISS HNSW index."""
+        with self.lock.write():
+            self._reset_index()
+    
+    def _reset_index(self):
+        """Swap in an empty index and tables (write lock held)."""
         logger.info("Initializing new FAISS HNSWFlat index")
-        self.index = faiss.IndexHNSWFlat(self.dimension, self.m)
-        self.index.hnsw.efConstruction = self.ef_construction
-        self.index.hnsw.efSearch = self.ef_search
-        self.id_map = []
+        self.index = self._new_index()
+        self.doc_ids = {}
+        self.labels = {}
+        self.rows = {}
+        self.tombstones = 0
+        self._generation += 1
         logger.info(
             f"FAISS index initialized: M={self.m}, "
             f"efConstruction={self.ef_construction}, efSearch={self.ef_search}"
@@ -63,57 +220,333 @@ class FAISSService:
         """
         Load FAISS index from disk if it exists.
         Returns True if successfully loaded, False otherwise.
+        
+        The id table must carry the checksum of the index file it was saved
+        with; a mismatched pair is rejected rather than served with drifted ids.
+        Indexes saved in the old positional format (.ids file) are migrated.
+        
+        When saved files exist but cannot be loaded, needs_rebuild is set:
+        the log only holds writes since the last flush, so replaying it onto
+        an empty index would serve a partial catalogue.
         """
-        if not os.path.exists(self.index_path):
+        if not os.path.exists(self.meta_path) and not os.path.exists(self.index_path):
             logger.warning(f"Index file not found at {self.index_path}")
             return False
         
+        if self._load_saved_index():
+            return True
+        
+        self.needs_rebuild = True
+        # New log records must sort after the unusable ones still on disk
+        self._wal_seq = max([self._wal_seq] + [record["seq"] for record in self._read_wal()])
+        return False
+    
+    def _load_saved_index(self) -> bool:
         try:
-            with self.lock:
-                logger.info(f"Loading FAISS index from {self.index_path}")
-                self.index = faiss.read_index(self.index_path)
+            with self.lock.write():
+                if not os.path.exists(self.meta_path):
+                    return self._load_legacy_index()
+                
+                with open(self.meta_path, "r") as f:
+                    meta = json.load(f)
                 
-                # Load ID mapping
-                id_map_path = self.index_path + ".ids"
-                if os.path.exists(id_map_path):
-                    with open(id_map_path, "r") as f:
-                        self.id_map = [line.strip() for line in f.readlines()]
-                    logger.info(f"Loaded {len(self.id_map)} ID mappings")
+                if meta.get("format_version") not in _READABLE_FORMAT_VERSIONS:
+                    logger.error(f"Unsupported FAISS index format version: {meta.get('format_version')}")
+                    return False
+                index_file = meta.get("index_file")
+                if index_file is None:
+                    index_path = self.index_path
                 else:
-                    logger.warning("ID mapping file not found, creating empty map")
-                    self.id_map = []
+                    index_path = os.path.join(os.path.dirname(self.index_path), index_file)
+                if not os.path.exists(index_path):
+                    logger.error(f"FAISS index file named by the id table is missing: {index_path}")
+                    return False
+                
+                logger.info(f"Loading FAISS index from {index_path}")
+                if meta.get("index_checksum") != _file_checksum(index_path):
+                    logger.error("FAISS index file does not match its id table (checksum mismatch)")
+                    return False
+                
+                index = faiss.read_index(index_path)
+                if not isinstance(index, faiss.IndexIDMap2):
+                    logger.error("FAISS index file is not an id-mapped index")
+                    return False
+                
+                self.index = index
+                faiss.downcast_index(self.index.index).hnsw.efSearch = self.ef_search
+                self._rebuild_tables({int(label): doc_id for label, doc_id in meta.get("ids", [])})
+                self._flushed_seq = self._wal_seq = int(meta.get("wal_seq", 0))
+                self._generation += 1
                 
                 logger.info(
-                    f"FAISS index loaded successfully with {self.index.ntotal} vectors"
+                    f"FAISS index loaded successfully with {self.index.ntotal} vectors "
+                    f"({len(self.doc_ids)} live)"
                 )
                 return True
         except Exception as e:
             logger.error(f"Error loading FAISS index: {e}")
             return False
     
+    def _load_legacy_index(self) -> bool:
+        """Migrate a positional HNSWFlat index plus .ids/.tombstones files (write lock held)."""
+        logger.info(f"Migrating positional FAISS index at {self.index_path}")
+        legacy = faiss.read_index(self.index_path)
+        
+        id_map_path = self.index_path + ".ids"
+        if not os.path.exists(id_map_path):
+            logger.error("ID mapping file not found, cannot migrate FAISS index")
+            return False
+        with open(id_map_path, "r") as f:
+            id_map = [line.strip() for line in f.readlines()]
+        
+        dead = set()
+        tombstone_path = self.index_path + ".tombstones"
+        if os.path.exists(tombstone_path):
+            with open(tombstone_path, "r") as f:
+                dead = {int(line) for line in f.read().split()}
+        
+        # Later rows of the same document supersede earlier ones
+        latest: Dict[str, int] = {}
+        for pos, doc_id in enumerate(id_map[:legacy.ntotal]):
+            if pos not in dead:
+                latest[doc_id] = pos
+        
+        self._reset_index()
+        if latest:
+            positions = np.array(sorted(latest.values()), dtype=np.int64)
+            vectors = legacy.reconstruct_n(0, legacy.ntotal)[positions]
+            self._append(vectors, [id_map[pos] for pos in positions])
+        
+        self._mutations += 1  # Written in the new format on the next flush
+        self._dirty_since = time.monotonic()
+        logger.info(f"Migrated {len(latest)} vectors to id-mapped FAISS index")
+        return True
+    
+    def _rebuild_tables(self, table: Dict[int, str]):
+        """Recompute label/row lookups from the index's labels (write lock held)."""
+        labels = self._row_labels()
+        self.doc_ids = {}
+        self.labels = {}
+        self.rows = {}
+        for row, label in enumerate(labels.tolist()):
+            if label == _DEAD:
+                continue
+            doc_id = table.get(label)
+            if doc_id is None:
+                labels[row] = _DEAD
+                continue
+            if label in self.rows:
+                labels[self.rows[label]] = _DEAD
+            self.rows[label] = row
+            self.doc_ids[label] = doc_id
+            self.labels[doc_id] = label
+        self.tombstones = int((labels == _DEAD).sum())
+    
     def save_index(self):
-        """Persist FAISS index and ID mapping to disk."""
+        """
+        Persist FAISS index and its versioned id table to disk.
+        
+        The index is cloned under the lock and serialized without it, so
+        searches and writes continue during the disk write. The index goes to
+        a new file named after its checksum, then the table naming it (and
+        the last write-ahead log entry the snapshot contains) replaces the
+        old table. Index files no longer named by the table are removed last.
+        """
         try:
-            with self.lock:
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with self._save_lock:
+                with self.lock.read():
+                    if self.index is None:
+                        return
+                    snapshot = faiss.clone_index(self.index)
+                    ids = [[label, doc_id] for label, doc_id in self.doc_ids.items()]
+                    wal_seq = self._wal_seq
+                    mutations = self._mutations
                 
-                # Save FAISS index
-                logger.info(f"Saving FAISS index to {self.index_path}")
-                faiss.write_index(self.index, self.index_path)
+                index_file, checksum = self._write_index_file(snapshot)
+                self._commit_table(index_file, checksum, snapshot.ntotal, wal_seq, ids)
+                self._remove_stale_index_files(index_file)
                 
-                # Save ID mapping
-                id_map_path = self.index_path + ".ids"
-                with open(id_map_path, "w") as f:
-                    f.write("\n".join(self.id_map))
+                with self.lock.write():
+                    self._mutations = max(0, self._mutations - mutations)
+                    self._dirty_since = time.monotonic()
+                    self._flushed_seq = wal_seq
+                    self._truncate_wal()
                 
                 logger.info(
-                    f"FAISS index saved successfully with {self.index.ntotal} vectors"
+                    f"FAISS index saved successfully with {snapshot.ntotal} vectors"
                 )
         except Exception as e:
             logger.error(f"Error saving FAISS index: {e}")
             raise
     
+    def _write_index_file(self, index: faiss.IndexIDMap2) -> Tuple[str, str]:
+        """Write index beside the current one under its checksum; returns (file name, checksum)."""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_index_path = f"{self.index_path}.{os.getpid()}.tmp"
+        faiss.write_index(index, tmp_index_path)
+        checksum = _file_checksum(tmp_index_path)
+        index_file = f"{os.path.basename(self.index_path)}.{checksum[:16]}"
+        logger.info(f"Saving FAISS index to {index_file}")
+        _fsync_path(tmp_index_path)
+        os.replace(tmp_index_path, os.path.join(os.path.dirname(self.index_path), index_file))
+        return index_file, checksum
+    
+    def _commit_table(self, index_file: str, checksum: str, ntotal: int, wal_seq: int, ids: List[List]):
+        """Commit a written index file by replacing the id table that names it."""
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "dimension": self.dimension,
+            "ntotal": ntotal,
+            "index_file": index_file,
+            "index_checksum": checksum,
+            "wal_seq": wal_seq,
+            "ids": ids,
+        }
+        tmp_meta_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_meta_path, self.meta_path)
+    
+    def _remove_stale_index_files(self, current: str):
+        """Delete index files superseded by the committed table (save lock held)."""
+        directory = os.path.dirname(self.index_path)
+        for name in os.listdir(directory):
+            stale = name != current and (
+                self._index_file_pattern.fullmatch(name)
+                or name == os.path.basename(self.index_path)
+            )
+            if stale:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError as e:
+                    logger.warning(f"Could not remove stale FAISS index file {name}: {e}")
+    
+    # ------------------------------------------------------------------
+    # Write-ahead log and background persistence
+    # ------------------------------------------------------------------
+    
+    def _log(self, op: str, doc_ids: List[str], vectors: Optional[np.ndarray] = None):
+        """Append one mutation to the WAL and mark the index dirty (write lock held)."""
+        self._wal_seq += 1
+        record = {"seq": self._wal_seq, "op": op, "ids": doc_ids}
+        if vectors is not None:
+            record["vectors"] = base64.b64encode(np.ascontiguousarray(vectors, dtype=np.float32).tobytes()).decode()
+        
+        if self._wal_file is None:
+            os.makedirs(os.path.dirname(self.wal_path), exist_ok=True)
+            self._wal_file = open(self.wal_path, "a")
+        self._wal_file.write(json.dumps(record) + "\n")
+        self._wal_file.flush()
+        if self.wal_fsync:
+            os.fsync(self._wal_file.fileno())
+        
+        if self._mutations == 0:
+            self._dirty_since = time.monotonic()
+        self._mutations += 1
+        if self._mutations >= self.flush_max_mutations:
+            self._flush_requested.set()
+    
+    def _read_wal(self) -> List[Dict]:
+        """WAL records in order; a torn last line from a crash is skipped."""
+        if not os.path.exists(self.wal_path):
+            return []
+        records = []
+        with open(self.wal_path, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Skipping unreadable FAISS WAL record")
+        return records
+    
+    def _truncate_wal(self):
+        """Drop WAL records already contained in the saved index (write lock held)."""
+        if self._wal_file is not None:
+            self._wal_file.close()
+            self._wal_file = None
+        pending = [record for record in self._read_wal() if record["seq"] > self._flushed_seq]
+        tmp_path = f"{self.wal_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(json.dumps(record) + "\n" for record in pending)
+        os.replace(tmp_path, self.wal_path)
+    
+    def replay_wal(self) -> int:
+        """
+        Re-apply mutations logged after the last flush; returns how many.
+        Call after load_index (or initialize_index when there is no index).
+        """
+        replayed = 0
+        with self.lock.write():
+            if self.index is None:
+                self._reset_index()
+            for record in self._read_wal():
+                if record["seq"] <= self._flushed_seq:
+                    continue
+                if record["op"] == "add":
+                    vectors = np.frombuffer(base64.b64decode(record["vectors"]), dtype=np.float32)
+                    self._append(vectors.reshape(len(record["ids"]), self.dimension), record["ids"])
+                elif record["op"] == "remove":
+                    for doc_id in record["ids"]:
+                        self._tombstone(doc_id)
+                self._wal_seq = max(self._wal_seq, record["seq"])
+                self._mutations += 1
+                replayed += 1
+        
+        if replayed:
+            self._dirty_since = time.monotonic()
+            logger.info(f"Replayed {replayed} FAISS WAL records since the last flush")
+        return replayed
+    
+    def start_persistence(self):
+        """Start the background thread that flushes the index when dirty."""
+        if self._persistence_thread is not None and self._persistence_thread.is_alive():
+            return
+        self._stop_persistence.clear()
+        self._persistence_thread = threading.Thread(
+            target=self._persistence_loop, name="faiss-persistence", daemon=True
+        )
+        self._persistence_thread.start()
+    
+    def _persistence_loop(self):
+        while not self._stop_persistence.is_set():
+            if self._mutations:
+                timeout = max(0.0, self._dirty_since + self.flush_interval_seconds - time.monotonic())
+            else:
+                timeout = self.flush_interval_seconds
+            self._flush_requested.wait(timeout)
+            self._flush_requested.clear()
+            if self._stop_persistence.is_set():
+                break
+            
+            if self._mutations and (
+                self._mutations >= self.flush_max_mutations
+                or time.monotonic() - self._dirty_since >= self.flush_interval_seconds
+            ):
+                try:
+                    self.save_index()
+                except Exception:
+                    time.sleep(self.flush_interval_seconds)  # Already logged; retry later
+    
+    def close(self):
+        """Stop background persistence and flush outstanding writes."""
+        self._stop_persistence.set()
+        self._flush_requested.set()
+        if self._persistence_thread is not None:
+            self._persistence_thread.join()
+            self._persistence_thread = None
+        if self._mutations:
+            self.save_index()
+        with self.lock.write():
+            if self._wal_file is not None:
+                self._wal_file.close()
+                self._wal_file = None
+    
+    @property
+    def is_dirty(self) -> bool:
+        return self._mutations > 0
+    
     def add_vector(self, embedding: List[float], doc_id: str):
         """
         Add a single vector to the FAISS index.
@@ -122,18 +555,28 @@ class FAISSService:
             embedding: The embedding vector (384-dim)
             doc_id: MongoDB document ID as string
         """
-        if self.index is None:
-            self.initialize_index()
-        
         try:
-            with self.lock:
-                vector = np.array([embedding], dtype=np.float32)
-                self.index.add(vector)
-                self.id_map.append(doc_id)
+            with self.lock.write():
+                if self.index is None:
+                    self._reset_index()
+                vectors = np.array([embedding], dtype=np.float32)
+                self._append(vectors, [doc_id])
+                self._log("add", [doc_id], vectors)
                 logger.debug(f"Added vector for document {doc_id}")
         except Exception as e:
             logger.error(f"Error adding vector: {e}")
             raise
+        self._maybe_compact()
+    
+    def update_vector(self, embedding: List[float], doc_id: str):
+        """
+        Replace a document's vector: tombstone the old row and append.
+        
+        Args:
+            embedding: The new embedding vector (384-dim)
+            doc_id: MongoDB document ID as string
+        """
+        self.add_vector(embedding, doc_id)
     
     def add_vectors_batch(self, embeddings: List[List[float]], doc_ids: List[str]):
         """
@@ -143,21 +586,66 @@ class FAISSService:
             embeddings: List of embedding vectors
             doc_ids: List of corresponding MongoDB document IDs
         """
-        if self.index is None:
-            self.initialize_index()
-        
         if len(embeddings) != len(doc_ids):
             raise ValueError("Number of embeddings must match number of doc_ids")
         
         try:
-            with self.lock:
+            with self.lock.write():
+                if self.index is None:
+                    self._reset_index()
                 vectors = np.array(embeddings, dtype=np.float32)
-                self.index.add(vectors)
-                self.id_map.extend(doc_ids)
+                self._append(vectors, doc_ids)
+                self._log("add", list(doc_ids), vectors)
                 logger.info(f"Added {len(embeddings)} vectors in batch")
         except Exception as e:
             logger.error(f"Error adding vectors in batch: {e}")
             raise
+        self._maybe_compact()
+    
+    def _label_for(self, doc_id: str) -> int:
+        """Label of doc_id, probing past the (unlikely) hash collision (write lock held)."""
+        label = self.labels.get(doc_id)
+        if label is not None:
+            return label
+        label = doc_label(doc_id)
+        while label in self.doc_ids:
+            logger.warning(f"FAISS label collision for {doc_id}, probing")
+            label = (label + 1) & _LABEL_MASK
+        return label
+    
+    def _append(self, vectors: np.ndarray, doc_ids: List[str]):
+        """Add vectors (write lock held); an id already in the index is tombstoned first."""
+        start = self.index.ntotal
+        batch_labels = []
+        seen = set()
+        for doc_id in doc_ids:
+            label = self._label_for(doc_id)
+            if doc_id not in seen:
+                self._tombstone(doc_id)
+                seen.add(doc_id)
+            self.doc_ids[label] = doc_id
+            self.labels[doc_id] = label
+            batch_labels.append(label)
+        
+        self.index.add_with_ids(vectors, np.array(batch_labels, dtype=np.int64))
+        for offset, label in enumerate(batch_labels):
+            previous = self.rows.get(label)
+            if previous is not None and previous >= start:
+                # Same id twice in one batch: only the last row stays live
+                self._row_labels()[previous] = _DEAD
+                self.tombstones += 1
+            self.rows[label] = start + offset
+    
+    def _tombstone(self, doc_id: str) -> bool:
+        """Relabel a live document's row as dead (write lock held)."""
+        label = self.labels.pop(doc_id, None)
+        if label is None:
+            return False
+        row = self.rows.pop(label)
+        self.doc_ids.pop(label, None)
+        self._row_labels()[row] = _DEAD
+        self.tombstones += 1
+        return True
     
     def search(
         self, query_embedding: List[float], k: int = 10
@@ -168,28 +656,60 @@ class FAISSService:
         Args:
             query_embedding: Query vector (384-dim)
             k: Number of nearest neighbors to return
-            
+        
         Returns:
             List of tuples (doc_id, distance) sorted by distance (ascending)
         """
-        if self.index is None or self.index.ntotal == 0:
-            logger.warning("FAISS index is empty or not initialized")
+        return self.search_many([query_embedding], k=k)[0]
+    
+    def search_many(
+        self, query_embeddings: List[List[float]], k: int = 10
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Search for k nearest neighbors of several queries in one FAISS call.
+        Runs under the read lock, so it proceeds in parallel with other searches.
+        
+        Args:
+            query_embeddings: Query vectors (384-dim each)
+            k: Number of nearest neighbors to return per query
+        
+        Returns:
+            One list of (doc_id, distance) tuples per query, sorted by distance
+        """
+        if not query_embeddings:
             return []
+        if self.index is None or self.get_index_size() == 0:
+            logger.warning("FAISS index is empty or not initialized")
+            return [[] for _ in query_embeddings]
         
         try:
-            with self.lock:
-                query_vector = np.array([query_embedding], dtype=np.float32)
-                k_actual = min(k, self.index.ntotal)
-                distances, indices = self.index.search(query_vector, k_actual)
+            with self.lock.read():
+                query_vectors = np.array(query_embeddings, dtype=np.float32).reshape(-1, self.dimension)
+                total = self.index.ntotal
+                results: List[Optional[List[Tuple[str, float]]]] = [None] * len(query_vectors)
+                pending = np.arange(len(query_vectors))
                 
-                results = []
-                for i, idx in enumerate(indices[0]):
-                    if idx != -1 and idx < len(self.id_map):
-                        doc_id = self.id_map[idx]
-                        distance = float(distances[0][i])
-                        results.append((doc_id, distance))
+                # Over-fetch in proportion to the tombstone ratio; widen for
+                # queries whose live results are still crowded out by tombstones
+                k_fetch = min(total, k + int(np.ceil(k * self.tombstones / max(1, total - self.tombstones))))
+                while len(pending):
+                    distances, labels = self.index.search(query_vectors[pending], k_fetch)
+                    
+                    short = []
+                    for row, query in enumerate(pending):
+                        hits = []
+                        for i, label in enumerate(labels[row]):
+                            doc_id = self.doc_ids.get(int(label)) if label != _DEAD else None
+                            if doc_id is not None:
+                                hits.append((doc_id, float(distances[row][i])))
+                        results[query] = hits[:k]
+                        if len(hits) < k and k_fetch < total:
+                            short.append(query)
+                    
+                    pending = np.array(short, dtype=np.int64)
+                    k_fetch = min(total, k_fetch * 2)
                 
-                logger.debug(f"Search returned {len(results)} results")
+                logger.debug(f"Search returned results for {len(results)} queries")
                 return results
         except Exception as e:
             logger.error(f"Error searching FAISS index: {e}")
@@ -201,11 +721,11 @@ class FAISSService:
         
         Args:
             embedding: The embedding vector to check
-            
+        
         Returns:
             Tuple of (doc_id, distance) if duplicate found, None otherwise
         """
-        if self.index is None or self.index.ntotal == 0:
+        if self.index is None or self.get_index_size() == 0:
             return None
         
         try:
@@ -224,69 +744,148 @@ class FAISSService:
     def remove_vector(self, doc_id: str) -> bool:
         """
         Remove a vector from the index by doc_id.
-        Note: FAISS doesn't support efficient deletion, so we rebuild the index.
+        The row is tombstoned; the index is only rebuilt by compaction.
         
         Args:
             doc_id: MongoDB document ID to remove
-            
+        
         Returns:
             True if removed, False if not found
         """
-        if doc_id not in self.id_map:
+        with self.lock.write():
+            removed = self.index is not None and self._tombstone(doc_id)
+            if removed:
+                self._log("remove", [doc_id])
+        
+        if not removed:
             logger.warning(f"Document {doc_id} not found in index")
             return False
         
+        logger.info(f"Removed vector for document {doc_id}")
+        self._maybe_compact()
+        return True
+    
+    def _maybe_compact(self):
+        """Start a background compaction once tombstones pass the threshold."""
+        total = self.index.ntotal if self.index is not None else 0
+        if (
+            self.tombstones < self.min_compaction_tombstones
+            or self.tombstones < self.compaction_threshold * total
+        ):
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        
+        self._compaction_thread = threading.Thread(
+            target=self.compact, name="faiss-compaction", daemon=True
+        )
+        self._compaction_thread.start()
+    
+    def compact(self) -> bool:
+        """
+        Rebuild the index from live vectors, dropping tombstones.
+        
+        The HNSW build runs without the lock; vectors appended and documents
+        deleted meanwhile are carried over when the new index is swapped in.
+        Returns False if the index was replaced while compacting.
+        """
         try:
-            with self.lock:
-                # Find index position
-                idx_to_remove = self.id_map.index(doc_id)
+            with self.lock.read():
+                if self.index is None or self.tombstones == 0:
+                    return False
+                generation = self._generation
+                total = self.index.ntotal
+                vectors = self.index.index.reconstruct_n(0, total)
+                live = np.flatnonzero(self._row_labels()[:total] != _DEAD)
+                live_labels = self._row_labels()[live].copy()
+            
+            logger.info(f"Compacting FAISS index: {total - len(live)} tombstones, {len(live)} live vectors")
+            new_index = self._new_index()
+            if len(live):
+                new_index.add_with_ids(vectors[live], live_labels)
+            
+            with self.lock.write():
+                if self._generation != generation:
+                    logger.info("FAISS index replaced during compaction, discarding rebuild")
+                    return False
                 
-                # Rebuild index without this vector
-                if self.index.ntotal > 1:
-                    # Extract all vectors except the one to remove
-                    all_vectors = []
-                    for i in range(self.index.ntotal):
-                        if i != idx_to_remove:
-                            vec = self.index.reconstruct(i)
-                            all_vectors.append(vec)
-                    
-                    # Create new index
-                    self.initialize_index()
-                    if all_vectors:
-                        vectors_array = np.array(all_vectors, dtype=np.float32)
-                        self.index.add(vectors_array)
-                    
-                    # Update ID map
-                    self.id_map.pop(idx_to_remove)
-                else:
-                    # Last vector, just reinitialize
-                    self.initialize_index()
+                new_total = self.index.ntotal
+                if new_total > total:
+                    new_index.add_with_ids(
+                        self.index.index.reconstruct_n(total, new_total - total),
+                        self._row_labels()[total:new_total].copy()
+                    )
+                # Rows tombstoned while the new index was being built
+                order = np.concatenate([live, np.arange(total, new_total)]).astype(np.int64)
+                new_labels = self._row_labels(new_index)
+                new_labels[:] = self._row_labels()[order]
+                new_index.construct_rev_map()
                 
-                logger.info(f"Removed vector for document {doc_id}")
+                self.index = new_index
+                self._rebuild_tables(dict(self.doc_ids))
+                self._generation += 1
+                logger.info(f"FAISS index compacted to {self.index.ntotal} vectors")
                 return True
         except Exception as e:
-            logger.error(f"Error removing vector: {e}")
-            raise
+            logger.error(f"Error compacting FAISS index: {e}")
+            return False
     
     def get_index_size(self) -> int:
-        """Return the number of vectors in the index."""
+        """Return the number of live (non-tombstoned) vectors in the index."""
         if self.index is None:
             return 0
-        return self.index.ntotal
+        return self.index.ntotal - self.tombstones
     
     def rebuild_index(self, embeddings: List[List[float]], doc_ids: List[str]):
         """
         Completely rebuild the FAISS index from scratch.
         
+        The new index is built and written without the lock, then committed
+        to disk and swapped in under the write lock. It supersedes every
+        mutation logged before the swap, so the log is truncated rather than
+        carrying the catalogue; a crash before the commit leaves the previous
+        index and log untouched.
+        
         Args:
             embeddings: List of all embedding vectors
             doc_ids: List of all corresponding document IDs
         """
+        if len(embeddings) != len(doc_ids):
+            raise ValueError("Number of embeddings must match number of doc_ids")
+        
         logger.info(f"Rebuilding FAISS index with {len(embeddings)} vectors")
-        self.initialize_index()
-        if embeddings:
-            self.add_vectors_batch(embeddings, doc_ids)
-        self.save_index()
+        # Last occurrence of a repeated id wins, as with _append
+        latest = {doc_id: row for row, doc_id in enumerate(doc_ids)}
+        table: Dict[int, str] = {}
+        for doc_id in latest:
+            label = doc_label(doc_id)
+            while label in table:
+                logger.warning(f"FAISS label collision for {doc_id}, probing")
+                label = (label + 1) & _LABEL_MASK
+            table[label] = doc_id
+        
+        index = self._new_index()
+        if latest:
+            vectors = np.array(embeddings, dtype=np.float32)[list(latest.values())]
+            index.add_with_ids(vectors, np.array(list(table), dtype=np.int64))
+        
+        with self._save_lock:
+            index_file, checksum = self._write_index_file(index)
+            ids = [[label, doc_id] for label, doc_id in table.items()]
+            
+            # Searches see either the old index or the complete new one
+            with self.lock.write():
+                self._commit_table(index_file, checksum, index.ntotal, self._wal_seq, ids)
+                self.index = index
+                self._rebuild_tables(table)
+                self._generation += 1
+                self._flushed_seq = self._wal_seq
+                self._mutations = 0
+                self._dirty_since = time.monotonic()
+                self._truncate_wal()
+            self._remove_stale_index_files(index_file)
+        
+        self.needs_rebuild = False
         logger.info("FAISS index rebuild complete")
 
 
@@ -298,8 +897,19 @@ def get_faiss_service() -> FAISSService:
     """Get or create the global FAISS service instance."""
     global _faiss_service
     if _faiss_service is None:
-        _faiss_service = FAISSService()
+        from app.config import settings
+        _faiss_service = FAISSService(
+            flush_interval_seconds=settings.FAISS_FLUSH_INTERVAL_SECONDS,
+            flush_max_mutations=settings.FAISS_FLUSH_MAX_MUTATIONS,
+            wal_fsync=settings.FAISS_WAL_FSYNC,
+        )
         # Try to load existing index, otherwise initialize new one
         if not _faiss_service.load_index():
             _faiss_service.initialize_index()
+        if _faiss_service.needs_rebuild:
+            logger.error("Saved FAISS index could not be loaded; it must be rebuilt from MongoDB")
+        else:
+            # Writes after the last flush are recovered from the write-ahead log
+            _faiss_service.replay_wal()
+        _faiss_service.start_persistence()
     return _faiss_service
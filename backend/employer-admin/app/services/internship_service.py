@@ -1,10 +1,12 @@
 # app/services/internship_service.py
+import asyncio
 import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 
-from app.models.internship import Internship
+from app.models.internship import Internship, InternshipSearchView
+from app.services.document_cache import get_internship_cache
 from app.services.embedding_service import get_embedding_service
 from app.services.faiss_service import get_faiss_service
 
@@ -20,6 +22,7 @@ class InternshipService:
     def __init__(self):
         self.embedding_service = get_embedding_service()
         self.faiss_service = get_faiss_service()
+        self.document_cache = get_internship_cache()
     
     def generate_embedding_for_internship(self, internship: Internship) -> List[float]:
         """
@@ -43,6 +46,24 @@ class InternshipService:
             duration_months=internship.duration_months,
         )
     
+    async def generate_embedding_for_internship_async(self, internship: Internship) -> List[float]:
+        """
+        Same as generate_embedding_for_internship, for request handlers:
+        the encode is awaited through the micro-batcher instead of blocking
+        the event loop.
+        """
+        return await self.embedding_service.generate_internship_embedding_async(
+            skills=internship.skills,
+            location=internship.location,
+            state=internship.state,
+            city=internship.city,
+            sector=internship.sector,
+            stipend=internship.stipend,
+            duration_days=internship.duration_days,
+            duration_weeks=internship.duration_weeks,
+            duration_months=internship.duration_months,
+        )
+    
     async def create_internship(
         self, internship_data: Dict[str, Any], check_duplicate: bool = True
     ) -> Dict[str, Any]:
@@ -65,12 +86,12 @@ class InternshipService:
             
             # Generate embedding
             logger.info(f"Generating embedding for internship: {internship.title}")
-            embedding = self.generate_embedding_for_internship(internship)
+            embedding = await self.generate_embedding_for_internship_async(internship)
             internship.embedding = embedding
             
             # Check for duplicates if requested
             if check_duplicate:
-                duplicate = self.faiss_service.check_duplicate(embedding)
+                duplicate = await asyncio.to_thread(self.faiss_service.check_duplicate, embedding)
                 if duplicate:
                     doc_id, distance = duplicate
                     logger.warning(
@@ -88,9 +109,8 @@ class InternshipService:
             await internship.insert()
             logger.info(f"Internship created with ID: {internship.id}")
             
-            # Add to FAISS index
-            self.faiss_service.add_vector(embedding, str(internship.id))
-            self.faiss_service.save_index()
+            # Add to FAISS index (WAL-logged, flushed to disk in the background)
+            await asyncio.to_thread(self.faiss_service.add_vector, embedding, str(internship.id))
             
             return {
                 "status": "success",
@@ -134,17 +154,16 @@ class InternshipService:
             
             # Regenerate embedding
             logger.info(f"Regenerating embedding for internship: {internship_id}")
-            new_embedding = self.generate_embedding_for_internship(internship)
+            new_embedding = await self.generate_embedding_for_internship_async(internship)
             internship.embedding = new_embedding
             
             # Save to MongoDB
             await internship.save()
+            self.document_cache.invalidate(internship_id)
             logger.info(f"Internship updated: {internship_id}")
             
-            # Update FAISS index (remove old, add new)
-            self.faiss_service.remove_vector(internship_id)
-            self.faiss_service.add_vector(new_embedding, internship_id)
-            self.faiss_service.save_index()
+            # Update FAISS index (tombstone old position, append new vector)
+            await asyncio.to_thread(self.faiss_service.update_vector, new_embedding, internship_id)
             
             return {
                 "status": "success",
@@ -178,11 +197,11 @@ class InternshipService:
             
             # Delete from MongoDB
             await internship.delete()
+            self.document_cache.invalidate(internship_id)
             logger.info(f"Internship deleted: {internship_id}")
             
             # Remove from FAISS index
-            self.faiss_service.remove_vector(internship_id)
-            self.faiss_service.save_index()
+            await asyncio.to_thread(self.faiss_service.remove_vector, internship_id)
             
             return {
                 "status": "success",
@@ -209,29 +228,28 @@ class InternshipService:
         try:
             # Generate embedding for query
             logger.info(f"Searching for: {query}")
-            query_embedding = self.embedding_service.generate_embedding(query)
+            query_embedding = await self.embedding_service.generate_embedding_async(query)
             
-            # Search FAISS index
-            results = self.faiss_service.search(query_embedding, k=top_k)
+            # Search FAISS index off the event loop; searches run concurrently
+            results = await asyncio.to_thread(self.faiss_service.search, query_embedding, top_k)
             
             if not results:
                 logger.info("No results found")
                 return []
             
-            # Fetch full documents from MongoDB
+            # Hydrate all hits in one round trip, keeping FAISS rank order
+            documents = await self._fetch_search_documents([doc_id for doc_id, _ in results])
             internships = []
             for doc_id, distance in results:
-                try:
-                    internship = await Internship.get(ObjectId(doc_id))
-                    if internship:
-                        internships.append({
-                            "internship": internship,
-                            "similarity_score": float(distance),
-                            "similarity_percentage": max(0, 100 * (1 - distance / 2)),
-                        })
-                except Exception as e:
-                    logger.warning(f"Could not fetch internship {doc_id}: {e}")
+                internship = documents.get(doc_id)
+                if internship is None:
+                    logger.warning(f"Could not fetch internship {doc_id}")
                     continue
+                internships.append({
+                    "internship": internship,
+                    "similarity_score": float(distance),
+                    "similarity_percentage": max(0, 100 * (1 - distance / 2)),
+                })
             
             logger.info(f"Found {len(internships)} similar internships")
             return internships
@@ -240,6 +258,37 @@ class InternshipService:
             logger.error(f"Error searching internships: {e}")
             raise
     
+    async def _fetch_search_documents(
+        self, doc_ids: List[str]
+    ) -> Dict[str, InternshipSearchView]:
+        """
+        Fetch search hits by id with a single $in query, served from the LRU
+        where possible. The embedding field is projected out.
+        
+        Args:
+            doc_ids: Document ids as stored in the FAISS index
+        
+        Returns:
+            Dictionary of id string to document; missing ids are absent
+        """
+        generation = self.document_cache.generation
+        documents = self.document_cache.get_many(doc_ids)
+        missing = [doc_id for doc_id in doc_ids if doc_id not in documents]
+        if not missing:
+            return documents
+        
+        # Ids are mostly ObjectIds, but the collection also holds string ids
+        lookup_ids = [ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id for doc_id in missing]
+        fetched = await Internship.find(
+            {"_id": {"$in": lookup_ids}}, projection_model=InternshipSearchView
+        ).to_list()
+        
+        for internship in fetched:
+            doc_id = str(internship.id)
+            documents[doc_id] = internship
+            self.document_cache.set(doc_id, internship, generation)
+        return documents
+    
     async def get_internship_by_id(self, internship_id: str) -> Optional[Internship]:
         """
         Fetch internship by ID.
@@ -280,6 +329,26 @@ class InternshipService:
         except Exception as e:
             logger.error(f"Error listing internships: {e}")
             raise
+    
+    async def rebuild_faiss_index(self) -> int:
+        """
+        Rebuild the FAISS index from every internship in MongoDB.
+        Documents without a stored embedding get one generated and saved.
+        
+        Returns:
+            Number of vectors in the rebuilt index
+        """
+        embeddings = []
+        doc_ids = []
+        async for internship in Internship.find_all():
+            if not internship.embedding:
+                internship.embedding = await self.generate_embedding_for_internship_async(internship)
+                await internship.save()
+            embeddings.append(internship.embedding)
+            doc_ids.append(str(internship.id))
+        
+        await asyncio.to_thread(self.faiss_service.rebuild_index, embeddings, doc_ids)
+        return len(doc_ids)
 
 
 # Global singleton instance
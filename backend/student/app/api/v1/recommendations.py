@@ -16,6 +16,7 @@ from app.database.multi_cluster import get_student_database, get_employer_databa
 from app.schemas.recommendations import (
     RecommendationFilters,
     RecommendationsResponse,
+    MatchExplanationResponse,
     TrendingResponse,
     UserProfileSummary,
     PaginationMeta,
@@ -109,7 +110,8 @@ async def get_student_recommendations(
                 engine.get_recommendations_for_student(
                     user=current_user,
                     top_k=limit * 5,  # Get significantly more for filtering and threshold
-                    filters=filters
+                    filters=filters,
+                    include_explanations=False  # Only the served page is explained, below
                 ),
                 timeout=60.0
             )
@@ -286,16 +288,10 @@ async def get_student_recommendations(
             if not matches:
                 continue
         
-        # Remove detailed_explanation for API response to reduce payload size
-        # Keep only summary if needed
-        if "detailed_explanation" in rec:
-            # Keep only summary from detailed explanation
-            rec["explanation_summary"] = rec["detailed_explanation"].get("summary", "")
-            # Optionally remove detailed_explanation to reduce response size
-            # del rec["detailed_explanation"]
-        
         filtered_recommendations.append(rec)
     
+    is_personalized = bool(filtered_recommendations)
+    
     # Fallback to trending internships if no personalized results
     if not filtered_recommendations:
         logger.info(f"No personalized recommendations found (got {len(recommendations)} from engine), falling back to trending internships")
@@ -387,6 +383,13 @@ async def get_student_recommendations(
     paginated_recommendations = filtered_recommendations[start_idx:end_idx]
     logger.info(f"📄 Paginated to {len(paginated_recommendations)} recommendations (page {page}, limit {limit})")
     
+    # Build detailed explanations only for the page being served
+    if is_personalized:
+        try:
+            await engine.explain_recommendations(current_user, paginated_recommendations)
+        except Exception as exc:
+            logger.error("Failed to explain recommendations page: %s", exc, exc_info=True)
+    
     # Get user's application history from student cluster
     applied_internship_ids: Dict[str, bool] = {}
     try:
@@ -442,9 +445,32 @@ async def get_student_recommendations(
         "pagination": pagination_meta,
         "filters": filters_payload,
         "user_profile_summary": user_summary,
+        "weights_version": next((rec.get("weights_version") for rec in paginated_recommendations if rec.get("weights_version")), None),
     }
 
 
+@router.get("/{internship_id}/explanation", response_model=MatchExplanationResponse)
+async def get_recommendation_explanation(
+    internship_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the detailed match explanation for a single internship.
+    Computed on demand and cached per user profile and internship.
+    """
+    try:
+        engine = await get_recommendation_engine()
+        explanation = await engine.get_match_explanation(current_user, str(internship_id))
+    except Exception as exc:
+        logger.error("Error explaining internship %s: %s", internship_id, exc, exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to generate match explanation") from exc
+    
+    if explanation is None:
+        raise HTTPException(status_code=404, detail="Internship not found in recommendation index")
+    
+    return {"success": True, **explanation}
+
+
 @router.get("/trending-internships", response_model=TrendingResponse)
 async def get_trending_internships(
     current_user: Optional[User] = Depends(get_current_user),
@@ -2,6 +2,10 @@
 from typing import Optional, List
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from pathlib import Path
+
+# BASE_DIR is the backend/student directory
+BASE_DIR = Path(__file__).parent.parent.resolve()
 
 class Settings(BaseSettings):
     # Application
@@ -69,6 +73,9 @@ class Settings(BaseSettings):
     # Recommendation Settings
     RECOMMENDATION_MODEL: str = "all-MiniLM-L6-v2"
     EMBEDDING_DIMENSION: int = 384
+    EMBEDDING_BACKEND: str = "torch"  # "torch" or "onnx" (needs onnxruntime; falls back to torch)
+    EMBEDDING_ONNX_QUANTIZE: bool = True  # int8 dynamic quantization of the exported graph
+    EMBEDDING_ONNX_CACHE_DIR: str = str(BASE_DIR / "data" / "onnx")  # Exported graphs, reused across restarts
     FAISS_INDEX_PATH: str = "/tmp/faiss_index.bin"
     RECOMMENDATION_CACHE_TTL: int = 3600
     
@@ -21,8 +21,14 @@ class RecommendationConfig:
     # ========== CACHING ==========
     CACHE_DURATION_HOURS: int = 1
     STUDENT_CACHE_TTL_HOURS: int = 24
-    MAX_STUDENT_CACHE_SIZE: int = 1000
-    SKILL_EMBEDDING_CACHE_SIZE: int = 5000
+    STUDENT_CACHE_MAX_MB: int = 64  # Approximate memory bound for cached student vectors
+    EXPLANATION_CACHE_MAX_MB: int = 64  # Cached (profile, internship) explanations
+    EXPLANATION_CACHE_TTL_HOURS: int = 1
+    CACHE_SHARDS: int = 16  # Independently locked partitions per cache
+    RESULT_CACHE_MAX_MB: int = 32  # Ranked candidate lists per (profile, catalogue, weights, filters)
+    RESULT_CACHE_TTL_SECONDS: int = 900
+    STUDENT_VECTOR_STORE: str = "sqlite"  # Shared student-vector tier: "sqlite" (per host), "redis" (REDIS_URL) or "none"
+    STUDENT_VECTOR_STORE_TTL_HOURS: int = 168
     
     # ========== SKILL SIMILARITY ==========
     SKILL_SIMILARITY_THRESHOLD: float = 0.75  # Skills above this are "similar"
@@ -36,13 +42,35 @@ class RecommendationConfig:
         "stipend": 0.15,
         "timeline": 0.15
     })
+    WEIGHTS_CHECK_INTERVAL_SECONDS: float = 5.0  # How often the weights files are checked for changes
     
     # ========== FILTER BOOST FACTORS ==========
     FILTER_MATCH_BOOST: float = 1.2  # 20% boost for filter matches
     FILTER_PARTIAL_BOOST: float = 1.1  # 10% boost for partial matches
     
+    # ========== INDEX SYNC ==========
+    INDEX_SYNC_INTERVAL_SECONDS: int = 30  # Min seconds between incremental syncs
+    CHANGE_STREAM_ENABLED: bool = True  # Watch the employer collection for live updates
+    CHANGE_POLL_INTERVAL_SECONDS: int = 10  # Fallback poll interval without change streams
+    CHANGE_BATCH_MAX_EVENTS: int = 100  # Events applied per index update
+    SHARED_SNAPSHOT_ENABLED: bool = True  # Workers share one memory-mapped snapshot; one of them builds it
+    SNAPSHOT_POLL_INTERVAL_SECONDS: int = 5  # How often non-builder workers look for a newer snapshot
+    
+    # ========== PRECOMPUTED RECOMMENDATIONS ==========
+    PRECOMPUTED_ENABLED: bool = True  # Serve unfiltered requests from the batch job's rankings when current
+    PRECOMPUTED_COLLECTION: str = "precomputed_recommendations"
+    PRECOMPUTE_TOP_N: int = 50  # Covers the /for-student over-fetch (limit * 5) for limit <= 10
+    PRECOMPUTE_CHUNK_SIZE: int = 256  # Students loaded and encoded per batch
+    PRECOMPUTE_SCORE_BLOCK: int = 64  # Students scored per matrix product
+    
     # ========== PERFORMANCE ==========
     BATCH_ENCODING_SIZE: int = 32
+    EMBEDDING_BATCHING_ENABLED: bool = True  # Concurrent profile encodes share one batched forward pass
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # Texts per batched forward pass
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # How long the first queued text waits for company
+    EMBEDDING_QUEUE_MAX_SIZE: int = 1024  # Pending encodes before callers are rejected
+    LOAD_CURSOR_BATCH_SIZE: int = 500  # Documents fetched per cursor batch on full loads
+    LOAD_BATCH_TIMEOUT_SECONDS: int = 30  # A stalled batch aborts the load; the current index keeps serving
     MAX_SEARCH_K_MULTIPLIER: int = 5
     
     def __post_init__(self):
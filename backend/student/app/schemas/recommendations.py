@@ -121,6 +121,7 @@ class RecommendationItem(BaseModel):
     views: Optional[int] = 0
     applications: Optional[int] = 0
     created_at: Optional[str] = None
+    weights_version: Optional[str] = None
 
 
 class RecommendationFilters(BaseModel):
@@ -153,6 +154,7 @@ class RecommendationsResponse(BaseModel):
     pagination: PaginationMeta
     filters: RecommendationFilters
     user_profile_summary: UserProfileSummary
+    weights_version: Optional[str] = None
 
 
 class TrendingInternship(BaseModel):
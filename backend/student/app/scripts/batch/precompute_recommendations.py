@@ -0,0 +1,66 @@
+# File: app/scripts/batch/precompute_recommendations.py
+"""
+Nightly batch job: precompute default recommendations for all active students
+============================================================================
+
+Ranks the current internship snapshot for every active student and stores
+each top-N in the `precomputed_recommendations` collection. /for-student
+serves unfiltered requests from it while the student's profile, the
+catalogue version and the weights version are unchanged.
+
+Run it from cron (e.g. nightly) on a host that shares the engine cache_dir
+with the API workers, so it ranks the same catalogue snapshot they serve:
+    
+    python app/scripts/batch/precompute_recommendations.py --top-n 50
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main(top_n: int = None) -> int:
+    from app.database import init_database, close_mongo_connection
+    from app.models.user import User
+    from app.services.recommendation_engine import YuvaSetuRecommendationEngine
+    
+    if await init_database() is None:
+        logger.error("❌ Student database unavailable")
+        return 1
+    
+    engine = YuvaSetuRecommendationEngine()
+    try:
+        if not await engine.initialize() or not engine.has_internships():
+            logger.error("❌ Recommendation engine has no internships to rank")
+            return 1
+        
+        started = datetime.utcnow()
+        users = User.find(User.is_active == True, batch_size=engine.config.PRECOMPUTE_CHUNK_SIZE)
+        stats = await engine.precompute_recommendations(users, top_n=top_n)
+        
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        logger.info(f"✅ {stats['students']} students in {stats['chunks']} chunks ({elapsed:.1f}s)")
+        return 0
+    finally:
+        if engine._change_watcher:
+            await engine._change_watcher.stop()
+        if engine._index_manager:
+            engine._index_manager.release_builder_lock()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute default recommendations for active students")
+    parser.add_argument("--top-n", type=int, default=None, help="Recommendations stored per student")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.top_n)))
@@ -3,6 +3,7 @@
 Complete evaluation framework for recommendation engine
 """
 import json
+import sys
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any
@@ -42,6 +43,7 @@ class EvaluationMetrics:
     average_match_score: float
     excellent_match_rate: float
     good_match_rate: float
+    skill_coverage: float = 0.0
 
 
 class RecommendationEvaluator:
@@ -56,6 +58,7 @@ class RecommendationEvaluator:
         self.recommendations = {}
         self.student_embeddings = {}
         self.internship_embeddings = {}
+        self.skill_manager = None
     
     def load_data(self):
         logger.info("Loading test data...")
@@ -101,6 +104,22 @@ class RecommendationEvaluator:
         for i in tqdm(self.internships, desc="Internships"):
             text = " ".join([i.get('title', '')] + i.get('skills', []) + [i.get('description', '')[:200]])
             self.internship_embeddings[i['id']] = self.model.encode(text, convert_to_numpy=True)
+        
+        self.load_skill_manager()
+    
+    def load_skill_manager(self):
+        """Use the recommendation engine's skill graph for semantic skill coverage"""
+        try:
+            sys.path.insert(0, str(PROJECT_ROOT))
+            from app.services.recommendation_engine import SkillSignatureManager
+            
+            self.skill_manager = SkillSignatureManager(self.model)
+            skills = [sk['name'] for s in self.students for sk in s.get('skills', [])]
+            skills.extend(sk for i in self.internships for sk in i.get('skills', []))
+            self.skill_manager.graph.add(skills)
+        except Exception as e:
+            logger.warning(f"Skill graph unavailable, skipping skill coverage: {e}")
+            self.skill_manager = None
     
     def compute_score(self, student: Dict, internship: Dict) -> float:
         s_emb = self.student_embeddings.get(student['id'])
@@ -239,6 +258,24 @@ class RecommendationEvaluator:
             'good_rate': good / total if total else 0
         }
     
+    def skill_coverage(self, k: int = 10) -> float:
+        """Share of required skills in the top-k covered exactly or semantically"""
+        if self.skill_manager is None:
+            return 0.0
+        
+        students = {s['id']: s for s in self.students}
+        lookup = {i['id']: i for i in self.internships}
+        coverages = []
+        for sid, recs in self.recommendations.items():
+            student_skills = [sk['name'] for sk in students.get(sid, {}).get('skills', [])]
+            for r in recs[:k]:
+                required = lookup.get(r['internship_id'], {}).get('skills', [])
+                if not required:
+                    continue
+                matches = self.skill_manager.find_skill_matches(student_skills, required)
+                coverages.append((len(matches['exact_matches']) + len(matches['semantic_matches'])) / len(set(s.lower().strip() for s in required)))
+        return np.mean(coverages) if coverages else 0.0
+    
     def evaluate(self) -> EvaluationMetrics:
         logger.info("Running evaluation...")
         mq = self.match_quality()
@@ -253,7 +290,8 @@ class RecommendationEvaluator:
             diversity=self.diversity(),
             average_match_score=mq['avg_score'],
             excellent_match_rate=mq['excellent_rate'],
-            good_match_rate=mq['good_rate']
+            good_match_rate=mq['good_rate'],
+            skill_coverage=self.skill_coverage()
         )
     
     def save_report(self, metrics: EvaluationMetrics) -> Dict:
@@ -272,7 +310,8 @@ class RecommendationEvaluator:
                 "diversity": round(metrics.diversity, 4),
                 "avg_match_score": round(metrics.average_match_score, 4),
                 "excellent_rate": round(metrics.excellent_match_rate, 4),
-                "good_rate": round(metrics.good_match_rate, 4)
+                "good_rate": round(metrics.good_match_rate, 4),
+                "skill_coverage": round(metrics.skill_coverage, 4)
             }
         }
         
@@ -337,6 +376,7 @@ def main():
         print(f"  Avg Match:    {metrics.average_match_score:.4f}")
         print(f"  Excellent %:  {metrics.excellent_match_rate:.2%}")
         print(f"  Good %:       {metrics.good_match_rate:.2%}")
+        print(f"  Skill Cover:  {metrics.skill_coverage:.2%}")
         
         print(f"\n✅ Report saved to {RESULTS_DIR / 'evaluation_report.json'}")
         
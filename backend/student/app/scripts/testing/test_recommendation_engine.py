@@ -7,19 +7,163 @@ import asyncio
 import json
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
+import hashlib
+import os
 import sys
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.services.recommendation_engine import (
+    fcntl,
     YuvaSetuRecommendationEngine,
+    InternshipChangeWatcher,
+    WeightsRegistry,
+    SkillSignatureManager,
+    SkillVocabulary,
+    StudentProfileCache,
+    InternshipIndexManager,
+    MappedRecords,
+    MatchExplanationGenerator,
     get_recommendation_engine,
     reset_recommendation_engine
 )
 from app.models.user import User, SkillItem, EducationItem, ExperienceItem
+from app.utils.cache import ShardedTTLCache, SQLiteVectorStore, VectorStore, pack_vectors, unpack_vectors
+from app.services.embedding_batcher import MicroBatchEncoder, EmbeddingQueueFullError
+from app.services.sentence_encoder import OnnxSentenceEncoder, pool_embeddings
+
+
+class FakeEncoder:
+    """Deterministic stand-in for SentenceTransformer (no model download needed)"""
+    
+    def __init__(self, dim: int = 16):
+        self.dim = dim
+        self.encode_calls = 0
+    
+    def encode(self, texts, **kwargs):
+        self.encode_calls += 1
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        vectors = []
+        for text in batch:
+            seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+            vectors.append(np.random.default_rng(seed).standard_normal(self.dim).astype('float32'))
+        matrix = np.vstack(vectors)
+        return matrix[0] if single else matrix
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+
+async def build_test_engine(internships: List[Dict], cache_dir: Path) -> YuvaSetuRecommendationEngine:
+    """Build an initialized engine over the given internships using FakeEncoder"""
+    engine = YuvaSetuRecommendationEngine()
+    engine._model = FakeEncoder()
+    engine.embedding_dim = engine._model.get_sentence_embedding_dimension()
+    engine.cache_dir = cache_dir
+    engine._skill_manager = SkillSignatureManager(engine._model, engine.config)
+    engine._student_cache = StudentProfileCache(engine._skill_manager, engine.config)
+    engine._index_manager = InternshipIndexManager(engine.embedding_dim, cache_dir)
+    engine._explanation_generator = MatchExplanationGenerator(engine._skill_manager, engine.config)
+    engine._index_manager.init_indices()
+    assert await engine._process_internships_batch(internships)
+    engine._initialized = True
+    engine.last_refresh = None  # Skip the database refresh check
+    engine.config.PRECOMPUTED_ENABLED = False  # No student database in tests
+    return engine
+
+
+def make_internships(count: int) -> List[Dict]:
+    """Generate simple internship documents"""
+    skill_pool = ["Python", "SQL", "Machine Learning", "React", "Docker", "Excel", "Marketing"]
+    return [
+        {
+            "_id": f"int_{i:03d}",
+            "title": f"Intern {i}",
+            "company": f"Company {i}",
+            "skills": [skill_pool[i % len(skill_pool)], skill_pool[(i + 2) % len(skill_pool)]],
+            "location": "Bangalore",
+            "work_type": "Remote",
+            "stipend": 10000 + 1000 * i,
+            "duration": "3 months",
+            "status": "active",
+            "is_active": True
+        }
+        for i in range(count)
+    ]
+
+
+def reference_filter(engine: YuvaSetuRecommendationEngine, internship: Dict, filters: Dict) -> Tuple[bool, float]:
+    """Per-row oracle for _compile_filters: strict pass/fail and score boost"""
+    active = {key: value for key, value in filters.items() if value not in (None, "", 0)}
+    passes = all(engine._passes_filter(internship, key, value) for key, value in active.items())
+    
+    boost = 1.0
+    if active:
+        ratio = sum(engine._matches_filter(internship, key, value) for key, value in active.items()) / len(active)
+        if ratio >= 0.75:
+            boost = engine.config.FILTER_MATCH_BOOST
+        elif ratio >= 0.5:
+            boost = engine.config.FILTER_PARTIAL_BOOST
+    return passes, boost
+
+
+class FakeCursor:
+    """Minimal async cursor returning documents in fixed-size batches"""
+    
+    def __init__(self, documents: List[Dict], stall_after: int = None):
+        self.documents = documents
+        self.position = 0
+        self.stall_after = stall_after
+        self.closed = False
+    
+    def batch_size(self, size: int):
+        return self
+    
+    async def to_list(self, length: int):
+        if self.stall_after is not None and self.position >= self.stall_after:
+            await asyncio.sleep(1)
+        batch = self.documents[self.position:self.position + length]
+        self.position += len(batch)
+        return batch
+    
+    async def close(self):
+        self.closed = True
+
+
+class FakeCollection:
+    """Collection stub that records the projection of each find()"""
+    
+    def __init__(self, documents: List[Dict], stall_after: int = None):
+        self.documents = documents
+        self.stall_after = stall_after
+        self.projections = []
+        self.cursors = []
+    
+    def find(self, query: Dict, projection: Dict = None):
+        self.projections.append(projection)
+        cursor = FakeCursor(self.documents, self.stall_after)
+        self.cursors.append(cursor)
+        return cursor
+
+
+class FakeBulkCollection:
+    """Collection stub for bulk ReplaceOne writes and _id lookups"""
+    
+    def __init__(self):
+        self.documents: Dict[str, Dict] = {}
+        self.lookups = 0
+    
+    async def bulk_write(self, operations, ordered: bool = True):
+        for operation in operations:
+            self.documents[operation._filter["_id"]] = operation._doc
+    
+    async def find_one(self, query: Dict):
+        self.lookups += 1
+        return self.documents.get(query["_id"])
 
 
 class TestRecommendationEngine:
@@ -172,7 +316,7 @@ class TestRecommendationEngine:
         
         for internship in sample_internships:
             normalized = engine._normalize_employer_internship(internship)
-            result = engine._apply_filters(normalized, filters)
+            result, _ = reference_filter(engine, normalized, filters)
             
             if normalized["city"] == "Bangalore" and normalized["stipend"] >= 20000:
                 assert result == True
@@ -221,6 +365,1064 @@ class TestRecommendationEngine:
         assert engine._parse_duration_string("") is None
 
 
+class TestSkillMatching:
+    """Test skill matching with batched similarity lookups"""
+    
+    def test_graph_add_uses_single_encode(self):
+        """All unseen skills should be encoded in one model call"""
+        encoder = FakeEncoder()
+        manager = SkillSignatureManager(encoder)
+        
+        manager.graph.add(["Python", "SQL", "python", "Pandas", "Docker", "SQL", "Kubernetes"])
+        
+        assert encoder.encode_calls == 1
+        assert manager.graph.get("pandas", "python") is not None
+        assert manager.graph.get("unknown", "python") is None
+    
+    def test_graph_matches_equal_pairwise(self):
+        """Semantic matches found through the graph equal the pairwise similarities"""
+        manager = SkillSignatureManager(FakeEncoder())
+        manager.config.SKILL_SIMILARITY_THRESHOLD = 0.0
+        manager.graph.threshold = 0.0
+        user_skills = ["Python", "Machine Learning", "Excel"]
+        required = ["Python", "Deep Learning", "Statistics", "Excel"]
+        
+        result = manager.find_skill_matches(user_skills, required)
+        
+        assert sorted(result["exact_matches"]) == ["excel", "python"]
+        for match in result["semantic_matches"]:
+            expected = manager.compute_skill_similarity(match["required_skill"], match["user_skill"])
+            assert match["similarity"] == round(expected, 3)
+        for req in ["deep learning", "statistics"]:
+            expected = manager.compute_skill_similarity(req, "machine learning")
+            assert abs(manager.graph.get(req, "machine learning") - max(expected, 0.0)) < 1e-5
+    
+    def test_vocabulary_round_trip_skips_encoding(self, tmp_path):
+        """A saved vocabulary serves known skills without calling the model"""
+        path = tmp_path / "skill_vocabulary.npz"
+        vocabulary = SkillVocabulary(FakeEncoder(), path)
+        ids = vocabulary.ensure(["Python", " python ", "SQL"])
+        assert ids[0] == ids[1] and len(vocabulary) == 2
+        assert vocabulary.save()
+        
+        encoder = FakeEncoder()
+        reloaded = SkillVocabulary(encoder, path)
+        assert reloaded.load(encoder.get_sentence_embedding_dimension())
+        manager = SkillSignatureManager(encoder, vocabulary=reloaded)
+        
+        manager.are_skills_enhancement(["Python"], ["python", "SQL"])
+        manager.find_skill_matches(["SQL"], ["Python"])
+        assert encoder.encode_calls == 0
+        np.testing.assert_allclose(reloaded.vectors(ids), vocabulary.vectors(ids))
+    
+    def test_vocabulary_encodes_through_batcher_without_saving(self, tmp_path):
+        """Event-loop skills go through the micro-batcher; appending never writes the file"""
+        model = FakeEncoder()
+        path = tmp_path / "skill_vocabulary.npz"
+        vocabulary = SkillVocabulary(model, path)
+        vocabulary.encoder = MicroBatchEncoder(model.encode, max_batch_size=8, max_wait_ms=1)
+        vocabulary.SAVE_INTERVAL_SECONDS = 0
+        try:
+            asyncio.run(vocabulary.ensure_async(["Python", "SQL", "Docker", "python"]))
+            assert vocabulary.encoder.requests == 3
+            assert len(vocabulary) == 3
+            assert not path.exists()
+            
+            # Bulk batches and pool-thread ensure() bypass the batcher
+            asyncio.run(vocabulary.ensure_async([f"skill {i}" for i in range(20)]))
+            vocabulary.ensure(["Kubernetes"])
+            assert vocabulary.encoder.requests == 3
+            assert len(vocabulary) == 24
+            assert np.allclose(np.linalg.norm(vocabulary.vectors([0, 23]), axis=1), 1.0)
+            assert vocabulary.save() and path.exists()
+        finally:
+            vocabulary.encoder.close()
+
+
+class TestSkillGraph:
+    """Test the precomputed skill similarity graph"""
+    
+    SKILLS = ["Python", "SQL", "Pandas", "Docker", "Excel", "React", "Kubernetes", "Statistics"]
+    
+    def test_incremental_graph_matches_brute_force(self):
+        """Edges added in small batches equal the pairwise similarities above threshold"""
+        manager = SkillSignatureManager(FakeEncoder())
+        manager.graph.threshold = 0.0
+        manager.graph.BLOCK_SIZE = 3
+        manager.graph.add(self.SKILLS[:3])
+        manager.graph.add(self.SKILLS[3:])
+        
+        assert manager.graph.size == len(self.SKILLS)
+        for a in self.SKILLS:
+            for b in self.SKILLS:
+                expected = manager.compute_skill_similarity(a, b)
+                edge = manager.graph.get(a.lower(), b.lower())
+                if a == b:
+                    assert edge == 1.0
+                elif expected > 0.0:
+                    assert abs(edge - expected) < 1e-5
+                else:
+                    assert edge == 0.0
+        
+        neighbours = manager.graph.neighbours("python")
+        assert [n["similarity"] for n in neighbours] == sorted((n["similarity"] for n in neighbours), reverse=True)
+    
+    def test_matching_uses_graph_without_encoding(self):
+        """Known skills are matched through graph lookups, not the model"""
+        encoder = FakeEncoder()
+        manager = SkillSignatureManager(encoder)
+        manager.graph.threshold = 0.0
+        manager.graph.add(self.SKILLS)
+        calls = encoder.encode_calls
+        
+        result = manager.find_skill_matches(["Python", "Docker"], ["SQL", "Kubernetes", "Excel"])
+        
+        assert encoder.encode_calls == calls
+        for match in result["semantic_matches"]:
+            assert match["similarity"] == round(manager.graph.get(match["required_skill"], match["user_skill"]), 3)
+
+
+class TestShardedCache:
+    """Test the sharded TTL cache used for student vectors and explanations"""
+    
+    def test_expiry_and_counters(self, monkeypatch):
+        """Expired entries miss and are counted; live entries hit"""
+        import app.utils.cache as cache_module
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        
+        cache = ShardedTTLCache(max_bytes=1024 * 1024, shards=4, default_ttl_seconds=10)
+        cache.set("a", {"v": np.ones(4, dtype='float32')})
+        cache.set("b", "short", ttl_seconds=1)
+        now[0] += 5
+        
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("missing") is None
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+        assert stats["entries"] == 1
+    
+    def test_memory_bound_and_prefix_invalidation(self):
+        """Entries are evicted LRU-first by bytes, and prefixes can be dropped"""
+        vector_bytes = 4000 * 4
+        cache = ShardedTTLCache(max_bytes=3 * vector_bytes + 2000, shards=1)
+        for i in range(5):
+            cache.set(f"user{i}:x", np.zeros(4000, dtype='float32'))
+        
+        assert cache.size() == 3
+        assert cache.memory_bytes <= cache.max_bytes
+        assert cache.get_stats()["evictions"] == 2
+        assert cache.get("user0:x") is None and cache.get("user4:x") is not None
+        
+        assert cache.invalidate_prefix("user4:") == 1
+        assert cache.size() == 2
+
+
+class TestSharedVectorStore:
+    """Test the shared (L2) student-vector tier"""
+    
+    def test_pack_round_trip(self):
+        """Vectors survive serialization as raw float32 bytes"""
+        vectors = {"skill_vector": np.arange(8, dtype='float32').reshape(1, 8), "location_vector": np.ones(3, dtype='float32')}
+        restored = unpack_vectors(pack_vectors(vectors))
+        
+        assert set(restored) == set(vectors)
+        for name in vectors:
+            np.testing.assert_array_equal(restored[name], vectors[name])
+    
+    def test_workers_share_vectors_by_profile(self, tmp_path):
+        """A second worker reuses stored vectors until the profile changes"""
+        path = tmp_path / "student_vectors.sqlite3"
+        manager = SkillSignatureManager(FakeEncoder())
+        worker_a = StudentProfileCache(manager, shared_store=SQLiteVectorStore(path, "ns:"))
+        worker_b = StudentProfileCache(manager, shared_store=SQLiteVectorStore(path, "ns:"))
+        user = User.model_construct(id="user-1", email="shared@example.com", full_name="Shared", skills=[])
+        profile = {"skills": ["Python"], "location_query": "Pune"}
+        vectors = {"skill_vector": np.full((1, 4), 0.5, dtype='float32')}
+        
+        worker_a.store_vectors(user, vectors, profile)
+        
+        shared = worker_b.get_shared_vectors(user, profile)
+        np.testing.assert_array_equal(shared["skill_vector"], vectors["skill_vector"])
+        assert worker_b.embedding_cache.size() == 1
+        assert worker_b.get_shared_vectors(user, {**profile, "skills": ["Python", "SQL"]}) is None
+        
+        worker_a.invalidate("user-1", shared=True)
+        assert worker_b.get_shared_vectors(user, profile) is None
+        assert worker_b.get_cache_stats()["shared_store"]["hits"] == 1
+    
+    def test_expired_rows_purged_periodically(self, tmp_path, monkeypatch):
+        """Writes purge expired rows every purge_every calls, through the expires_at index"""
+        from app.utils import cache as cache_module
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+        store = SQLiteVectorStore(tmp_path / "vectors.sqlite3", purge_every=3)
+        count = lambda: store._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+        
+        store.set("old", b"x", ttl_seconds=1)
+        now[0] += 2
+        assert store.get("old") is None
+        store.set("a", b"a", ttl_seconds=60)
+        assert count() == 2
+        store.set("b", b"b", ttl_seconds=60)
+        assert count() == 2
+        assert store.get("a") == b"a"
+        
+        now[0] += 120
+        assert store.purge_expired() == 2
+        plan = store._conn.execute("EXPLAIN QUERY PLAN DELETE FROM vectors WHERE expires_at <= 0").fetchall()
+        assert "vectors_expires_at" in str(plan)
+        store.close()
+        
+        with pytest.raises(TypeError):
+            VectorStore()
+
+
+class TestEmbeddingBatcher:
+    """Test micro-batching of concurrent encodes"""
+    
+    def test_concurrent_encodes_share_batches(self):
+        """Threads encoding at once get their own rows from few forward passes"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        model = FakeEncoder()
+        encoder = MicroBatchEncoder(lambda texts: model.encode(texts), max_batch_size=8, max_wait_ms=50)
+        texts = [f"skill {i % 6}" for i in range(8)]
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                vectors = list(pool.map(encoder.encode, texts))
+            
+            for text, vector in zip(texts, vectors):
+                assert np.allclose(vector, model.encode(text))
+            stats = encoder.get_stats()
+            assert stats["requests"] == 8
+            assert stats["batches"] < 8
+            assert stats["batch_size"]["count"] == stats["batches"]
+            assert stats["latency_ms"]["count"] == 8
+        finally:
+            encoder.close()
+    
+    @pytest.mark.asyncio
+    async def test_async_callers_and_dedup(self):
+        """Coroutines await one batch; duplicate texts are encoded once"""
+        encoded = []
+        model = FakeEncoder()
+        
+        def encode_batch(texts):
+            encoded.append(list(texts))
+            return model.encode(texts)
+        
+        encoder = MicroBatchEncoder(encode_batch, max_batch_size=16, max_wait_ms=50)
+        try:
+            vectors = await asyncio.gather(*[encoder.encode_async(text) for text in ["a", "b", "a"]])
+            assert encoded == [["a", "b"]]
+            assert np.allclose(vectors[0], vectors[2])
+        finally:
+            encoder.close()
+    
+    def test_full_queue_rejects(self):
+        """Submits beyond the queue depth fail fast instead of piling up"""
+        import threading
+        release = threading.Event()
+        
+        def blocked_encode(texts):
+            release.wait(5)
+            return np.zeros((len(texts), 4), dtype='float32')
+        
+        encoder = MicroBatchEncoder(
+            blocked_encode, max_batch_size=1, max_wait_ms=0, max_queue_size=1, enqueue_timeout_seconds=0.05
+        )
+        try:
+            first = encoder.submit("a")
+            while encoder.queue_depth:  # Worker holds "a"
+                pass
+            encoder.submit("b")
+            with pytest.raises(EmbeddingQueueFullError):
+                encoder.submit("c")
+            assert encoder.get_stats()["rejected"] == 1
+            release.set()
+            assert first.result(5).shape == (4,)
+        finally:
+            release.set()
+            encoder.close()
+    
+    @pytest.mark.asyncio
+    async def test_async_encode_never_waits_for_room(self):
+        """encode_async fails at once on a full queue instead of blocking the loop"""
+        import threading
+        import time
+        release = threading.Event()
+        
+        def blocked_encode(texts):
+            release.wait(5)
+            return np.zeros((len(texts), 4), dtype='float32')
+        
+        encoder = MicroBatchEncoder(
+            blocked_encode, max_batch_size=1, max_wait_ms=0, max_queue_size=1, enqueue_timeout_seconds=5
+        )
+        try:
+            encoder.submit("a")
+            while encoder.queue_depth:  # Worker holds "a"
+                pass
+            encoder.submit("b")
+            started = time.monotonic()
+            with pytest.raises(EmbeddingQueueFullError):
+                await encoder.encode_async("c")
+            assert time.monotonic() - started < 1
+        finally:
+            release.set()
+            encoder.close()
+    
+    @pytest.mark.asyncio
+    async def test_student_encodes_batch_beyond_pool_size(self, tmp_path):
+        """Concurrent student misses share one batch instead of one per pool thread"""
+        engine = await build_test_engine(make_internships(4), tmp_path)
+        engine._encoder = MicroBatchEncoder(engine._model.encode, max_batch_size=32, max_wait_ms=200)
+        try:
+            profiles = [{"skills": [f"skill {i}"], "career_objective": f"student {i}"} for i in range(12)]
+            users = [User.model_construct(id=f"user_{i}") for i in range(12)]
+            results = await asyncio.gather(*(
+                engine._load_student_vectors(user, profile) for user, profile in zip(users, profiles)
+            ))
+            
+            assert engine._encoder.requests == 12
+            assert engine._encoder.batches <= 2  # Not capped at one per pool worker
+            assert all(abs(np.linalg.norm(vectors["skill_vector"]) - 1.0) < 1e-5 for vectors in results)
+        finally:
+            engine._encoder.close()
+
+
+# CI sets this so missing ONNX dependencies or model files fail instead of skipping
+ONNX_PARITY_REQUIRED = os.environ.get("REQUIRE_ONNX_PARITY") == "1"
+
+
+def skip_or_fail(reason: str):
+    if ONNX_PARITY_REQUIRED:
+        pytest.fail(f"REQUIRE_ONNX_PARITY is set: {reason}")
+    pytest.skip(reason)
+
+
+class TestOnnxEncoder:
+    """Test the ONNX Runtime inference backend"""
+    
+    def test_pooling_ignores_padding(self):
+        """Mean/max/CLS pooling only see unmasked tokens"""
+        tokens = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]], dtype='float32')
+        mask = np.array([[1, 1, 0]])
+        
+        assert np.allclose(pool_embeddings(tokens, mask, ["pooling_mode_mean_tokens"]), [[2.0, 3.0]])
+        assert np.allclose(pool_embeddings(tokens, mask, ["pooling_mode_max_tokens"]), [[3.0, 4.0]])
+        assert np.allclose(
+            pool_embeddings(tokens, mask, ["pooling_mode_cls_token", "pooling_mode_mean_tokens"]),
+            [[1.0, 2.0, 2.0, 3.0]]
+        )
+    
+    @pytest.mark.parametrize("quantize", [False, True])
+    def test_parity_with_pytorch(self, tmp_path, quantize):
+        """ONNX embeddings match the PyTorch model to cosine >= 0.99"""
+        for module in ("onnxruntime", "onnx"):
+            try:
+                __import__(module)
+            except ImportError:
+                skip_or_fail(f"{module} is not installed")
+        from sentence_transformers import SentenceTransformer
+        
+        try:
+            reference = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+        except Exception as e:
+            skip_or_fail(f"Model not available: {e}")
+        
+        encoder = OnnxSentenceEncoder("all-MiniLM-L6-v2", cache_dir=tmp_path, quantize=quantize)
+        texts = ["Python developer", "  Machine Learning, SQL and Docker  ", "Digital marketing intern in Pune"]
+        
+        expected = reference.encode(texts, convert_to_numpy=True)
+        actual = encoder.encode(texts, convert_to_numpy=True)
+        
+        assert actual.shape == expected.shape == (3, encoder.get_sentence_embedding_dimension())
+        cosine = (actual * expected).sum(axis=1) / (
+            np.linalg.norm(actual, axis=1) * np.linalg.norm(expected, axis=1)
+        )
+        assert cosine.min() >= 0.99
+        
+        single = encoder.encode(texts[0])
+        assert single.shape == (encoder.get_sentence_embedding_dimension(),)
+        assert float(single @ expected[0]) / float(np.linalg.norm(single) * np.linalg.norm(expected[0])) >= 0.99
+
+
+class TestLazyExplanations:
+    """Test that explanations are only built for what is served"""
+    
+    @pytest.fixture
+    def student(self) -> User:
+        # model_construct skips Beanie's collection check (no database in tests)
+        return User.model_construct(
+            email="lazy@example.com",
+            full_name="Lazy Tester",
+            skills=[SkillItem(name="Python", level="Advanced"), SkillItem(name="SQL", level="Beginner")],
+            location_query="Bangalore"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_ranking_without_explanations(self, student, tmp_path):
+        """Only the explained page carries detailed explanations"""
+        engine = await build_test_engine(make_internships(12), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        
+        recs = await engine.get_recommendations_for_student(student, top_k=10, include_explanations=False)
+        
+        assert len(recs) == 10
+        assert all(rec["detailed_explanation"] is None for rec in recs)
+        
+        page = recs[:3]
+        await engine.explain_recommendations(student, page)
+        
+        for rec in page:
+            assert rec["detailed_explanation"]["overall_score"] == round(rec["match_percentage"], 1)
+            assert rec["explanation_summary"]
+        assert all(rec["detailed_explanation"] is None for rec in recs[3:])
+    
+    @pytest.mark.asyncio
+    async def test_failed_explanations_fall_back(self, student, tmp_path, monkeypatch):
+        """A failed or missing explanation still gives the page its match score reason"""
+        engine = await build_test_engine(make_internships(6), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        recs = await engine.get_recommendations_for_student(student, top_k=4, include_explanations=False)
+        generator = engine._explanation_generator
+        real_batch = generator.generate_explanations_batch
+        
+        def failing_batch(*args, **kwargs):
+            raise RuntimeError("explanation backend down")
+        
+        monkeypatch.setattr(generator, "generate_explanations_batch", failing_batch)
+        await engine.explain_recommendations(student, recs[:2])
+        for rec in recs[:2]:
+            assert rec["match_reasons"] == [f"Match score: {rec['match_percentage']}%"]
+            assert rec["explanation_summary"] == "Good match based on your profile"
+        
+        # One missing explanation falls back; the others are still attached
+        monkeypatch.setattr(
+            generator, "generate_explanations_batch",
+            lambda *args: [None] + real_batch(*args)[1:]
+        )
+        await engine.explain_recommendations(student, recs[:2])
+        assert recs[0]["match_reasons"] == [f"Match score: {recs[0]['match_percentage']}%"]
+        assert recs[1]["detailed_explanation"]["overall_score"] == round(recs[1]["match_percentage"], 1)
+        
+        # Fallbacks are not cached
+        monkeypatch.setattr(generator, "generate_explanations_batch", real_batch)
+        await engine.explain_recommendations(student, recs[:1])
+        assert recs[0]["detailed_explanation"]["overall_score"] == round(recs[0]["match_percentage"], 1)
+    
+    @pytest.mark.asyncio
+    async def test_on_demand_explanation_is_cached(self, student, tmp_path):
+        """A second request for the same profile and internship reuses the cache"""
+        engine = await build_test_engine(make_internships(5), tmp_path)
+        
+        first = await engine.get_match_explanation(student, "int_002")
+        encode_calls = engine._model.encode_calls
+        second = await engine.get_match_explanation(student, "int_002")
+        
+        assert first is not None
+        assert second == first
+        assert engine._model.encode_calls == encode_calls
+        assert await engine.get_match_explanation(student, "missing") is None
+
+
+class TestVectorizedScoring:
+    """Test column-store scoring against the FAISS indices"""
+    
+    @pytest.mark.asyncio
+    async def test_skill_scores_match_faiss_search(self, tmp_path):
+        """Matmul skill scores agree with the flat inner-product index"""
+        engine = await build_test_engine(make_internships(20), tmp_path)
+        query = engine._model.encode("python sql developer").reshape(1, -1)
+        student_vectors = engine._generate_student_vectors({"skills": ["python", "sql"]})
+        student_vectors["skill_vector"] = query / np.linalg.norm(query)
+        
+        scores = engine._score_rows(student_vectors, engine.config.DEFAULT_WEIGHTS, engine._index_manager.snapshot)
+        faiss_scores, faiss_rows = engine._index_manager.search(student_vectors["skill_vector"], "skill", 20)
+        
+        for score, row in zip(faiss_scores[0], faiss_rows[0]):
+            assert abs(scores["skill_score"][row] - max(0.1, min(1.0, score))) < 1e-5
+    
+    @pytest.mark.asyncio
+    async def test_top_rows_and_real_stipend_scores(self, tmp_path):
+        """Top-k is ordered and stipend scores reflect the offered stipend"""
+        engine = await build_test_engine(make_internships(20), tmp_path)
+        student_vectors = engine._generate_student_vectors({"skills": ["python"], "preferred_stipend": 20000})
+        
+        scores = engine._score_rows(student_vectors, engine.config.DEFAULT_WEIGHTS, engine._index_manager.snapshot)
+        top = engine._top_rows(scores["weighted_score"], 5)
+        
+        assert list(top) == list(np.argsort(-scores["weighted_score"], kind="stable")[:5])
+        assert len(set(np.round(scores["stipend_score"], 4))) > 1
+        assert scores["stipend_score"].max() == 1.0
+    
+    @pytest.mark.asyncio
+    async def test_columns_restored_from_disk(self, tmp_path):
+        """Columns are restored from the persisted snapshot"""
+        engine = await build_test_engine(make_internships(8), tmp_path)
+        manager = engine._index_manager
+        
+        restored = InternshipIndexManager(manager.embedding_dim, tmp_path)
+        assert restored.load_from_disk()
+        
+        np.testing.assert_allclose(restored.skill_matrix, manager.skill_matrix, atol=1e-6)
+        np.testing.assert_allclose(restored.location_matrix, manager.location_matrix, atol=1e-6)
+        np.testing.assert_allclose(restored.stipend_column, manager.stipend_column, atol=1e-6)
+        np.testing.assert_allclose(restored.timeline_column, manager.timeline_column, atol=1e-6)
+
+
+class TestCompiledFilters:
+    """Test that columnar filter masks agree with the per-internship predicates"""
+    
+    def varied_internships(self) -> List[Dict]:
+        internships = make_internships(30)
+        cities = [("Bangalore", "Karnataka"), ("Mumbai", "Maharashtra"), ("Delhi", "Delhi")]
+        work_types = ["Remote", "WFO", "Hybrid", "Work From Home"]
+        durations = ["45 days", "2 months", "3 months", "6 months"]
+        for i, internship in enumerate(internships):
+            city, state = cities[i % len(cities)]
+            internship.update({
+                "location": f"{city}, {state}",
+                "city": city,
+                "state": state,
+                "work_type": work_types[i % len(work_types)],
+                "is_remote": i % 4 == 0,
+                "duration": durations[i % len(durations)],
+                "stipend": 5000 * (i % 7)
+            })
+        return internships
+    
+    @pytest.mark.asyncio
+    async def test_masks_match_predicates(self, tmp_path):
+        """Mask and boost equal the per-row reference predicate for every row"""
+        engine = await build_test_engine(self.varied_internships(), tmp_path)
+        manager = engine._index_manager
+        filter_sets = [
+            {"location": "Mumbai"},
+            {"location": "remote", "min_stipend": 10000},
+            {"work_type": "wfo,hybrid", "max_stipend": 20000},
+            {"duration": "3 months", "location": "karnataka"},
+            {"work_type": "Remote", "duration": "45 days", "min_stipend": 5000, "max_stipend": 25000},
+        ]
+        
+        for filters in filter_sets:
+            mask, boost = engine._compile_filters(filters, engine._index_manager.snapshot)
+            for row, internship_id in enumerate(manager.internship_ids):
+                internship = manager.internship_data[internship_id]
+                passes, expected_boost = reference_filter(engine, internship, filters)
+                assert mask[row] == passes, (filters, internship_id)
+                assert abs(boost[row] - expected_boost) < 1e-6
+    
+    @pytest.mark.asyncio
+    async def test_restrictive_filter_fills_top_k(self, tmp_path):
+        """A filter matching few rows still returns every matching internship"""
+        engine = await build_test_engine(self.varied_internships(), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        student = User.model_construct(email="f@example.com", skills=[SkillItem(name="Python")])
+        filters = {"location": "Delhi", "work_type": "Hybrid"}
+        
+        expected = [
+            internship_id for internship_id, internship in engine._index_manager.internship_data.items()
+            if reference_filter(engine, internship, filters)[0]
+        ]
+        recs = await engine.get_recommendations_for_student(
+            student, top_k=len(expected), filters=filters, include_explanations=False
+        )
+        
+        assert expected
+        assert sorted(rec["id"] for rec in recs) == sorted(expected)
+
+
+class TestIncrementalSync:
+    """Test incremental index updates against a full rebuild"""
+    
+    @pytest.mark.asyncio
+    async def test_apply_changes_matches_full_rebuild(self, tmp_path):
+        """Upserting and removing rows gives the same columns as rebuilding from scratch"""
+        internships = make_internships(10)
+        engine = await build_test_engine(internships, tmp_path / "incremental")
+        
+        updated = dict(internships[3], stipend=99000, work_type="Hybrid")
+        added = make_internships(12)[10:]
+        ids, data, vectors = await engine._prepare_internship_rows([updated] + added)
+        upserts = {id_: (data[id_], vectors[id_]) for id_ in ids}
+        assert engine._index_manager.apply_changes(upserts, {"int_005"})
+        
+        final = [doc for doc in internships if doc["_id"] != "int_005"]
+        final[3] = updated
+        rebuilt = await build_test_engine(final + added, tmp_path / "rebuilt")
+        
+        incremental, full = engine._index_manager, rebuilt._index_manager
+        assert incremental.internship_ids == full.internship_ids
+        assert incremental.internship_data["int_003"]["stipend"] == 99000
+        np.testing.assert_allclose(incremental.skill_matrix, full.skill_matrix, atol=1e-6)
+        np.testing.assert_allclose(incremental.stipend_column, full.stipend_column, atol=1e-6)
+        assert incremental.skill_index.ntotal == len(final) + len(added)
+        for facet in full.FILTER_FACETS:
+            assert [incremental.facet_vocab[facet][c] for c in incremental.facet_codes[facet]] == \
+                [full.facet_vocab[facet][c] for c in full.facet_codes[facet]]
+    
+    def test_sync_state_and_query(self, tmp_path):
+        """The high-water mark tracks the newest updated_at and ObjectId"""
+        from bson import ObjectId
+        
+        manager = InternshipIndexManager(16, tmp_path)
+        assert manager.changes_query() is None
+        
+        older, newer = ObjectId(), ObjectId()
+        manager.advance_sync_state([
+            {"_id": newer, "updated_at": datetime(2024, 5, 1, 12, 0, 0)},
+            {"_id": older, "updated_at": datetime(2024, 5, 2, 8, 30, 0, 500)},
+        ])
+        
+        assert manager.sync_state == {"updated_at": "2024-05-02T08:30:00.000500", "last_id": str(newer)}
+        query = manager.changes_query()
+        assert query["$or"][0] == {"updated_at": {"$gte": datetime(2024, 5, 2, 8, 30, 0, 500)}}
+        assert query["$or"][1] == {"_id": {"$gt": newer}}
+
+
+class TestChangeWatcher:
+    """Test applying change stream events to the index (no database needed)"""
+    
+    @pytest.mark.asyncio
+    async def test_apply_events(self, tmp_path):
+        """Inserts, updates, closes and deletes are reflected in the index"""
+        engine = await build_test_engine(make_internships(6), tmp_path)
+        watcher = InternshipChangeWatcher(engine, engine.config)
+        new_doc = make_internships(7)[6]
+        closed = dict(make_internships(6)[1], status="closed", is_active=False)
+        
+        assert await watcher.apply_events([
+            {"operationType": "insert", "documentKey": {"_id": new_doc["_id"]}, "fullDocument": new_doc},
+            {"operationType": "update", "documentKey": {"_id": "int_001"}, "fullDocument": closed},
+            {"operationType": "delete", "documentKey": {"_id": "int_004"}},
+            {"operationType": "update", "documentKey": {"_id": "int_002"}, "fullDocument": None},
+        ])
+        
+        manager = engine._index_manager
+        assert "int_006" in manager.internship_id_to_index
+        assert manager.internship_data["int_001"]["status"] == "closed"
+        assert "int_004" not in manager.internship_data
+        assert "int_002" not in manager.internship_data
+        assert manager.skill_index.ntotal == len(manager.internship_ids) == 5
+        assert watcher.events_applied == 4
+    
+    def test_resume_token_round_trip(self, tmp_path):
+        """The resume token is persisted next to the index snapshot"""
+        engine = YuvaSetuRecommendationEngine()
+        engine.cache_dir = tmp_path
+        watcher = InternshipChangeWatcher(engine, engine.config)
+        
+        assert watcher._load_resume_token() is None
+        watcher._save_resume_token({"_data": "8265A1B2C3"})
+        assert (tmp_path / InternshipChangeWatcher.TOKEN_FILE).exists()
+        assert watcher._load_resume_token() == {"_data": "8265A1B2C3"}
+
+
+class TestSnapshotSwap:
+    """Test that index updates publish new snapshots instead of mutating in place"""
+    
+    @pytest.mark.asyncio
+    async def test_pinned_snapshot_survives_changes(self, tmp_path):
+        """A reader holding a snapshot keeps a consistent view across updates"""
+        engine = await build_test_engine(make_internships(6), tmp_path)
+        manager = engine._index_manager
+        pinned = manager.snapshot
+        pinned_skills = pinned.skill_matrix.copy()
+        
+        ids, data, vectors = await engine._prepare_internship_rows(make_internships(8)[6:])
+        assert manager.apply_changes({id_: (data[id_], vectors[id_]) for id_ in ids}, {"int_000"})
+        
+        assert manager.snapshot is not pinned
+        assert manager.total_internships == 7
+        assert pinned.size == 6 and "int_000" in pinned.internship_data
+        assert pinned.skill_index.ntotal == len(pinned.skill_matrix) == 6
+        np.testing.assert_array_equal(pinned.skill_matrix, pinned_skills)
+        with pytest.raises(ValueError):
+            pinned.skill_matrix[0, 0] = 1.0
+    
+    @pytest.mark.asyncio
+    async def test_refresh_never_exposes_empty_index(self, tmp_path):
+        """refresh_data keeps serving the old snapshot until the rebuild is published"""
+        internships = make_internships(5)
+        engine = await build_test_engine(internships, tmp_path)
+        seen_during_load = []
+        
+        async def load_employer_data():
+            seen_during_load.append(engine._index_manager.total_internships)
+            return await engine._process_internships_batch(internships + make_internships(7)[5:])
+        
+        engine.load_employer_data = load_employer_data
+        assert await engine.refresh_data()
+        assert seen_during_load == [5]
+        assert engine._index_manager.total_internships == 7
+
+
+class TestResultCache:
+    """Test caching of ranked candidate lists"""
+    
+    @pytest.mark.asyncio
+    async def test_rankings_reused_until_invalidated(self, tmp_path):
+        """Repeat calls skip ranking; invalidation and snapshot swaps recompute"""
+        engine = await build_test_engine(make_internships(10), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        student = User.model_construct(id="user-7", email="r@example.com", skills=[SkillItem(name="Python")])
+        ranked = []
+        rank_candidates = engine._rank_candidates
+        
+        def counting_rank(*args, **kwargs):
+            ranked.append(args[-1])
+            return rank_candidates(*args, **kwargs)
+        
+        engine._rank_candidates = counting_rank
+        
+        first = await engine.get_recommendations_for_student(student, top_k=5, include_explanations=False)
+        again = await engine.get_recommendations_for_student(student, top_k=3, include_explanations=False)
+        assert ranked == [5]
+        assert [r["id"] for r in again] == [r["id"] for r in first[:3]]
+        
+        await engine.get_recommendations_for_student(student, top_k=5, filters={"location": "Bangalore"}, include_explanations=False)
+        await engine.get_recommendations_for_student(student, top_k=5, filters={"location": " bangalore "}, include_explanations=False)
+        assert ranked == [5, 5]
+        
+        engine.invalidate_user_cache("user-7")
+        await engine.get_recommendations_for_student(student, top_k=5, include_explanations=False)
+        assert ranked == [5, 5, 5]
+        
+        ids, data, vectors = await engine._prepare_internship_rows(make_internships(11)[10:])
+        assert engine._index_manager.apply_changes({id_: (data[id_], vectors[id_]) for id_ in ids}, set())
+        await engine.get_recommendations_for_student(student, top_k=5, include_explanations=False)
+        assert ranked == [5, 5, 5, 5]
+        
+        # Republishing the same contents keeps the cached ranking
+        assert engine._index_manager.apply_changes({}, set())
+        await engine.get_recommendations_for_student(student, top_k=5, include_explanations=False)
+        assert ranked == [5, 5, 5, 5]
+    
+    @pytest.mark.asyncio
+    async def test_catalogue_id_tracks_contents(self, tmp_path):
+        """catalogue_id depends on ids and updated_at, not on load order or version counters"""
+        internships = make_internships(6)
+        for i, internship in enumerate(internships):
+            internship["updated_at"] = datetime(2026, 1, 1 + i)
+        first = await build_test_engine(internships, tmp_path / "first")
+        second = await build_test_engine(list(reversed(internships)), tmp_path / "second")
+        assert first._index_manager.catalogue_id == second._index_manager.catalogue_id
+        
+        changed = dict(internships[2], updated_at=datetime(2026, 2, 1))
+        ids, data, vectors = await first._prepare_internship_rows([changed])
+        assert first._index_manager.apply_changes({id_: (data[id_], vectors[id_]) for id_ in ids}, set())
+        assert first._index_manager.catalogue_id != second._index_manager.catalogue_id
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_coalesce(self, tmp_path):
+        """Concurrent calls for one profile share one ranking and one encode"""
+        engine = await build_test_engine(make_internships(10), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        student = User.model_construct(id="user-8", email="c@example.com", skills=[SkillItem(name="Python")])
+        ranked = []
+        rank_candidates = engine._rank_candidates
+        
+        def counting_rank(*args, **kwargs):
+            ranked.append(args[-1])
+            return rank_candidates(*args, **kwargs)
+        
+        engine._rank_candidates = counting_rank
+        engine._encoder = engine._create_encoder()
+        encode_calls = engine._model.encode_calls
+        
+        results = await asyncio.gather(*[
+            engine.get_recommendations_for_student(student, top_k=5, include_explanations=False)
+            for _ in range(4)
+        ])
+        assert ranked == [5]
+        assert engine._model.encode_calls == encode_calls + 1
+        assert engine.coalesced_calls == 3
+        assert not engine._in_flight
+        assert all([r["id"] for r in result] == [r["id"] for r in results[0]] for result in results)
+        
+        results[0][0]["title"] = "Changed"
+        assert results[1][0]["title"] != "Changed"
+        assert engine.get_engine_stats()["embedding_batcher"]["requests"] == 1
+        engine._encoder.close()
+
+
+class TestPrecomputedRecommendations:
+    """Test the batch precompute job and serving from its output"""
+    
+    @pytest.mark.asyncio
+    async def test_batch_ranking_matches_live_path(self, tmp_path):
+        """Blocked batch scoring selects what the live ranking selects"""
+        engine = await build_test_engine(make_internships(30), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        engine.config.PRECOMPUTE_SCORE_BLOCK = 2
+        snapshot = engine._index_manager.snapshot
+        weights = dict(engine._weights_registry.get().weights)
+        profiles = [{"skills": skills} for skills in (["Python"], ["React", "Docker"], ["Marketing"])]
+        
+        batch_vectors = engine._generate_student_vectors_batch(profiles)
+        rankings = engine._rank_students_batch(batch_vectors, weights, snapshot, 10)
+        
+        for vectors, ranking in zip(batch_vectors, rankings):
+            selected, _, _ = engine._rank_candidates(vectors, weights, snapshot, {}, 10)
+            assert [row[0] for row in ranking] == [row[0] for row in selected]
+            assert [row[2] for row in ranking] == [row[3] for row in selected]
+    
+    @pytest.mark.asyncio
+    async def test_served_while_current(self, tmp_path):
+        """Unfiltered requests use the stored ranking until the catalogue changes"""
+        engine = await build_test_engine(make_internships(12), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        engine.config.PRECOMPUTED_ENABLED = True
+        engine.config.PRECOMPUTE_CHUNK_SIZE = 2
+        engine._precomputed_collection = FakeBulkCollection()
+        students = [
+            User.model_construct(id=f"user-{i}", email=f"p{i}@example.com", skills=[SkillItem(name=name)])
+            for i, name in enumerate(["Python", "SQL", "Excel"])
+        ]
+        
+        stats = await engine.precompute_recommendations(students, top_n=8)
+        assert stats == {"students": 3, "chunks": 2}
+        
+        encode_calls = engine._model.encode_calls
+        recs = await engine.get_recommendations_for_student(students[0], top_k=5, include_explanations=False)
+        assert len(recs) == 5
+        assert engine._model.encode_calls == encode_calls
+        stored = engine._precomputed_collection.documents["user-0"]["items"]
+        assert [r["id"] for r in recs] == [item["id"] for item in stored[:5]]
+        
+        # Ids the pinned snapshot does not know are dropped, not looked up
+        tampered = engine._precomputed_collection.documents["user-1"]["items"]
+        tampered.insert(0, dict(tampered[0], id="int_999"))
+        recs = await engine.get_recommendations_for_student(students[1], top_k=5, include_explanations=False)
+        assert [r["id"] for r in recs] == [item["id"] for item in tampered[1:6]]
+        assert engine._model.encode_calls == encode_calls
+        
+        ids, data, vectors = await engine._prepare_internship_rows(make_internships(13)[12:])
+        assert engine._index_manager.apply_changes({id_: (data[id_], vectors[id_]) for id_ in ids}, set())
+        await engine.get_recommendations_for_student(students[0], top_k=5, include_explanations=False)
+        assert engine._model.encode_calls > encode_calls
+
+
+class TestStreamingLoader:
+    """Test the batched employer-internship loader"""
+    
+    @pytest.mark.asyncio
+    async def test_streams_whole_catalogue(self, tmp_path):
+        """Every document is loaded even when the count estimate is low"""
+        internships = make_internships(250)
+        engine = await build_test_engine(internships[:3], tmp_path / "streamed")
+        engine.config.LOAD_CURSOR_BATCH_SIZE = 64
+        collection = FakeCollection(internships)
+        
+        assert await engine._stream_internships(collection, expected_count=10)
+        
+        reference = await build_test_engine(internships, tmp_path / "reference")
+        streamed, full = engine._index_manager, reference._index_manager
+        assert streamed.internship_ids == full.internship_ids
+        assert streamed.total_internships == 250
+        np.testing.assert_allclose(streamed.skill_matrix, full.skill_matrix, atol=1e-6)
+        np.testing.assert_allclose(streamed.timeline_column, full.timeline_column, atol=1e-6)
+        assert "embedding" in collection.projections[0] and "title" in collection.projections[0]
+        assert collection.cursors[0].closed
+    
+    @pytest.mark.asyncio
+    async def test_stalled_batch_keeps_current_index(self, tmp_path):
+        """A timeout aborts the load rather than publishing a partial catalogue"""
+        engine = await build_test_engine(make_internships(5), tmp_path)
+        engine.config.LOAD_CURSOR_BATCH_SIZE = 50
+        engine.config.LOAD_BATCH_TIMEOUT_SECONDS = 0.05
+        collection = FakeCollection(make_internships(200), stall_after=100)
+        
+        assert not await engine._stream_internships(collection, expected_count=200)
+        assert engine._index_manager.total_internships == 5
+        assert collection.cursors[0].closed
+
+
+class TestSnapshotPersistence:
+    """Test the self-contained on-disk index snapshot"""
+    
+    @pytest.mark.asyncio
+    async def test_warm_start_restores_full_snapshot(self, tmp_path):
+        """A fresh manager serves the same recommendations from disk alone"""
+        from bson import ObjectId
+        
+        internships = make_internships(9)
+        internships[4] = dict(internships[4], _id=ObjectId(), created_at=datetime(2024, 3, 1), updated_at=datetime(2024, 3, 2))
+        engine = await build_test_engine(internships, tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        student = User.model_construct(
+            email="warm@example.com",
+            skills=[SkillItem(name="Docker", level="Intermediate")],
+            location_query="Bangalore"
+        )
+        
+        warm = await build_test_engine(make_internships(1), tmp_path / "unused")
+        warm.config.MIN_MATCH_THRESHOLD = 0.0
+        warm._index_manager = InternshipIndexManager(engine.embedding_dim, tmp_path)
+        assert warm._index_manager.load_from_disk()
+        
+        original, restored = engine._index_manager, warm._index_manager
+        assert restored.catalogue_version == original.catalogue_version
+        assert restored.sync_state == original.sync_state
+        assert restored.internship_data == original.internship_data
+        assert set(restored.internship_vectors) == set(original.internship_ids)
+        assert restored.facet_codes["location"].tolist() == original.facet_codes["location"].tolist()
+        
+        expected = await engine.get_recommendations_for_student(student, top_k=5, include_explanations=False)
+        actual = await warm.get_recommendations_for_student(student, top_k=5, include_explanations=False)
+        assert [(r["id"], r["match_percentage"]) for r in actual] == [(r["id"], r["match_percentage"]) for r in expected]
+    
+    @pytest.mark.asyncio
+    async def test_inconsistent_snapshot_is_ignored(self, tmp_path):
+        """Column files that disagree with the manifest are not loaded"""
+        engine = await build_test_engine(make_internships(6), tmp_path)
+        snapshot_dir = tmp_path / InternshipIndexManager.SNAPSHOT_DIR
+        manifest = json.loads((snapshot_dir / InternshipIndexManager.SNAPSHOT_POINTER).read_text())
+        np.save(snapshot_dir / manifest["directory"] / "stipend.npy", np.zeros(4, dtype='float32'))
+        
+        restored = InternshipIndexManager(engine.embedding_dim, tmp_path)
+        assert not restored.load_from_disk()
+        assert restored.total_internships == 0
+    
+    @pytest.mark.asyncio
+    async def test_snapshot_is_memory_mapped(self, tmp_path):
+        """Loaded columns and records are read from shared read-only mappings"""
+        engine = await build_test_engine(make_internships(5), tmp_path)
+        restored = InternshipIndexManager(engine.embedding_dim, tmp_path)
+        assert restored.load_from_disk()
+        
+        snapshot = restored.snapshot
+        assert isinstance(snapshot.skill_matrix, np.memmap)
+        assert not snapshot.skill_matrix.flags.writeable
+        assert snapshot.internship_data["int_002"] == engine._index_manager.internship_data["int_002"]
+        assert len(snapshot.internship_data) == 5
+        np.testing.assert_array_equal(snapshot.internship_vectors["int_003"]["skill_vector"], snapshot.skill_matrix[3:4])
+    
+    @pytest.mark.asyncio
+    async def test_changes_over_mapped_snapshot_decode_only_changed_records(self, tmp_path, monkeypatch):
+        """Incremental updates keep unchanged mapped records undecoded and match a full rebuild"""
+        internships = make_internships(8)
+        engine = await build_test_engine(internships, tmp_path / "mapped")
+        restored = InternshipIndexManager(engine.embedding_dim, tmp_path / "mapped")
+        assert restored.load_from_disk()
+        
+        decoded = []
+        get_record = MappedRecords.__getitem__
+        monkeypatch.setattr(MappedRecords, "__getitem__", lambda self, key: decoded.append(key) or get_record(self, key))
+        
+        updated = dict(internships[2], stipend=55000, city="Pune", updated_at=datetime(2026, 3, 1))
+        ids, data, vectors = await engine._prepare_internship_rows([updated] + make_internships(9)[8:])
+        assert restored.apply_changes({id_: (data[id_], vectors[id_]) for id_ in ids}, {"int_005"})
+        assert sorted(decoded) == ["int_002", "int_005"]  # Identity shares of the replaced rows
+        
+        final = [doc for doc in internships if doc["_id"] != "int_005"]
+        final[2] = updated
+        rebuilt = (await build_test_engine(final + make_internships(9)[8:], tmp_path / "rebuilt"))._index_manager
+        assert restored.internship_ids == rebuilt.internship_ids
+        assert restored.catalogue_id == rebuilt.catalogue_id
+        assert dict(restored.internship_data) == dict(rebuilt.internship_data)
+        np.testing.assert_array_equal(restored.has_data, rebuilt.has_data)
+        np.testing.assert_allclose(restored.snapshot.stipend_values, rebuilt.snapshot.stipend_values)
+        for facet in rebuilt.FILTER_FACETS:
+            assert [restored.facet_vocab[facet][c] for c in restored.facet_codes[facet]] == \
+                [rebuilt.facet_vocab[facet][c] for c in rebuilt.facet_codes[facet]]
+        
+        # Unchanged records are written back as the mapped bytes
+        decoded.clear()
+        assert restored.save_to_disk()
+        assert decoded == []
+        reloaded = InternshipIndexManager(engine.embedding_dim, tmp_path / "mapped")
+        assert reloaded.load_from_disk()
+        assert dict(reloaded.internship_data) == dict(rebuilt.internship_data)
+        assert reloaded.catalogue_id == rebuilt.catalogue_id
+    
+    @pytest.mark.skipif(fcntl is None, reason="builder election needs fcntl")
+    @pytest.mark.asyncio
+    async def test_single_builder_publishes_to_followers(self, tmp_path):
+        """Only the lock holder saves; followers remap new versions and can take over"""
+        engine = await build_test_engine(make_internships(4), tmp_path)
+        builder = engine._index_manager
+        assert builder.acquire_builder_lock()
+        
+        follower = InternshipIndexManager(engine.embedding_dim, tmp_path)
+        assert not follower.acquire_builder_lock()
+        assert follower.load_from_disk()
+        assert not follower.save_to_disk()
+        assert not follower.reload_if_changed()
+        
+        ids, data, vectors = await engine._prepare_internship_rows(make_internships(6)[4:])
+        assert builder.apply_changes({id_: (data[id_], vectors[id_]) for id_ in ids}, set())
+        assert builder.save_to_disk()
+        
+        assert follower.reload_if_changed()
+        assert follower.catalogue_version == builder.catalogue_version
+        assert follower.total_internships == 6
+        
+        builder.release_builder_lock()
+        assert follower.acquire_builder_lock()
+        follower.release_builder_lock()
+
+
+class TestWeightsRegistry:
+    """Test hot-reloadable scoring weights"""
+    
+    @pytest.fixture
+    def sources(self, tmp_path):
+        return (
+            ("feedback", tmp_path / "feedback_adjusted_weights.json", "weights"),
+            ("trained", tmp_path / "trained_weights.json", "final_weights"),
+        )
+    
+    def test_reloads_only_on_change(self, sources):
+        """Files are parsed when they change, feedback weights win over trained ones"""
+        registry = WeightsRegistry({"skills": 0.5, "location": 0.2, "stipend": 0.15, "timeline": 0.15}, 0, sources)
+        assert registry.get().version == "default"
+        
+        trained = {"skills": 0.4, "location": 0.3, "stipend": 0.2, "timeline": 0.1}
+        sources[1][1].write_text(json.dumps({"final_weights": trained}))
+        assert registry.reload_if_changed()
+        assert registry.current.source == "trained" and registry.current.weights == trained
+        assert not registry.reload_if_changed()
+        
+        feedback = {"skills": 0.6, "location": 0.2, "stipend": 0.1, "timeline": 0.1}
+        sources[0][1].write_text(json.dumps({"weights": feedback, "version": "iter_7"}))
+        assert registry.get().version == "feedback:iter_7"
+        assert registry.current.weights == feedback
+        
+        sources[0][1].write_text('{"weights": {"skills": 0.6')
+        registry._fingerprint = None
+        assert not registry.reload_if_changed()
+        assert registry.current.version == "feedback:iter_7"
+    
+    def test_check_interval_and_publish(self, sources):
+        """Within the interval no files are read; publish swaps immediately"""
+        registry = WeightsRegistry({"skills": 0.5, "location": 0.2, "stipend": 0.15, "timeline": 0.15}, 3600, sources)
+        assert registry.get().version == "default"
+        
+        sources[0][1].write_text(json.dumps({"weights": {"skills": 0.7, "location": 0.1, "stipend": 0.1, "timeline": 0.1}}))
+        assert registry.get().version == "default"
+        
+        published = registry.publish({"skills": 0.3, "location": 0.3, "stipend": 0.2, "timeline": 0.2}, "v2")
+        assert registry.get() is published and published.version == "published:v2"
+        with pytest.raises(ValueError):
+            registry.publish({"skills": 1.0})
+    
+    @pytest.mark.asyncio
+    async def test_recommendations_report_weights_version(self, tmp_path):
+        """Every recommendation records the weights version used to score it"""
+        engine = await build_test_engine(make_internships(6), tmp_path)
+        engine.config.MIN_MATCH_THRESHOLD = 0.0
+        version = engine.publish_weights({"skills": 0.7, "location": 0.1, "stipend": 0.1, "timeline": 0.1}, "test")
+        student = User.model_construct(email="w@example.com", skills=[SkillItem(name="SQL", level="Advanced")])
+        
+        recs = await engine.get_recommendations_for_student(student, top_k=3, include_explanations=False)
+        assert recs and all(rec["weights_version"] == version for rec in recs)
+
+
 class TestWeightLearning:
     """Test weight learning functionality"""
     
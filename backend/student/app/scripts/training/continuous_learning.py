@@ -4,6 +4,7 @@ Continuous learning pipeline that processes user feedback
 and updates the recommendation model weights
 """
 import json
+import os
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
@@ -273,12 +274,16 @@ class FeedbackProcessor:
         # Save weights
         weights_data = {
             'weights': weights,
+            'version': iteration.iteration_id,
             'updated_at': datetime.utcnow().isoformat(),
             'iteration_id': iteration.iteration_id
         }
         
-        with open(FEEDBACK_WEIGHTS_PATH, 'w') as f:
+        # Replace atomically: serving engines hot-reload this file when it changes
+        tmp_path = FEEDBACK_WEIGHTS_PATH.with_name(FEEDBACK_WEIGHTS_PATH.name + '.tmp')
+        with open(tmp_path, 'w') as f:
             json.dump(weights_data, f, indent=2)
+        os.replace(tmp_path, FEEDBACK_WEIGHTS_PATH)
         
         # Append to learning history
         history = []
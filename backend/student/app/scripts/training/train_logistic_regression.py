@@ -15,6 +15,7 @@ Features:
 """
 
 import json
+import sys
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -111,6 +112,10 @@ class LogisticTrainingConfig:
     balance_classes: bool = True
     positive_class_weight: float = 2.0
     
+    # Semantic skill matching (shares the recommendation engine's skill graph)
+    use_skill_graph: bool = True
+    skill_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    
     # Features to include
     include_features: List[str] = field(default_factory=lambda: [
         "skill_similarity",
@@ -151,7 +156,33 @@ class LogisticFineTuner:
         self.X_test = None
         self.y_test = None
         self.X_features = None
+        self.skill_manager = None
+        
+    def load_skill_manager(self, students: List[Dict], internships: List[Dict]):
+        """
+        Load the recommendation engine's skill matcher and add every skill in
+        the dataset to its similarity graph (one batched encode).
+        Falls back to exact skill matching if the engine can't be loaded.
+        """
+        if not self.config.use_skill_graph:
+            return
         
+        try:
+            if self.skill_manager is None:
+                sys.path.insert(0, str(PROJECT_ROOT))
+                from sentence_transformers import SentenceTransformer
+                from app.services.recommendation_engine import SkillSignatureManager
+                
+                self.skill_manager = SkillSignatureManager(SentenceTransformer(self.config.skill_model_name))
+            
+            skills = [s["name"] if isinstance(s, dict) else s for student in students for s in student.get("skills", [])]
+            skills.extend(s for internship in internships for s in internship.get("skills", []))
+            self.skill_manager.graph.add(skills)
+            logger.info(f"Skill graph: {self.skill_manager.graph.size} skills, {self.skill_manager.graph.edge_count} edges")
+        except Exception as e:
+            logger.warning(f"Skill graph unavailable, using exact skill matches only: {e}")
+            self.config.use_skill_graph = False
+    
     def load_training_data(self) -> Tuple[List[Dict], List[Dict], List[Dict]]:
         """Load training data from synthetic dataset"""
         logger.info("Loading training data...")
@@ -320,8 +351,13 @@ class LogisticFineTuner:
         
         exact_matches = student_skills.intersection(internship_skills)
         features["skill_exact_matches"] = len(exact_matches)
-        features["skill_partial_matches"] = max(0, len(student_skills) + len(internship_skills) - 2 * len(exact_matches)) / 10
-        features["missing_skills_ratio"] = 1.0 - (len(exact_matches) / max(1, len(internship_skills)))
+        if self.skill_manager is not None:
+            skill_matches = self.skill_manager.find_skill_matches(list(student_skills), list(internship_skills))
+            features["skill_partial_matches"] = len(skill_matches["semantic_matches"]) / 10
+            features["missing_skills_ratio"] = len(skill_matches["missing_skills"]) / max(1, len(internship_skills))
+        else:
+            features["skill_partial_matches"] = max(0, len(student_skills) + len(internship_skills) - 2 * len(exact_matches)) / 10
+            features["missing_skills_ratio"] = 1.0 - (len(exact_matches) / max(1, len(internship_skills)))
         
         # 7. Premium/bonus features
         features["premium_stipend_bonus"] = 1.0 if stipend >= 25000 else 0.0
@@ -352,6 +388,7 @@ class LogisticFineTuner:
     ) -> Tuple[np.ndarray, np.ndarray, List[Dict]]:
         """Create feature matrix and labels from data"""
         logger.info("Creating feature dataset...")
+        self.load_skill_manager(students, internships)
         
         student_lookup = {s["id"]: s for s in students}
         internship_lookup = {i["id"]: i for i in internships}
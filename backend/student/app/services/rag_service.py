@@ -3,17 +3,22 @@ import faiss
 import numpy as np
 import logging
 from typing import List, Dict, Optional, Tuple
-from sentence_transformers import SentenceTransformer
 import pickle
 from pathlib import Path
 import google.generativeai as genai
 from app.config import settings
+from app.services.sentence_encoder import load_sentence_encoder
 
 logger = logging.getLogger(__name__)
 
 class RAGService:
     def __init__(self, model_name: str = 'all-MiniLM-L6-v2', index_path: str = "rag_index.faiss"):
-        self.model = SentenceTransformer(model_name)
+        self.model = load_sentence_encoder(
+            model_name,
+            backend=settings.EMBEDDING_BACKEND,
+            cache_dir=settings.EMBEDDING_ONNX_CACHE_DIR,
+            quantize=settings.EMBEDDING_ONNX_QUANTIZE
+        )
         self.index: Optional[faiss.Index] = None
         self.documents: List[str] = []
         self.index_path = Path(index_path)
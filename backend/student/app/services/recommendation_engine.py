@@ -15,24 +15,51 @@ Author: Yuva Setu Team
 """
 
 import numpy as np
-from typing import List, Dict, Any, Optional, Set, Tuple, Union
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Any, Optional, Set, Tuple, Union, Callable, TYPE_CHECKING
 import faiss
 import logging
 from datetime import datetime, timedelta
 import asyncio
 import json
+import gzip
 import hashlib
 from pathlib import Path
-from collections import OrderedDict
+from collections.abc import Mapping
+from functools import cached_property
 from concurrent.futures import ThreadPoolExecutor
 import threading
+import time
+import shutil
+import dataclasses
 from dataclasses import dataclass, field
 from enum import Enum
 import tempfile
 import os
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process builder election
+    fcntl = None
+
+try:
+    import redis
+except ImportError:  # Only needed for STUDENT_VECTOR_STORE = "redis"
+    redis = None
+
 from app.models.user import User
+from app.services.embedding_batcher import EmbeddingQueueFullError, MicroBatchEncoder
+from app.services.sentence_encoder import load_sentence_encoder
+from app.utils.cache import (
+    ShardedTTLCache,
+    VectorStore,
+    SQLiteVectorStore,
+    RedisVectorStore,
+    pack_vectors,
+    unpack_vectors,
+)
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 from app.database.multi_cluster import get_employer_database
 
 logger = logging.getLogger(__name__)
@@ -185,84 +212,305 @@ class MatchExplanation:
 
 
 # ============================================================================
-# LRU CACHE
+# SKILL VOCABULARY
 # ============================================================================
 
-class LRUCache:
-    """Thread-safe LRU cache with TTL support"""
+class SkillVocabulary:
+    """
+    Persistent skill vocabulary: normalized skill string -> integer id, with
+    the L2-normalized embedding of skill id i in row i of a float32 matrix.
+    
+    Unknown skills are encoded in one batched model call and appended, so
+    every skill is encoded once per vocabulary file rather than once per
+    process. The whole vocabulary is saved as a single .npz file.
+    
+    On the event loop, ensure_async() sends small batches through encoder
+    (the engine's micro-batcher) when one is set, so concurrent requests
+    share model calls. ensure() runs in pool threads and calls the model
+    directly rather than parking the thread on a batch window. Appending
+    never writes the file: the engine saves it from a background task every
+    SAVE_INTERVAL_SECONDS.
+    """
     
-    def __init__(self, max_size: int = 500):
-        self.max_size = max_size
-        self.cache: OrderedDict = OrderedDict()
-        self.timestamps: Dict[str, datetime] = {}
-        self.ttls: Dict[str, timedelta] = {}
+    SAVE_INTERVAL_SECONDS = 60
+    
+    def __init__(
+        self,
+        model: "SentenceTransformer",
+        path: Optional[Path] = None,
+        batch_size: int = 32
+    ):
+        self.model = model
+        self.path = path
+        self.batch_size = batch_size
+        self._ids: Dict[str, int] = {}
+        self._skills: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
         self._lock = threading.Lock()
+        self._dirty = False
+        self.encoder: Optional[MicroBatchEncoder] = None
+    
+    @staticmethod
+    def normalize(skill: str) -> str:
+        return skill.lower().strip()
+    
+    def __len__(self) -> int:
+        return len(self._skills)
+    
+    def __contains__(self, skill: str) -> bool:
+        return self.normalize(skill) in self._ids
+    
+    def get_id(self, skill: str) -> Optional[int]:
+        return self._ids.get(self.normalize(skill))
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get item from cache if valid"""
+    def skill(self, skill_id: int) -> str:
+        return self._skills[skill_id]
+    
+    def ensure(self, skills: List[str]) -> List[int]:
+        """
+        Ids for the given skills (normalized, blanks skipped, order kept),
+        encoding any unknown skills in a single batch.
+        """
+        normalized = [self.normalize(s) for s in skills if isinstance(s, str) and s.strip()]
+        
         with self._lock:
-            if key not in self.cache:
-                return None
+            missing = list(dict.fromkeys(s for s in normalized if s not in self._ids))
+        
+        if missing:
+            self._append_encoded(missing, self._encode(missing))
+        
+        return [self._ids[s] for s in normalized]
+    
+    async def ensure_async(self, skills: List[str]):
+        """
+        Add unknown skills from the event loop. Small batches are encoded
+        through the micro-batcher; bulk batches (or a full queue) are encoded
+        directly in the thread pool.
+        """
+        normalized = [self.normalize(s) for s in skills if isinstance(s, str) and s.strip()]
+        
+        with self._lock:
+            missing = list(dict.fromkeys(s for s in normalized if s not in self._ids))
+        if not missing:
+            return
+        
+        encoded = None
+        encoder = self.encoder
+        if encoder is not None and len(missing) <= encoder.max_batch_size:
+            try:
+                vectors = await asyncio.gather(*(encoder.encode_async(skill) for skill in missing))
+                encoded = np.stack(vectors).astype('float32')
+            except EmbeddingQueueFullError:
+                logger.debug("Encode queue full, encoding skills directly")
+        
+        if encoded is None:
+            loop = asyncio.get_event_loop()
+            encoded = await loop.run_in_executor(_thread_pool, self._encode, missing)
+        self._append_encoded(missing, encoded)
+    
+    def _append_encoded(self, skills: List[str], encoded: np.ndarray):
+        norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self._append(skills, encoded / norms)
+    
+    def _encode(self, skills: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(
+            skills,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ), dtype='float32').reshape(len(skills), -1)
+    
+    def _append(self, skills: List[str], vectors: np.ndarray):
+        with self._lock:
+            new = [(s, v) for s, v in zip(skills, vectors) if s not in self._ids]
+            if not new:
+                return
             
-            # Check TTL
-            if key in self.timestamps and key in self.ttls:
-                if datetime.utcnow() > self.timestamps[key] + self.ttls[key]:
-                    # Expired
-                    del self.cache[key]
-                    del self.timestamps[key]
-                    del self.ttls[key]
-                    return None
+            size = len(self._skills)
+            if self._matrix is None:
+                self._matrix = np.zeros((max(len(new), 256), vectors.shape[1]), dtype='float32')
+            elif size + len(new) > len(self._matrix):
+                grown = np.zeros((max(size + len(new), 2 * len(self._matrix)), self._matrix.shape[1]), dtype='float32')
+                grown[:size] = self._matrix[:size]
+                self._matrix = grown
             
-            # Move to end (most recently used)
-            self.cache.move_to_end(key)
-            return self.cache[key]
+            for offset, (skill, vector) in enumerate(new):
+                self._matrix[size + offset] = vector
+                self._ids[skill] = size + offset
+                self._skills.append(skill)
+            self._dirty = True
     
-    def set(self, key: str, value: Any, ttl_hours: int = 24):
-        """Set item in cache with TTL"""
-        with self._lock:
-            if key in self.cache:
-                self.cache.move_to_end(key)
-            else:
-                if len(self.cache) >= self.max_size:
-                    # Remove oldest
-                    oldest_key = next(iter(self.cache))
-                    del self.cache[oldest_key]
-                    self.timestamps.pop(oldest_key, None)
-                    self.ttls.pop(oldest_key, None)
-            
-            self.cache[key] = value
-            self.timestamps[key] = datetime.utcnow()
-            self.ttls[key] = timedelta(hours=ttl_hours)
-    
-    def is_valid(self, key: str) -> bool:
-        """Check if key exists and is valid"""
+    def vectors(self, ids: List[int]) -> np.ndarray:
+        """Embedding rows for skill ids (a copy, safe against concurrent growth)"""
         with self._lock:
-            if key not in self.cache:
+            if self._matrix is None or not ids:
+                dim = self._matrix.shape[1] if self._matrix is not None else 0
+                return np.zeros((0, dim), dtype='float32')
+            return self._matrix[np.asarray(ids, dtype=np.int64)]
+    
+    def lookup(self, skills: List[str]) -> Dict[str, np.ndarray]:
+        """Normalized skill -> embedding for a list of skills"""
+        normalized = list(dict.fromkeys(self.normalize(s) for s in skills if s and s.strip()))
+        ids = self.ensure(normalized)
+        return dict(zip(normalized, self.vectors(ids)))
+    
+    def save(self) -> bool:
+        """Write the vocabulary if it changed since the last save"""
+        if self.path is None or not self._dirty:
+            return False
+        
+        try:
+            with self._lock:
+                skills = np.array(self._skills, dtype=str)
+                matrix = self._matrix[:len(self._skills)].copy()
+                self._dirty = False
+            
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, skills=skills, vectors=matrix)
+            os.replace(tmp_path, self.path)
+            
+            logger.info(f"✅ Saved skill vocabulary ({len(skills)} skills)")
+            return True
+        
+        except Exception as e:
+            logger.warning(f"Failed to save skill vocabulary: {e}")
+            return False
+    
+    def load(self, embedding_dim: int) -> bool:
+        """Load a saved vocabulary; ignored if its dimension does not match the model"""
+        if self.path is None or not self.path.exists():
+            return False
+        
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                skills = [str(s) for s in stored["skills"]]
+                matrix = np.asarray(stored["vectors"], dtype='float32')
+            
+            if matrix.ndim != 2 or matrix.shape[1] != embedding_dim or len(skills) != len(matrix):
+                logger.warning("Skill vocabulary does not match the current model, ignoring it")
                 return False
             
-            if key in self.timestamps and key in self.ttls:
-                return datetime.utcnow() < self.timestamps[key] + self.ttls[key]
+            with self._lock:
+                self._ids = {}
+                self._skills = []
+                self._matrix = None
+            self._append(skills, matrix)
+            self._dirty = False
             
+            logger.info(f"✅ Loaded skill vocabulary ({len(skills)} skills)")
             return True
+        
+        except Exception as e:
+            logger.warning(f"Failed to load skill vocabulary: {e}")
+            return False
+
+
+# ============================================================================
+# SKILL SIMILARITY GRAPH
+# ============================================================================
+
+class SkillSimilarityGraph:
+    """
+    Sparse skill-to-skill similarity graph over a SkillVocabulary.
     
-    def invalidate(self, key: str):
-        """Remove item from cache"""
-        with self._lock:
-            self.cache.pop(key, None)
-            self.timestamps.pop(key, None)
-            self.ttls.pop(key, None)
+    Each skill id maps to its neighbours whose cosine similarity is above the
+    threshold, so semantic skill matching is a dict lookup instead of an
+    embedding comparison. New vocabulary skills are linked incrementally by
+    comparing only them against the existing skills.
+    """
     
-    def clear(self):
-        """Clear entire cache"""
-        with self._lock:
-            self.cache.clear()
-            self.timestamps.clear()
-            self.ttls.clear()
+    BLOCK_SIZE = 1024
+    
+    def __init__(self, vocabulary: SkillVocabulary, threshold: float):
+        self.vocabulary = vocabulary
+        self.threshold = threshold
+        self._edges: List[Dict[int, float]] = []
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def categorize(similarity: float) -> str:
+        """Categorize match type based on similarity score"""
+        if similarity >= 0.95:
+            return SkillMatchType.EXACT.value
+        elif similarity >= 0.85:
+            return SkillMatchType.SEMANTIC.value
+        elif similarity >= 0.75:
+            return SkillMatchType.RELATED.value
+        else:
+            return SkillMatchType.TRANSFERABLE.value
     
+    @property
     def size(self) -> int:
-        """Get current cache size"""
+        return len(self._edges)
+    
+    @property
+    def edge_count(self) -> int:
+        return sum(len(neighbours) for neighbours in self._edges) // 2
+    
+    def update(self) -> int:
+        """Link vocabulary skills added since the last update; returns how many"""
         with self._lock:
-            return len(self.cache)
+            start = len(self._edges)
+            end = len(self.vocabulary)
+            if end <= start:
+                return 0
+            
+            self._edges.extend({} for _ in range(end - start))
+            known = self.vocabulary.vectors(list(range(end)))
+            
+            # Each new skill is compared with every skill up to itself, so
+            # every pair is scored exactly once
+            for block_start in range(start, end, self.BLOCK_SIZE):
+                block_end = min(block_start + self.BLOCK_SIZE, end)
+                similarities = known[block_start:block_end] @ known[:block_end].T
+                rows, cols = np.nonzero(similarities > self.threshold)
+                
+                for row, col in zip(rows.tolist(), cols.tolist()):
+                    skill_id = block_start + row
+                    if col >= skill_id:
+                        continue
+                    similarity = float(similarities[row, col])
+                    self._edges[skill_id][col] = similarity
+                    self._edges[col][skill_id] = similarity
+            
+            return end - start
+    
+    def add(self, skills: List[str]) -> List[int]:
+        """Ensure skills are in the vocabulary and linked; returns their ids"""
+        ids = self.vocabulary.ensure(skills)
+        if len(self.vocabulary) > len(self._edges):
+            self.update()
+        return ids
+    
+    def get(self, required_skill: str, user_skill: str) -> Optional[float]:
+        """Similarity of two skills (0.0 if not neighbours), or None if either is unknown"""
+        required_id = self.vocabulary.get_id(required_skill)
+        user_id = self.vocabulary.get_id(user_skill)
+        if required_id is None or user_id is None or max(required_id, user_id) >= len(self._edges):
+            return None
+        if required_id == user_id:
+            return 1.0
+        return self._edges[required_id].get(user_id, 0.0)
+    
+    def neighbours(self, skill: str) -> List[Dict[str, Any]]:
+        """Neighbours of a skill, most similar first"""
+        skill_id = self.vocabulary.get_id(skill)
+        if skill_id is None or skill_id >= len(self._edges):
+            return []
+        
+        return [
+            {
+                "skill": self.vocabulary.skill(neighbour_id),
+                "similarity": round(similarity, 3),
+                "match_type": self.categorize(similarity)
+            }
+            for neighbour_id, similarity in sorted(
+                self._edges[skill_id].items(), key=lambda item: item[1], reverse=True
+            )
+        ]
 
 
 # ============================================================================
@@ -273,13 +521,15 @@ class SkillSignatureManager:
     """
     Manages skill signatures to detect meaningful changes vs enhancements.
     Uses semantic similarity to determine if new skills are similar to existing ones.
+    Skill embeddings come from a shared SkillVocabulary and semantic matches
+    from the SkillSimilarityGraph built over it.
     """
     
-    def __init__(self, model: SentenceTransformer, config = None):
+    def __init__(self, model: "SentenceTransformer", config = None, vocabulary: Optional[SkillVocabulary] = None):
         self.model = model
         self.config = config or _load_recommendation_config()
-        self._skill_embeddings_cache: Dict[str, np.ndarray] = {}
-        self._lock = threading.Lock()
+        self.vocabulary = vocabulary or SkillVocabulary(model, batch_size=self.config.BATCH_ENCODING_SIZE)
+        self.graph = SkillSimilarityGraph(self.vocabulary, self.config.SKILL_SIMILARITY_THRESHOLD)
     
     def compute_skill_signature(self, skills: List[str]) -> str:
         """Compute a hash signature for a set of skills"""
@@ -290,49 +540,27 @@ class SkillSignatureManager:
         signature_str = "|".join(normalized)
         return hashlib.md5(signature_str.encode()).hexdigest()
     
-    def _get_skill_embedding(self, skill: str) -> np.ndarray:
-        """Get or compute embedding for a single skill"""
-        skill_lower = skill.lower().strip()
-        
-        with self._lock:
-            if skill_lower in self._skill_embeddings_cache:
-                return self._skill_embeddings_cache[skill_lower]
-        
-        # Compute embedding
-        embedding = self.model.encode(skill_lower, convert_to_numpy=True)
-        
-        with self._lock:
-            # Limit cache size
-            if len(self._skill_embeddings_cache) > self.config.SKILL_EMBEDDING_CACHE_SIZE:
-                # Remove oldest entries
-                keys_to_remove = list(self._skill_embeddings_cache.keys())[:1000]
-                for k in keys_to_remove:
-                    del self._skill_embeddings_cache[k]
-            
-            self._skill_embeddings_cache[skill_lower] = embedding
-        
-        return embedding
-    
     def compute_skill_similarity(self, skill1: str, skill2: str) -> float:
         """Compute semantic similarity between two skills"""
         try:
-            emb1 = self._get_skill_embedding(skill1)
-            emb2 = self._get_skill_embedding(skill2)
+            emb1, emb2 = self.vocabulary.vectors(self.vocabulary.ensure([skill1, skill2]))
             
-            # Cosine similarity
-            similarity = np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
-            return float(similarity)
+            # Cosine similarity (vocabulary embeddings are normalized)
+            return float(np.dot(emb1, emb2))
         except Exception:
             return 0.0
     
     def find_skill_matches(
         self,
         user_skills: List[str],
-        required_skills: List[str]
+        required_skills: List[str],
+        similarity_lookup: Optional[SkillSimilarityGraph] = None
     ) -> Dict[str, Any]:
         """
         Find matches between user skills and required skills.
         Returns detailed matching information including semantic matches.
+        Semantic matches come from the skill graph (similarity_lookup, if
+        passed, must already contain the skills).
         """
         if not user_skills or not required_skills:
             return {
@@ -353,6 +581,10 @@ class SkillSignatureManager:
         remaining_required = required_set - exact_matches
         remaining_user = user_set - exact_matches
         
+        if similarity_lookup is None and remaining_required and remaining_user:
+            self.graph.add(list(remaining_user) + list(remaining_required))
+            similarity_lookup = self.graph
+        
         semantic_matches = []
         matched_required = set()
         matched_user = set()
@@ -365,7 +597,9 @@ class SkillSignatureManager:
                 if user_skill in matched_user:
                     continue
                 
-                similarity = self.compute_skill_similarity(req_skill, user_skill)
+                similarity = similarity_lookup.get(req_skill, user_skill) if similarity_lookup else None
+                if similarity is None:
+                    similarity = self.compute_skill_similarity(req_skill, user_skill)
                 
                 if similarity > self.config.SKILL_SIMILARITY_THRESHOLD and similarity > best_score:
                     best_match = user_skill
@@ -405,14 +639,7 @@ class SkillSignatureManager:
     
     def _categorize_match(self, similarity: float) -> str:
         """Categorize match type based on similarity score"""
-        if similarity >= 0.95:
-            return SkillMatchType.EXACT.value
-        elif similarity >= 0.85:
-            return SkillMatchType.SEMANTIC.value
-        elif similarity >= 0.75:
-            return SkillMatchType.RELATED.value
-        else:
-            return SkillMatchType.TRANSFERABLE.value
+        return SkillSimilarityGraph.categorize(similarity)
     
     def are_skills_enhancement(
         self,
@@ -443,38 +670,20 @@ class SkillSignatureManager:
         if not only_in_new:
             return True, 1.0, []
         
-        # Get embeddings for old skills
-        old_embeddings = []
-        for skill in old_set:
-            try:
-                old_embeddings.append(self._get_skill_embedding(skill))
-            except Exception:
-                continue
-        
-        if not old_embeddings:
+        try:
+            old_matrix = self.vocabulary.vectors(self.vocabulary.ensure(list(old_set)))
+            new_list = list(only_in_new)
+            new_matrix = self.vocabulary.vectors(self.vocabulary.ensure(new_list))
+        except Exception:
             return False, 0.0, list(only_in_new)
         
-        old_matrix = np.vstack(old_embeddings)
-        
-        # Check each new skill
-        different_skills = []
-        total_similarity = 0.0
-        
-        for new_skill in only_in_new:
-            try:
-                new_emb = self._get_skill_embedding(new_skill)
-                
-                # Compute similarities with all old skills
-                similarities = np.dot(old_matrix, new_emb) / (
-                    np.linalg.norm(old_matrix, axis=1) * np.linalg.norm(new_emb)
-                )
-                max_sim = float(np.max(similarities))
-                total_similarity += max_sim
-                
-                if max_sim < self.config.SKILL_SIMILARITY_THRESHOLD:
-                    different_skills.append(new_skill)
-            except Exception:
-                different_skills.append(new_skill)
+        # Best similarity of each new skill against all old skills in one product
+        max_similarities = (new_matrix @ old_matrix.T).max(axis=1)
+        different_skills = [
+            skill for skill, max_sim in zip(new_list, max_similarities)
+            if max_sim < self.config.SKILL_SIMILARITY_THRESHOLD
+        ]
+        total_similarity = float(max_similarities.sum())
         
         avg_similarity = total_similarity / len(only_in_new) if only_in_new else 1.0
         
@@ -492,12 +701,24 @@ class SkillSignatureManager:
 class StudentProfileCache:
     """
     Manages student profile caching with smart invalidation based on skill changes.
+    
+    Vectors live in an in-process cache (L1). An optional shared store (L2),
+    keyed by user id plus a hash of the full profile, lets other workers and
+    restarted processes reuse them without re-encoding.
     """
     
-    def __init__(self, skill_manager: SkillSignatureManager, config = None):
+    def __init__(self, skill_manager: SkillSignatureManager, config = None, shared_store: Optional[VectorStore] = None):
         self.skill_manager = skill_manager
         self.config = config or _load_recommendation_config()
-        self.embedding_cache = LRUCache(max_size=self.config.MAX_STUDENT_CACHE_SIZE)
+        self.shared_store = shared_store
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.embedding_cache = ShardedTTLCache(
+            max_bytes=self.config.STUDENT_CACHE_MAX_MB * 1024 * 1024,
+            shards=self.config.CACHE_SHARDS,
+            default_ttl_seconds=self.config.STUDENT_CACHE_TTL_HOURS * 3600,
+            name="student_vectors"
+        )
         self.profile_signatures: Dict[str, Dict] = {}
         self._lock = threading.Lock()
     
@@ -617,8 +838,46 @@ class StudentProfileCache:
             self.invalidate(user_id)
             return None
     
-    def store_vectors(self, user: User, vectors: Dict[str, np.ndarray], profile_data: Dict):
-        """Store vectors with profile signature"""
+    @staticmethod
+    def _shared_key(user_id: str, profile_data: Dict) -> str:
+        """L2 key: user id plus a hash of everything the vectors are built from"""
+        data_str = json.dumps(profile_data, sort_keys=True, default=str)
+        return f"{user_id}:{hashlib.md5(data_str.encode()).hexdigest()}"
+    
+    def get_shared_vectors(self, user: User, profile_data: Dict) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Look the profile up in the shared store and promote a hit to L1.
+        Blocking I/O: run it in the thread pool.
+        """
+        if self.shared_store is None:
+            return None
+        
+        try:
+            data = self.shared_store.get(self._shared_key(str(user.id), profile_data))
+        except Exception as e:
+            logger.warning(f"Shared vector store read failed: {e}")
+            return None
+        
+        if data is None:
+            self.shared_misses += 1
+            return None
+        
+        self.shared_hits += 1
+        vectors = unpack_vectors(data)
+        self.store_vectors(user, vectors, profile_data, share=False)
+        return vectors
+    
+    def store_vectors(
+        self,
+        user: User,
+        vectors: Dict[str, np.ndarray],
+        profile_data: Dict,
+        share: bool = True
+    ):
+        """
+        Store vectors with profile signature, and in the shared store unless
+        share is False. With a shared store this does blocking I/O.
+        """
         user_id = str(user.id)
         
         with self._lock:
@@ -628,223 +887,308 @@ class StudentProfileCache:
                 "timestamp": datetime.utcnow().isoformat()
             }
         
-        self.embedding_cache.set(user_id, vectors, ttl_hours=self.config.STUDENT_CACHE_TTL_HOURS)
+        self.embedding_cache.set(user_id, vectors)
+        
+        if share and self.shared_store is not None:
+            try:
+                self.shared_store.set(
+                    self._shared_key(user_id, profile_data),
+                    pack_vectors(vectors),
+                    self.config.STUDENT_VECTOR_STORE_TTL_HOURS * 3600
+                )
+            except Exception as e:
+                logger.warning(f"Shared vector store write failed: {e}")
     
-    def invalidate(self, user_id: str):
-        """Invalidate cache for a user"""
+    def invalidate(self, user_id: str, shared: bool = False):
+        """Invalidate cache for a user (and their shared entries if shared is True)"""
         self.embedding_cache.invalidate(user_id)
         with self._lock:
             self.profile_signatures.pop(user_id, None)
+        
+        if shared and self.shared_store is not None:
+            try:
+                self.shared_store.delete_prefix(f"{user_id}:")
+            except Exception as e:
+                logger.warning(f"Shared vector store delete failed: {e}")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         with self._lock:
-            return {
-                "cached_profiles": self.embedding_cache.size(),
-                "signatures_stored": len(self.profile_signatures)
+            signatures_stored = len(self.profile_signatures)
+        
+        return {
+            "cached_profiles": self.embedding_cache.size(),
+            "signatures_stored": signatures_stored,
+            "student_vectors": self.embedding_cache.get_stats(),
+            "shared_store": {
+                "backend": type(self.shared_store).__name__ if self.shared_store else None,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
             }
+        }
 
 
 # ============================================================================
 # INTERNSHIP INDEX MANAGER
 # ============================================================================
 
-class InternshipIndexManager:
+# Internship fields each filter depends on; rows are grouped by these values
+FILTER_FACETS: Dict[str, Tuple[str, ...]] = {
+    "location": ("location", "city", "state", "is_remote"),
+    "work_type": ("work_type", "is_remote"),
+    "duration": ("duration", "duration_months"),
+}
+
+
+class MappedRecords(Mapping):
     """
-    Manages FAISS indices with efficient updates and persistent caching.
+    Read-only id -> normalized record mapping over a memory-mapped record file.
+    
+    Records are stored back to back as extended JSON with an offsets table
+    (row i spans offsets[i]:offsets[i + 1]; empty means no data). Each lookup
+    decodes one record, so processes mapping the same file share its pages.
     """
     
-    def __init__(self, embedding_dim: int, cache_dir: Path):
-        self.embedding_dim = embedding_dim
-        self.cache_dir = cache_dir
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        # FAISS indices
-        self.skill_index: Optional[faiss.Index] = None
-        self.location_index: Optional[faiss.Index] = None
-        self.stipend_index: Optional[faiss.Index] = None
-        self.timeline_index: Optional[faiss.Index] = None
-        
-        # Data storage
-        self.internship_ids: List[str] = []
-        self.internship_data: Dict[str, Dict] = {}
-        self.internship_id_to_index: Dict[str, int] = {}
-        self.internship_vectors: Dict[str, Dict[str, np.ndarray]] = {}
-        
-        # State
-        self.last_build_time: Optional[datetime] = None
-        self.internship_count: int = 0
-        
-        self._lock = threading.Lock()
+    def __init__(self, id_to_index: Dict[str, int], offsets: np.ndarray, blob: np.ndarray):
+        self._id_to_index = id_to_index
+        self._offsets = offsets
+        self._blob = blob
     
-    def init_indices(self):
-        """Initialize empty FAISS indices"""
-        with self._lock:
-            self.skill_index = faiss.IndexFlatIP(self.embedding_dim)
-            self.location_index = faiss.IndexFlatIP(2)
-            self.stipend_index = faiss.IndexFlatIP(1)
-            self.timeline_index = faiss.IndexFlatIP(1)
-            
-            self.internship_ids = []
-            self.internship_data = {}
-            self.internship_id_to_index = {}
-            self.internship_vectors = {}
+    def __getitem__(self, internship_id: str) -> Dict:
+        from bson import json_util
+        
+        row = self._id_to_index.get(internship_id)
+        if row is None:
+            raise KeyError(internship_id)
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        if start == end:
+            raise KeyError(internship_id)
+        return json_util.loads(self._blob[start:end].tobytes())
     
-    def build_indices(
-        self,
-        skill_vectors: np.ndarray,
-        location_vectors: np.ndarray,
-        stipend_vectors: np.ndarray,
-        timeline_vectors: np.ndarray,
-        internship_ids: List[str],
-        internship_data: Dict[str, Dict],
-        internship_vectors: Dict[str, Dict[str, np.ndarray]]
-    ) -> bool:
-        """Build all indices from vectors"""
-        try:
-            with self._lock:
-                self.internship_ids = internship_ids
-                self.internship_data = internship_data
-                self.internship_id_to_index = {id_: i for i, id_ in enumerate(internship_ids)}
-                self.internship_vectors = internship_vectors
-                
-                # Normalize and add skill vectors
-                skill_vectors_norm = skill_vectors.copy()
-                faiss.normalize_L2(skill_vectors_norm)
-                
-                self.skill_index = faiss.IndexFlatIP(self.embedding_dim)
-                self.skill_index.add(skill_vectors_norm)
-                
-                # Location index (normalize)
-                self.location_index = faiss.IndexFlatIP(2)
-                loc_norm = location_vectors.copy()
-                norms = np.linalg.norm(loc_norm, axis=1, keepdims=True)
-                norms[norms == 0] = 1
-                loc_norm = loc_norm / norms
-                self.location_index.add(loc_norm.astype('float32'))
-                
-                # Stipend index
-                self.stipend_index = faiss.IndexFlatIP(1)
-                self.stipend_index.add(stipend_vectors.astype('float32'))
-                
-                # Timeline index
-                self.timeline_index = faiss.IndexFlatIP(1)
-                self.timeline_index.add(timeline_vectors.astype('float32'))
-                
-                self.last_build_time = datetime.utcnow()
-                self.internship_count = len(internship_ids)
-            
-            logger.info(f"✅ Indices built with {len(internship_ids)} internships")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to build indices: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            return False
+    def __contains__(self, internship_id: object) -> bool:
+        row = self._id_to_index.get(internship_id)
+        return row is not None and self._offsets[row + 1] > self._offsets[row]
     
-    def save_to_disk(self) -> bool:
-        """Save indices and metadata to disk"""
-        try:
-            index_dir = self.cache_dir / "indices"
-            index_dir.mkdir(parents=True, exist_ok=True)
-            
-            with self._lock:
-                if self.skill_index and self.skill_index.ntotal > 0:
-                    faiss.write_index(self.skill_index, str(index_dir / "skill.bin"))
-                if self.location_index and self.location_index.ntotal > 0:
-                    faiss.write_index(self.location_index, str(index_dir / "location.bin"))
-                if self.stipend_index and self.stipend_index.ntotal > 0:
-                    faiss.write_index(self.stipend_index, str(index_dir / "stipend.bin"))
-                if self.timeline_index and self.timeline_index.ntotal > 0:
-                    faiss.write_index(self.timeline_index, str(index_dir / "timeline.bin"))
-                
-                # Save metadata
-                metadata = {
-                    "internship_ids": self.internship_ids,
-                    "internship_id_to_index": self.internship_id_to_index,
-                    "last_build_time": self.last_build_time.isoformat() if self.last_build_time else None,
-                    "internship_count": self.internship_count,
-                    "embedding_dim": self.embedding_dim
-                }
-                
-                with open(self.cache_dir / "metadata.json", 'w') as f:
-                    json.dump(metadata, f)
-            
-            logger.info("✅ Saved indices to disk")
-            return True
-            
-        except Exception as e:
-            logger.warning(f"Failed to save indices: {e}")
-            return False
+    def __iter__(self):
+        for internship_id, row in self._id_to_index.items():
+            if self._offsets[row + 1] > self._offsets[row]:
+                yield internship_id
     
-    def load_from_disk(self) -> bool:
-        """Load indices from disk cache"""
-        try:
-            index_dir = self.cache_dir / "indices"
-            skill_path = index_dir / "skill.bin"
-            
-            if not skill_path.exists():
-                return False
-            
-            with self._lock:
-                self.skill_index = faiss.read_index(str(skill_path))
-                
-                location_path = index_dir / "location.bin"
-                if location_path.exists():
-                    self.location_index = faiss.read_index(str(location_path))
-                else:
-                    self.location_index = faiss.IndexFlatIP(2)
-                
-                stipend_path = index_dir / "stipend.bin"
-                if stipend_path.exists():
-                    self.stipend_index = faiss.read_index(str(stipend_path))
-                else:
-                    self.stipend_index = faiss.IndexFlatIP(1)
-                
-                timeline_path = index_dir / "timeline.bin"
-                if timeline_path.exists():
-                    self.timeline_index = faiss.read_index(str(timeline_path))
-                else:
-                    self.timeline_index = faiss.IndexFlatIP(1)
-                
-                # Load metadata
-                metadata_path = self.cache_dir / "metadata.json"
-                if metadata_path.exists():
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                    
-                    self.internship_ids = metadata.get("internship_ids", [])
-                    self.internship_id_to_index = {
-                        k: int(v) for k, v in metadata.get("internship_id_to_index", {}).items()
-                    }
-                    if metadata.get("last_build_time"):
-                        self.last_build_time = datetime.fromisoformat(metadata["last_build_time"])
-                    self.internship_count = metadata.get("internship_count", 0)
-            
-            logger.info(f"✅ Loaded indices from cache ({self.internship_count} internships)")
-            return True
-            
-        except Exception as e:
-            logger.warning(f"Failed to load indices: {e}")
-            return False
+    def __len__(self) -> int:
+        return int(np.count_nonzero(np.diff(self._offsets)))
     
-    def search(
-        self,
-        query_vector: np.ndarray,
-        index_type: str,
-        k: int
-    ) -> Tuple[np.ndarray, np.ndarray]:
-        """Search an index"""
-        index_map = {
-            "skill": self.skill_index,
-            "location": self.location_index,
-            "stipend": self.stipend_index,
-            "timeline": self.timeline_index
-        }
-        
-        index = index_map.get(index_type)
-        if index is None or index.ntotal == 0:
+    def raw(self, internship_id: str) -> bytes:
+        """Encoded record (b"" if absent), sliced from the file without decoding"""
+        row = self._id_to_index.get(internship_id)
+        if row is None:
+            return b""
+        return self._blob[int(self._offsets[row]):int(self._offsets[row + 1])].tobytes()
+
+
+class LayeredRecords(Mapping):
+    """
+    Id -> normalized record mapping of an incrementally updated snapshot.
+    
+    Records changed since the last full build or disk load sit in a small
+    dict over that build's mapping, so unchanged records are never copied or
+    decoded (a memory-mapped base stays shared). Only ids in members, the
+    snapshot's id -> row table, are visible.
+    """
+    
+    def __init__(self, base: Mapping, overrides: Dict[str, Dict], members: Mapping):
+        self._base = base
+        self._overrides = overrides
+        self._members = members
+    
+    @classmethod
+    def updated(
+        cls,
+        current: Mapping,
+        upserts: Dict[str, Dict],
+        removed_ids: Set[str],
+        members: Mapping
+    ) -> "LayeredRecords":
+        """current with upserts applied and removed_ids dropped; layers never nest"""
+        if isinstance(current, LayeredRecords):
+            base, overrides = current._base, dict(current._overrides)
+        else:
+            base, overrides = current, {}
+        for internship_id in removed_ids:
+            overrides.pop(internship_id, None)
+        overrides.update(upserts)
+        return cls(base, overrides, members)
+    
+    def __getitem__(self, internship_id: str) -> Dict:
+        if internship_id not in self._members:
+            raise KeyError(internship_id)
+        if internship_id in self._overrides:
+            return self._overrides[internship_id]
+        return self._base[internship_id]
+    
+    def __contains__(self, internship_id: object) -> bool:
+        return internship_id in self._members and (
+            internship_id in self._overrides or internship_id in self._base
+        )
+    
+    def __iter__(self):
+        for internship_id in self._members:
+            if internship_id in self:
+                yield internship_id
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def raw(self, internship_id: str) -> bytes:
+        """Encoded record (b"" if absent); unchanged mapped records are not decoded"""
+        if internship_id not in self._members:
+            return b""
+        if internship_id in self._overrides:
+            return encode_record(self._overrides, internship_id)
+        return encode_record(self._base, internship_id)
+
+
+def encode_record(internship_data: Mapping, internship_id: str) -> bytes:
+    """Extended-JSON bytes of one record for records.bin (b"" if absent)"""
+    raw = getattr(internship_data, "raw", None)
+    if raw is not None:
+        return raw(internship_id)
+    if internship_id not in internship_data:
+        return b""
+    from bson import json_util
+    return json_util.dumps(internship_data[internship_id]).encode()
+
+
+class RowVectors(Mapping):
+    """Read-only id -> per-dimension vectors, as views into a snapshot's columns"""
+    
+    def __init__(self, snapshot: "IndexSnapshot"):
+        self._snapshot = snapshot
+    
+    def __getitem__(self, internship_id: str) -> Dict[str, np.ndarray]:
+        row = self._snapshot.internship_id_to_index[internship_id]
+        snapshot = self._snapshot
+        return {
+            "skill_vector": snapshot.skill_matrix[row:row + 1],
+            "location_vector": snapshot.location_matrix[row:row + 1],
+            "stipend_vector": snapshot.stipend_column[row:row + 1].reshape(1, 1),
+            "timeline_vector": snapshot.timeline_column[row:row + 1].reshape(1, 1)
+        }
+    
+    def __iter__(self):
+        return iter(self._snapshot.internship_ids)
+    
+    def __len__(self) -> int:
+        return self._snapshot.size
+
+
+def _flat_index(matrix: np.ndarray) -> faiss.Index:
+    """Exact inner-product FAISS index over the rows of a matrix"""
+    matrix = np.ascontiguousarray(matrix.reshape(len(matrix), -1), dtype='float32')
+    index = faiss.IndexFlatIP(matrix.shape[1])
+    index.add(matrix)
+    return index
+
+
+_IDENTITY_MODULUS = 1 << 128
+
+
+def record_identity(internship_id: str, record: Optional[Dict]) -> int:
+    """One record's share of catalogue_identity: a hash of its id and updated_at"""
+    key = f"{internship_id}\x1f{(record or {}).get('updated_at') or ''}"
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=16).digest(), "little")
+
+
+def catalogue_identity(internship_ids: List[str], internship_data: Mapping) -> str:
+    """
+    Content identity of a catalogue: the sum of its record identities, so it
+    is independent of order and can be updated one record at a time.
+    """
+    total = sum(record_identity(i, internship_data.get(i)) for i in internship_ids)
+    return f"{total % _IDENTITY_MODULUS:032x}"
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """
+    Immutable, self-consistent view of the internship index.
+    
+    Row i of every column corresponds to internship_ids[i]. Snapshots are never
+    mutated after publication (arrays are read-only and may be memory-mapped);
+    updates build a new snapshot and swap it in, so a request can pin one and
+    read it lock-free. catalogue_version increases with every snapshot this
+    process publishes; catalogue_id identifies the catalogue contents and is
+    the same on every host and across restarts, so caches key on it.
+    """
+    internship_ids: List[str]
+    internship_data: Mapping
+    internship_id_to_index: Dict[str, int]
+    
+    # Dense column store used for vectorized scoring
+    skill_matrix: np.ndarray
+    location_matrix: np.ndarray
+    stipend_column: np.ndarray
+    timeline_column: np.ndarray
+    
+    # Filter columns: distinct facet values plus a per-row code into them
+    facet_vocab: Dict[str, List[Tuple]]
+    facet_codes: Dict[str, np.ndarray]
+    stipend_values: np.ndarray
+    has_data: np.ndarray
+    
+    built_at: Optional[datetime] = None
+    catalogue_version: int = 0
+    catalogue_id: str = ""
+    
+    @property
+    def size(self) -> int:
+        return len(self.internship_ids)
+    
+    @property
+    def internship_vectors(self) -> RowVectors:
+        return RowVectors(self)
+    
+    # FAISS indices are built on first use only; scoring reads the columns
+    @cached_property
+    def skill_index(self) -> faiss.Index:
+        return _flat_index(self.skill_matrix)
+    
+    @cached_property
+    def location_index(self) -> faiss.Index:
+        return _flat_index(self.location_matrix)
+    
+    @cached_property
+    def stipend_index(self) -> faiss.Index:
+        return _flat_index(self.stipend_column)
+    
+    @cached_property
+    def timeline_index(self) -> faiss.Index:
+        return _flat_index(self.timeline_column)
+    
+    def facet_mask(self, facet: str, predicate: Callable[[Dict], bool]) -> np.ndarray:
+        """Evaluate a predicate once per distinct facet value and broadcast it to all rows"""
+        fields = FILTER_FACETS[facet]
+        codes = self.facet_codes.get(facet)
+        if codes is None or len(codes) != self.size:
+            return np.ones(self.size, dtype=bool)
+        
+        lookup = np.array(
+            [bool(predicate(dict(zip(fields, values)))) for values in self.facet_vocab[facet]],
+            dtype=bool
+        )
+        return lookup[codes] if len(lookup) else np.zeros(len(codes), dtype=bool)
+    
+    def search(
+        self,
+        query_vector: np.ndarray,
+        index_type: str,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search an index"""
+        if index_type not in ("skill", "location", "stipend", "timeline"):
+            return np.array([[]]), np.array([[]])
+        
+        index = getattr(self, f"{index_type}_index")
+        if index.ntotal == 0:
             return np.array([[]]), np.array([[]])
         
         k = min(k, index.ntotal)
@@ -858,14 +1202,685 @@ class InternshipIndexManager:
                 query = query / norm
         
         return index.search(query.astype('float32'), k)
+
+
+def _snapshot_field(name: str) -> property:
+    """Read-only manager attribute that delegates to the current snapshot"""
+    return property(lambda self: getattr(self._snapshot, name))
+
+
+# Employer internship fields read by the engine (normalization, embeddings, sync mark)
+INTERNSHIP_PROJECTION: Dict[str, int] = {
+    field_name: 1 for field_name in (
+        "title", "company", "organisation_name", "description",
+        "location", "city", "state", "location_coordinates",
+        "work_type", "is_remote", "is_wfh",
+        "stipend", "stipend_currency", "duration", "duration_months",
+        "skills", "requirements", "category", "sector",
+        "apply_url", "application_link", "is_active", "status",
+        "is_featured", "is_verified", "views", "applications", "saves",
+        "created_at", "updated_at", "employer_uid", "embedding",
+    )
+}
+
+
+class InternshipColumnBuffer:
+    """
+    Growable float32 column buffers for building an index batch by batch.
+    
+    Rows are written into preallocated arrays (doubling when the estimate is
+    exceeded) so a full load never holds the raw documents of more than the
+    batch being processed.
+    """
+    
+    def __init__(self, embedding_dim: int, capacity: int):
+        capacity = max(int(capacity), 1)
+        self.internship_ids: List[str] = []
+        self.internship_data: Dict[str, Dict] = {}
+        self._row_of: Dict[str, int] = {}
+        self._skill = np.zeros((capacity, embedding_dim), dtype='float32')
+        self._location = np.zeros((capacity, 2), dtype='float32')
+        self._stipend = np.zeros(capacity, dtype='float32')
+        self._timeline = np.zeros(capacity, dtype='float32')
+    
+    def __len__(self) -> int:
+        return len(self.internship_ids)
+    
+    def _grow(self, needed: int):
+        capacity = len(self._skill)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        
+        def grown(array: np.ndarray) -> np.ndarray:
+            bigger = np.zeros((capacity,) + array.shape[1:], dtype='float32')
+            bigger[:len(self)] = array[:len(self)]
+            return bigger
+        
+        self._skill = grown(self._skill)
+        self._location = grown(self._location)
+        self._stipend = grown(self._stipend)
+        self._timeline = grown(self._timeline)
+    
+    def append(
+        self,
+        internship_ids: List[str],
+        internship_data: Dict[str, Dict],
+        internship_vectors: Dict[str, Dict[str, np.ndarray]]
+    ):
+        """Write prepared rows; a repeated id overwrites its earlier row"""
+        self._grow(len(self) + len(internship_ids))
+        
+        for internship_id in internship_ids:
+            row = self._row_of.get(internship_id)
+            if row is None:
+                row = len(self.internship_ids)
+                self._row_of[internship_id] = row
+                self.internship_ids.append(internship_id)
+            
+            vectors = internship_vectors[internship_id]
+            self._skill[row] = vectors["skill_vector"].reshape(-1)
+            self._location[row] = vectors["location_vector"].reshape(-1)
+            self._stipend[row] = float(vectors["stipend_vector"].reshape(-1)[0])
+            self._timeline[row] = float(vectors["timeline_vector"].reshape(-1)[0])
+            self.internship_data[internship_id] = internship_data[internship_id]
+    
+    def columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(skill, location, stipend, timeline) trimmed to the rows written"""
+        n = len(self)
+        return self._skill[:n], self._location[:n], self._stipend[:n], self._timeline[:n]
+
+
+class InternshipIndexManager:
+    """
+    Manages FAISS indices with efficient updates and persistent caching.
+    
+    All index state lives in an IndexSnapshot. Writers (full builds,
+    incremental changes, disk loads) build a new snapshot off to the side and
+    publish it with a single reference swap; readers take `snapshot` once and
+    never need a lock.
+    
+    On disk the snapshot is self-contained and memory-mappable (see
+    save_to_disk), so a warm start serves recommendations without reading the
+    employer database, and every worker process on a host maps the same
+    read-only pages. Only the process holding the builder lock writes
+    snapshots; the others reload whenever the builder publishes a new one.
+    """
+    
+    FILTER_FACETS = FILTER_FACETS
+    SNAPSHOT_DIR = "snapshot"
+    SNAPSHOT_FORMAT_VERSION = 4
+    SNAPSHOT_COLUMNS = ("skill", "location", "stipend", "timeline")
+    SNAPSHOT_POINTER = "CURRENT.json"
+    BUILDER_LOCK_FILE = "builder.lock"
+    
+    def __init__(self, embedding_dim: int, cache_dir: Path):
+        self.embedding_dim = embedding_dim
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._snapshot = self._make_snapshot([], {}, *self._empty_columns())
+        
+        # High-water mark for incremental sync (max updated_at and max ObjectId seen)
+        self.sync_state: Dict[str, Optional[str]] = {"updated_at": None, "last_id": None}
+        
+        # Serializes writers only; readers use the published snapshot
+        self._lock = threading.Lock()
+        
+        # Serializes saves, which run in the thread pool outside _lock
+        self._save_lock = threading.Lock()
+        
+        # A single process per cache_dir builds and saves snapshots
+        self.is_builder = True
+        self._builder_lock_file = None
+        self._disk_directory: Optional[str] = None
+    
+    # Read-only views of the current snapshot (kept for existing callers)
+    internship_ids = _snapshot_field("internship_ids")
+    internship_data = _snapshot_field("internship_data")
+    internship_id_to_index = _snapshot_field("internship_id_to_index")
+    internship_vectors = _snapshot_field("internship_vectors")
+    skill_index = _snapshot_field("skill_index")
+    location_index = _snapshot_field("location_index")
+    stipend_index = _snapshot_field("stipend_index")
+    timeline_index = _snapshot_field("timeline_index")
+    skill_matrix = _snapshot_field("skill_matrix")
+    location_matrix = _snapshot_field("location_matrix")
+    stipend_column = _snapshot_field("stipend_column")
+    timeline_column = _snapshot_field("timeline_column")
+    facet_vocab = _snapshot_field("facet_vocab")
+    facet_codes = _snapshot_field("facet_codes")
+    stipend_values = _snapshot_field("stipend_values")
+    has_data = _snapshot_field("has_data")
+    last_build_time = _snapshot_field("built_at")
+    internship_count = _snapshot_field("size")
+    catalogue_version = _snapshot_field("catalogue_version")
+    catalogue_id = _snapshot_field("catalogue_id")
+    
+    @property
+    def snapshot(self) -> IndexSnapshot:
+        """The current snapshot; pin it for the duration of a request"""
+        return self._snapshot
+    
+    def _publish(self, snapshot: IndexSnapshot, catalogue_version: Optional[int] = None):
+        """Make a snapshot current (a single reference swap), stamping its catalogue version"""
+        if catalogue_version is None:
+            catalogue_version = self._snapshot.catalogue_version + 1
+        self._snapshot = dataclasses.replace(snapshot, catalogue_version=catalogue_version)
+    
+    def _empty_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.zeros((0, self.embedding_dim), dtype='float32'),
+            np.zeros((0, 2), dtype='float32'),
+            np.zeros(0, dtype='float32'),
+            np.zeros(0, dtype='float32')
+        )
+    
+    def acquire_builder_lock(self) -> bool:
+        """
+        Try to become the snapshot builder for this cache_dir (non-blocking).
+        The lock is released when the process exits, so a follower can take over.
+        """
+        if self._builder_lock_file is not None:
+            return True
+        if fcntl is None:
+            self.is_builder = True
+            return True
+        
+        lock_file = open(self.cache_dir / self.BUILDER_LOCK_FILE, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            self.is_builder = False
+            return False
+        
+        self._builder_lock_file = lock_file
+        self.is_builder = True
+        return True
+    
+    def release_builder_lock(self):
+        if self._builder_lock_file is not None:
+            self._builder_lock_file.close()
+            self._builder_lock_file = None
+    
+    def init_indices(self):
+        """Initialize empty FAISS indices"""
+        with self._lock:
+            self._publish(self._make_snapshot([], {}, *self._empty_columns()))
+            self.sync_state = {"updated_at": None, "last_id": None}
+    
+    def build_indices(
+        self,
+        skill_vectors: np.ndarray,
+        location_vectors: np.ndarray,
+        stipend_vectors: np.ndarray,
+        timeline_vectors: np.ndarray,
+        internship_ids: List[str],
+        internship_data: Dict[str, Dict]
+    ) -> bool:
+        """Build all indices from vectors"""
+        try:
+            skill_vectors_norm = skill_vectors.astype('float32').copy()
+            faiss.normalize_L2(skill_vectors_norm)
+            
+            snapshot = self._make_snapshot(
+                internship_ids, internship_data,
+                skill_vectors_norm,
+                self._normalize_rows(location_vectors),
+                stipend_vectors.astype('float32').reshape(-1),
+                timeline_vectors.astype('float32').reshape(-1)
+            )
+            with self._lock:
+                self._publish(snapshot)
+            
+            logger.info(f"✅ Indices built with {len(internship_ids)} internships")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to build indices: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return False
+    
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows, leaving all-zero rows untouched"""
+        matrix = matrix.astype('float32')
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return (matrix / norms).astype('float32')
+    
+    def _make_snapshot(
+        self,
+        internship_ids: List[str],
+        internship_data: Mapping,
+        skill_matrix: np.ndarray,
+        location_matrix: np.ndarray,
+        stipend_column: np.ndarray,
+        timeline_column: np.ndarray,
+        built_at: Optional[datetime] = None,
+        filter_columns: Optional[Tuple] = None,
+        catalogue_id: Optional[str] = None,
+        id_to_index: Optional[Dict[str, int]] = None
+    ) -> IndexSnapshot:
+        """
+        Build filter columns for normalized columns into a new snapshot.
+        Incremental updates pass filter columns, identity and id table
+        derived from the previous snapshot instead of rescanning records.
+        """
+        skill_matrix = np.ascontiguousarray(skill_matrix, dtype='float32')
+        location_matrix = np.ascontiguousarray(location_matrix, dtype='float32')
+        stipend_column = np.ascontiguousarray(stipend_column, dtype='float32')
+        timeline_column = np.ascontiguousarray(timeline_column, dtype='float32')
+        
+        if filter_columns is None:
+            filter_columns = self._build_filter_columns(internship_ids, internship_data)
+        facet_vocab, facet_codes, stipend_values, has_data = filter_columns
+        
+        for array in (skill_matrix, location_matrix, stipend_column, timeline_column, stipend_values, has_data):
+            array.flags.writeable = False
+        
+        return IndexSnapshot(
+            internship_ids=list(internship_ids),
+            internship_data=internship_data,
+            internship_id_to_index=id_to_index if id_to_index is not None else {id_: i for i, id_ in enumerate(internship_ids)},
+            skill_matrix=skill_matrix,
+            location_matrix=location_matrix,
+            stipend_column=stipend_column,
+            timeline_column=timeline_column,
+            facet_vocab=facet_vocab,
+            facet_codes=facet_codes,
+            stipend_values=stipend_values,
+            has_data=has_data,
+            built_at=built_at or datetime.utcnow(),
+            catalogue_id=catalogue_id or catalogue_identity(internship_ids, internship_data)
+        )
+    
+    def apply_changes(
+        self,
+        upserts: Dict[str, Tuple[Dict, Dict[str, np.ndarray]]],
+        removed_ids: Set[str]
+    ) -> bool:
+        """
+        Incrementally upsert and remove internships.
+        
+        A new snapshot is built copy-on-write from the current one and then
+        published, so readers never see a half-applied change. Unchanged
+        records, their filter codes and their share of the catalogue identity
+        are carried over; only changed records are read. Copying the columns
+        is still O(catalogue), so callers run this in the thread pool.
+        """
+        try:
+            with self._lock:
+                current = self._snapshot
+                upserts = {k: v for k, v in upserts.items() if k not in removed_ids}
+                
+                dropped_rows = sorted(
+                    current.internship_id_to_index[id_] for id_ in removed_ids
+                    if id_ in current.internship_id_to_index
+                )
+                keep_rows = np.delete(np.arange(current.size, dtype=np.int64), dropped_rows)
+                if dropped_rows:
+                    dropped = set(dropped_rows)
+                    ids = [id_ for i, id_ in enumerate(current.internship_ids) if i not in dropped]
+                else:
+                    ids = list(current.internship_ids)
+                position = {id_: i for i, id_ in enumerate(ids)}
+                new_ids = [id_ for id_ in upserts if id_ not in position]
+                for id_ in new_ids:
+                    position[id_] = len(ids)
+                    ids.append(id_)
+                
+                n_new = len(new_ids)
+                skill_matrix = np.vstack([
+                    current.skill_matrix[keep_rows],
+                    np.zeros((n_new, current.skill_matrix.shape[1]), dtype='float32')
+                ])
+                location_matrix = np.vstack([
+                    current.location_matrix[keep_rows],
+                    np.zeros((n_new, 2), dtype='float32')
+                ])
+                stipend_column = np.concatenate([current.stipend_column[keep_rows], np.zeros(n_new, dtype='float32')])
+                timeline_column = np.concatenate([current.timeline_column[keep_rows], np.zeros(n_new, dtype='float32')])
+                
+                # Swap the identity shares of replaced and removed records
+                identity = int(current.catalogue_id, 16) if current.catalogue_id else 0
+                for id_ in set(upserts) | set(removed_ids):
+                    if id_ in current.internship_id_to_index:
+                        identity -= record_identity(id_, current.internship_data.get(id_))
+                
+                changed_rows: Dict[int, Dict] = {}
+                for id_, (normalized, row_vectors) in upserts.items():
+                    row = position[id_]
+                    skill_vec = row_vectors["skill_vector"].astype('float32').reshape(1, -1).copy()
+                    faiss.normalize_L2(skill_vec)
+                    skill_matrix[row] = skill_vec[0]
+                    location_matrix[row] = self._normalize_rows(row_vectors["location_vector"].reshape(1, -1))[0]
+                    stipend_column[row] = float(row_vectors["stipend_vector"].reshape(-1)[0])
+                    timeline_column[row] = float(row_vectors["timeline_vector"].reshape(-1)[0])
+                    changed_rows[row] = normalized
+                    identity += record_identity(id_, normalized)
+                
+                data = LayeredRecords.updated(
+                    current.internship_data,
+                    {id_: normalized for id_, (normalized, _) in upserts.items()},
+                    removed_ids,
+                    position
+                )
+                
+                self._publish(self._make_snapshot(
+                    ids, data,
+                    skill_matrix, location_matrix, stipend_column, timeline_column,
+                    filter_columns=self._update_filter_columns(current, keep_rows, n_new, changed_rows),
+                    catalogue_id=f"{identity % _IDENTITY_MODULUS:032x}",
+                    id_to_index=position
+                ))
+            
+            logger.info(f"✅ Applied {len(upserts)} upserts and {len(removed_ids)} removals ({len(ids)} internships)")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to apply incremental changes: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return False
+    
+    def advance_sync_state(self, internships: List[Dict]):
+        """Move the high-water mark past the given raw internship documents"""
+        from bson import ObjectId
+        
+        latest_update = self.sync_state.get("updated_at")
+        last_id = self.sync_state.get("last_id")
+        
+        for internship in internships:
+            updated_at = internship.get("updated_at")
+            if isinstance(updated_at, datetime):
+                updated_iso = updated_at.isoformat()
+                if latest_update is None or updated_iso > latest_update:
+                    latest_update = updated_iso
+            
+            oid = internship.get("_id")
+            if isinstance(oid, ObjectId) and (last_id is None or oid > ObjectId(last_id)):
+                last_id = str(oid)
+        
+        self.sync_state = {"updated_at": latest_update, "last_id": last_id}
+    
+    def changes_query(self) -> Optional[Dict[str, Any]]:
+        """Mongo query for documents changed or created since the high-water mark"""
+        from bson import ObjectId
+        
+        conditions = []
+        if self.sync_state.get("updated_at"):
+            # $gte so updates sharing the mark's timestamp are not missed (upserts are idempotent)
+            conditions.append({"updated_at": {"$gte": datetime.fromisoformat(self.sync_state["updated_at"])}})
+        if self.sync_state.get("last_id"):
+            conditions.append({"_id": {"$gt": ObjectId(self.sync_state["last_id"])}})
+        
+        if not conditions:
+            return None
+        return {"$or": conditions}
+    
+    @staticmethod
+    def _write_atomic(path: Path, write: Callable[[Any], None]):
+        """Write a file through a temporary name so readers never see it half-written"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    
+    def save_to_disk(self) -> bool:
+        """
+        Save the current snapshot to disk (builder process only).
+        
+        Each catalogue version gets its own directory under cache_dir/snapshot
+        holding raw .npy column and filter arrays, the normalized records
+        (records.bin plus a record_offsets.npy table) and the id list.
+        CURRENT.json, the manifest with format version, catalogue version and
+        sync mark, is replaced last to publish it. Older version directories
+        are pruned; processes still mapping them keep their pages.
+        
+        Files are written outside _lock, so a save (run in the thread pool)
+        never blocks publishing. Saves are serialized and each one writes the
+        snapshot current when it starts, so the manifest never moves backwards.
+        """
+        if not self.is_builder:
+            return False
+        
+        try:
+            snapshot_dir = self.cache_dir / self.SNAPSHOT_DIR
+            
+            with self._save_lock:
+                with self._lock:
+                    snapshot = self._snapshot
+                    sync_state = dict(self.sync_state)
+                
+                directory = f"v{snapshot.catalogue_version:08d}-{snapshot.catalogue_id[:12]}"
+                version_dir = snapshot_dir / directory
+                
+                # The same snapshot is only re-saved to move the sync mark
+                if self._disk_directory != directory or not version_dir.exists():
+                    version_dir.mkdir(parents=True, exist_ok=True)
+                    
+                    columns = (snapshot.skill_matrix, snapshot.location_matrix, snapshot.stipend_column, snapshot.timeline_column)
+                    arrays = dict(zip(self.SNAPSHOT_COLUMNS, columns))
+                    arrays["stipend_values"] = snapshot.stipend_values
+                    for facet, codes in snapshot.facet_codes.items():
+                        arrays[f"facet_{facet}"] = codes
+                    
+                    records = [encode_record(snapshot.internship_data, i) for i in snapshot.internship_ids]
+                    arrays["record_offsets"] = np.concatenate([[0], np.cumsum([len(r) for r in records])]).astype(np.int64)
+                    
+                    for name, array in arrays.items():
+                        self._write_atomic(version_dir / f"{name}.npy", lambda f, array=array: np.save(f, array))
+                    self._write_atomic(version_dir / "records.bin", lambda f: f.write(b"".join(records)))
+                    self._write_atomic(version_dir / "ids.json", lambda f: f.write(json.dumps(snapshot.internship_ids).encode()))
+                    self._write_atomic(version_dir / "facets.json", lambda f: f.write(json.dumps(snapshot.facet_vocab).encode()))
+                
+                manifest = {
+                    "format_version": self.SNAPSHOT_FORMAT_VERSION,
+                    "directory": directory,
+                    "catalogue_version": snapshot.catalogue_version,
+                    "catalogue_id": snapshot.catalogue_id,
+                    "built_at": snapshot.built_at.isoformat() if snapshot.built_at else None,
+                    "internship_count": snapshot.size,
+                    "embedding_dim": self.embedding_dim,
+                    "sync_state": sync_state
+                }
+                self._write_atomic(snapshot_dir / self.SNAPSHOT_POINTER, lambda f: f.write(json.dumps(manifest).encode()))
+                
+                previous, self._disk_directory = self._disk_directory, directory
+                keep = {directory, previous}
+                for stale in snapshot_dir.glob("v*"):
+                    if stale.is_dir() and stale.name not in keep:
+                        shutil.rmtree(stale, ignore_errors=True)
+            
+            logger.info(f"✅ Saved index snapshot v{snapshot.catalogue_version} to disk")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Failed to save indices: {e}")
+            return False
+    
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        pointer = self.cache_dir / self.SNAPSHOT_DIR / self.SNAPSHOT_POINTER
+        if not pointer.exists():
+            return None
+        with open(pointer, 'r') as f:
+            return json.load(f)
+    
+    def load_from_disk(self) -> bool:
+        """Memory-map and publish the on-disk snapshot written by save_to_disk"""
+        try:
+            manifest = self._read_manifest()
+            if manifest is None:
+                return False
+            
+            if manifest.get("format_version") != self.SNAPSHOT_FORMAT_VERSION or manifest.get("embedding_dim") != self.embedding_dim:
+                logger.warning("Cached index snapshot has an incompatible format, ignoring cache")
+                return False
+            
+            version_dir = self.cache_dir / self.SNAPSHOT_DIR / manifest["directory"]
+            
+            def mapped(name: str) -> np.ndarray:
+                return np.load(version_dir / f"{name}.npy", mmap_mode='r')
+            
+            columns = [mapped(name) for name in self.SNAPSHOT_COLUMNS]
+            offsets = mapped("record_offsets")
+            records_path = version_dir / "records.bin"
+            blob = np.memmap(records_path, dtype=np.uint8, mode='r') if records_path.stat().st_size else np.zeros(0, dtype=np.uint8)
+            
+            with open(version_dir / "ids.json", 'r') as f:
+                internship_ids = json.load(f)
+            with open(version_dir / "facets.json", 'r') as f:
+                facet_vocab = {facet: [tuple(values) for values in vocab] for facet, vocab in json.load(f).items()}
+            facet_codes = {facet: mapped(f"facet_{facet}") for facet in FILTER_FACETS}
+            
+            count = manifest.get("internship_count")
+            arrays = columns + [mapped("stipend_values")] + list(facet_codes.values())
+            if len(internship_ids) != count or len(offsets) != count + 1 or any(len(array) != count for array in arrays):
+                logger.warning("Cached index snapshot is inconsistent, ignoring cache")
+                return False
+            
+            id_to_index = {id_: i for i, id_ in enumerate(internship_ids)}
+            has_data = np.diff(offsets) > 0
+            has_data.flags.writeable = False
+            snapshot = IndexSnapshot(
+                internship_ids=internship_ids,
+                internship_data=MappedRecords(id_to_index, offsets, blob),
+                internship_id_to_index=id_to_index,
+                skill_matrix=columns[0],
+                location_matrix=columns[1],
+                stipend_column=columns[2],
+                timeline_column=columns[3],
+                facet_vocab=facet_vocab,
+                facet_codes=facet_codes,
+                stipend_values=mapped("stipend_values"),
+                has_data=has_data,
+                built_at=datetime.fromisoformat(manifest["built_at"]) if manifest.get("built_at") else None,
+                catalogue_id=manifest["catalogue_id"]
+            )
+            
+            with self._lock:
+                self._publish(snapshot, catalogue_version=manifest["catalogue_version"])
+                self.sync_state = manifest.get("sync_state") or {"updated_at": None, "last_id": None}
+                self._disk_directory = manifest["directory"]
+            
+            logger.info(f"✅ Mapped index snapshot v{manifest['catalogue_version']} from cache ({snapshot.size} internships)")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Failed to load indices: {e}")
+            return False
+    
+    def reload_if_changed(self) -> bool:
+        """Map the builder's latest snapshot if it differs from the one last loaded"""
+        try:
+            manifest = self._read_manifest()
+        except Exception as e:
+            logger.debug(f"Snapshot pointer unreadable: {e}")
+            return False
+        
+        if manifest is None or manifest.get("directory") == self._disk_directory:
+            return False
+        return self.load_from_disk()
+    
+    @staticmethod
+    def _facet_value(internship: Dict, field_name: str) -> Any:
+        """Hashable facet value, normalized the way the filter predicates read it"""
+        if field_name == "is_remote":
+            return bool(internship.get("is_remote", False))
+        if field_name == "duration_months":
+            value = internship.get("duration_months")
+            return value if isinstance(value, (int, float)) else None
+        return str(internship.get(field_name, ""))
+    
+    def _build_filter_columns(
+        self,
+        internship_ids: List[str],
+        internship_data: Dict[str, Dict]
+    ) -> Tuple[Dict[str, List[Tuple]], Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """Precompute facet codes and numeric filter columns"""
+        rows = [internship_data.get(internship_id) for internship_id in internship_ids]
+        
+        facet_vocab = {}
+        facet_codes = {}
+        for facet, fields in FILTER_FACETS.items():
+            vocab: Dict[Tuple, int] = {}
+            codes = np.empty(len(rows), dtype=np.int32)
+            for i, internship in enumerate(rows):
+                values = tuple(self._facet_value(internship or {}, f) for f in fields)
+                codes[i] = vocab.setdefault(values, len(vocab))
+            codes.flags.writeable = False
+            facet_vocab[facet] = list(vocab)
+            facet_codes[facet] = codes
+        
+        stipend_values = np.empty(len(rows), dtype='float64')
+        for i, internship in enumerate(rows):
+            stipend = (internship or {}).get("stipend") or 0
+            stipend_values[i] = float(stipend) if isinstance(stipend, (int, float)) else np.nan
+        has_data = np.array([internship is not None for internship in rows], dtype=bool)
+        
+        return facet_vocab, facet_codes, stipend_values, has_data
+    
+    def _update_filter_columns(
+        self,
+        current: IndexSnapshot,
+        keep_rows: np.ndarray,
+        n_new: int,
+        changed_rows: Dict[int, Dict]
+    ) -> Optional[Tuple[Dict[str, List[Tuple]], Dict[str, np.ndarray], np.ndarray, np.ndarray]]:
+        """
+        Filter columns of current with rows dropped, n_new rows appended and
+        changed_rows (row -> record) recomputed; None if current lacks them.
+        Facet values no longer used stay in the vocabulary until a full build.
+        """
+        if any(facet not in current.facet_codes for facet in FILTER_FACETS):
+            return None
+        
+        facet_vocab = {}
+        facet_codes = {}
+        for facet, fields in FILTER_FACETS.items():
+            vocab = {values: code for code, values in enumerate(current.facet_vocab[facet])}
+            codes = np.concatenate([
+                current.facet_codes[facet][keep_rows], np.zeros(n_new, dtype=np.int32)
+            ]).astype(np.int32)
+            for row, internship in changed_rows.items():
+                values = tuple(self._facet_value(internship, f) for f in fields)
+                codes[row] = vocab.setdefault(values, len(vocab))
+            codes.flags.writeable = False
+            facet_vocab[facet] = list(vocab)
+            facet_codes[facet] = codes
+        
+        stipend_values = np.concatenate([current.stipend_values[keep_rows], np.zeros(n_new, dtype='float64')])
+        has_data = np.concatenate([current.has_data[keep_rows], np.zeros(n_new, dtype=bool)])
+        for row, internship in changed_rows.items():
+            stipend = internship.get("stipend") or 0
+            stipend_values[row] = float(stipend) if isinstance(stipend, (int, float)) else np.nan
+            has_data[row] = True
+        
+        return facet_vocab, facet_codes, stipend_values, has_data
+    
+    def facet_mask(self, facet: str, predicate: Callable[[Dict], bool]) -> np.ndarray:
+        """Evaluate a predicate over the current snapshot (see IndexSnapshot.facet_mask)"""
+        return self._snapshot.facet_mask(facet, predicate)
+    
+    def search(
+        self,
+        query_vector: np.ndarray,
+        index_type: str,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search an index of the current snapshot"""
+        return self._snapshot.search(query_vector, index_type, k)
     
     @property
     def is_ready(self) -> bool:
-        return self.skill_index is not None and self.skill_index.ntotal > 0
+        return self._snapshot.size > 0
     
     @property
     def total_internships(self) -> int:
-        return self.skill_index.ntotal if self.skill_index else 0
+        return self._snapshot.size
 
 
 # ============================================================================
@@ -882,12 +1897,48 @@ class MatchExplanationGenerator:
         self.skill_manager = skill_manager
         self.config = config or _load_recommendation_config()
     
+    def generate_explanations_batch(
+        self,
+        user: User,
+        candidates: List[Tuple[Dict, Dict[str, float]]],
+        user_profile: Dict
+    ) -> List[Optional[MatchExplanation]]:
+        """
+        Generate explanations for many (internship, scores) candidates at once.
+        
+        All unique skills across the student and the candidates are added to
+        the skill graph in one batch, then matched by graph lookups. This is
+        CPU-bound and meant to be run in the thread pool, not on the event loop.
+        Returns None for candidates whose explanation failed.
+        """
+        similarity_lookup = self.skill_manager.graph
+        similarity_lookup.add(
+            list(user_profile.get("skills", []))
+            + [skill for internship, _ in candidates for skill in (internship.get("skills") or [])]
+        )
+        
+        explanations: List[Optional[MatchExplanation]] = []
+        for internship, scores in candidates:
+            try:
+                explanations.append(
+                    self.generate_explanation(
+                        user, internship, scores, user_profile,
+                        similarity_lookup=similarity_lookup
+                    )
+                )
+            except Exception as exc:
+                logger.warning(f"Failed to generate explanation for {internship.get('_id')}: {exc}")
+                explanations.append(None)
+        
+        return explanations
+    
     def generate_explanation(
         self,
         user: User,
         internship: Dict,
         scores: Dict[str, float],
-        user_profile: Dict
+        user_profile: Dict,
+        similarity_lookup: Optional[SkillSimilarityGraph] = None
     ) -> MatchExplanation:
         """Generate comprehensive match explanation"""
         
@@ -897,7 +1948,7 @@ class MatchExplanationGenerator:
         quality = self._determine_quality(match_percentage)
         
         # Generate component analyses
-        skill_analysis = self._analyze_skills(user_profile, internship, scores)
+        skill_analysis = self._analyze_skills(user_profile, internship, scores, similarity_lookup)
         location_analysis = self._analyze_location(user_profile, internship, scores)
         stipend_analysis = self._analyze_stipend(user_profile, internship, scores)
         timeline_analysis = self._analyze_timeline(user_profile, internship, scores)
@@ -951,7 +2002,8 @@ class MatchExplanationGenerator:
         self,
         user_profile: Dict,
         internship: Dict,
-        scores: Dict
+        scores: Dict,
+        similarity_lookup: Optional[SkillSimilarityGraph] = None
     ) -> SkillAnalysis:
         """Analyze skill match in detail"""
         user_skills = user_profile.get("skills", [])
@@ -960,7 +2012,7 @@ class MatchExplanationGenerator:
         
         # Get detailed skill matching
         skill_match_result = self.skill_manager.find_skill_matches(
-            user_skills, internship_skills
+            user_skills, internship_skills, similarity_lookup
         )
         
         # Build matching skills with levels
@@ -1509,6 +2561,148 @@ class MatchExplanationGenerator:
         }
 
 
+# ============================================================================
+# SCORING WEIGHTS REGISTRY
+# ============================================================================
+
+WEIGHT_DIMENSIONS = ("skills", "location", "stipend", "timeline")
+
+
+@dataclass(frozen=True)
+class WeightsVersion:
+    """An immutable set of scoring weights and the version that produced it"""
+    weights: Dict[str, float]
+    version: str
+    source: str
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class WeightsRegistry:
+    """
+    In-memory scoring weights with hot reload.
+    
+    Requests read the current WeightsVersion without file I/O. The weights
+    files are stat'ed at most once per check interval and only re-parsed when
+    their mtime or size changes; publish() swaps weights in directly. Every
+    change replaces the single current WeightsVersion reference.
+    """
+    
+    # (source name, path, key holding the weights), highest priority first
+    SOURCES: Tuple[Tuple[str, Path, str], ...] = (
+        ("feedback", Path("models/feedback_adjusted_weights.json"), "weights"),
+        ("trained", Path("models/trained_weights.json"), "final_weights"),
+    )
+    
+    def __init__(
+        self,
+        default_weights: Dict[str, float],
+        check_interval_seconds: float = 5.0,
+        sources: Optional[Tuple[Tuple[str, Path, str], ...]] = None
+    ):
+        self.check_interval_seconds = check_interval_seconds
+        self.sources = sources or self.SOURCES
+        self._default = WeightsVersion(dict(default_weights), "default", "default")
+        self._current = self._default
+        self._fingerprint: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        
+        self._last_check = time.monotonic()
+        self.reload_if_changed()
+    
+    @property
+    def current(self) -> WeightsVersion:
+        return self._current
+    
+    def get(self) -> WeightsVersion:
+        """Current weights, checking the files first if the check interval has passed"""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval_seconds:
+            self._last_check = now
+            self.reload_if_changed()
+        return self._current
+    
+    def publish(self, weights: Dict[str, float], version: Optional[str] = None) -> WeightsVersion:
+        """Swap in new weights immediately (e.g. from the continuous-learning job)"""
+        validated = self._validate(weights)
+        if validated is None:
+            raise ValueError(f"Invalid scoring weights: {weights}")
+        
+        published = WeightsVersion(
+            validated,
+            f"published:{version or datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+            "published"
+        )
+        # Published weights stay current until a weights file changes again
+        self._fingerprint = self._file_fingerprint()
+        self._swap(published)
+        return published
+    
+    def reload_if_changed(self) -> bool:
+        """Re-read the weights files if any of them changed since the last read"""
+        fingerprint = self._file_fingerprint()
+        if fingerprint == self._fingerprint:
+            return False
+        
+        try:
+            loaded = self._load_from_files()
+        except Exception as e:
+            # Likely a file caught mid-write; keep serving and retry next check
+            logger.warning(f"Could not read scoring weights, keeping {self._current.version}: {e}")
+            return False
+        
+        self._fingerprint = fingerprint
+        if loaded.version == self._current.version:
+            return False
+        self._swap(loaded)
+        return True
+    
+    def _swap(self, weights_version: WeightsVersion):
+        with self._lock:
+            previous, self._current = self._current, weights_version
+        logger.info(f"⚖️ Scoring weights {previous.version} -> {weights_version.version}: {weights_version.weights}")
+    
+    def _file_fingerprint(self) -> Tuple:
+        fingerprint = []
+        for name, path, _ in self.sources:
+            try:
+                stat = path.stat()
+                fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((name, None, None))
+        return tuple(fingerprint)
+    
+    def _load_from_files(self) -> WeightsVersion:
+        """Weights from the highest-priority valid file, else the defaults"""
+        for name, path, key in self.sources:
+            if not path.exists():
+                continue
+            with open(path) as f:
+                data = json.load(f)
+            
+            weights = self._validate(data.get(key))
+            if weights is None:
+                logger.warning(f"Ignoring invalid weights in {path}")
+                continue
+            
+            version = data.get("version") or data.get("iteration_id") or data.get("updated_at") or str(path.stat().st_mtime_ns)
+            return WeightsVersion(weights, f"{name}:{version}", name)
+        
+        return self._default
+    
+    @staticmethod
+    def _validate(weights: Any) -> Optional[Dict[str, float]]:
+        """Weights for every dimension as non-negative floats, or None"""
+        if not isinstance(weights, dict):
+            return None
+        try:
+            validated = {dim: float(weights[dim]) for dim in WEIGHT_DIMENSIONS}
+        except (KeyError, TypeError, ValueError):
+            return None
+        if any(value < 0 for value in validated.values()) or sum(validated.values()) <= 0:
+            return None
+        return validated
+
+
 # ============================================================================
 # MAIN RECOMMENDATION ENGINE
 # ============================================================================
@@ -1535,7 +2729,8 @@ class YuvaSetuRecommendationEngine:
         self.embedding_dim = settings.EMBEDDING_DIMENSION
         
         # Model (lazy loaded)
-        self._model: Optional[SentenceTransformer] = None
+        self._model: Optional["SentenceTransformer"] = None
+        self._encoder: Optional[MicroBatchEncoder] = None
         
         # Managers (initialized after model)
         self._skill_manager: Optional[SkillSignatureManager] = None
@@ -1543,6 +2738,35 @@ class YuvaSetuRecommendationEngine:
         self._index_manager: Optional[InternshipIndexManager] = None
         self._explanation_generator: Optional[MatchExplanationGenerator] = None
         
+        # Explanations keyed by (user, full profile hash, internship id)
+        self._explanation_cache = ShardedTTLCache(
+            max_bytes=self.config.EXPLANATION_CACHE_MAX_MB * 1024 * 1024,
+            shards=self.config.CACHE_SHARDS,
+            default_ttl_seconds=self.config.EXPLANATION_CACHE_TTL_HOURS * 3600,
+            name="explanations"
+        )
+        
+        # Ranked candidate lists keyed by (user, profile hash, catalogue
+        # version, weights version, filters); cleared when a snapshot is swapped
+        self._result_cache = ShardedTTLCache(
+            max_bytes=self.config.RESULT_CACHE_MAX_MB * 1024 * 1024,
+            shards=self.config.CACHE_SHARDS,
+            default_ttl_seconds=self.config.RESULT_CACHE_TTL_SECONDS,
+            name="results"
+        )
+        self._result_cache_catalogue: Optional[str] = None
+        self._precomputed_collection = None
+        
+        # In-flight computations shared by concurrent identical calls
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.coalesced_calls = 0
+        
+        # Scoring weights, hot-reloaded from the models/ files
+        self._weights_registry = WeightsRegistry(
+            self.config.DEFAULT_WEIGHTS,
+            check_interval_seconds=self.config.WEIGHTS_CHECK_INTERVAL_SECONDS
+        )
+        
         # Cache paths - use cross-platform temp directory
         temp_base = Path(tempfile.gettempdir())
         cache_dir = temp_base / "recommendation_cache"
@@ -1554,9 +2778,13 @@ class YuvaSetuRecommendationEngine:
         self._initializing = False
         self._init_lock = asyncio.Lock()
         self.last_refresh: Optional[datetime] = None
+        self._last_sync_check: Optional[datetime] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._vocabulary_task: Optional[asyncio.Task] = None
+        self._change_watcher: Optional["InternshipChangeWatcher"] = None
     
     @property
-    def model(self) -> Optional[SentenceTransformer]:
+    def model(self) -> Optional["SentenceTransformer"]:
         return self._model
     
     @staticmethod
@@ -1569,6 +2797,29 @@ class YuvaSetuRecommendationEngine:
         """Convert score to percentage"""
         return round(cls._clamp(value) * 100, precision)
     
+    def _create_student_vector_store(self) -> Optional[VectorStore]:
+        """Shared student-vector store selected by STUDENT_VECTOR_STORE, or None"""
+        backend = self.config.STUDENT_VECTOR_STORE
+        namespace = f"student_vectors:{self.model_name}:"
+        
+        try:
+            if backend == "sqlite":
+                return SQLiteVectorStore(self.cache_dir / "student_vectors.sqlite3", namespace)
+            
+            if backend == "redis":
+                if redis is None:
+                    logger.warning("redis package not installed, student vectors are not shared")
+                    return None
+                from app.config import settings
+                client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1)
+                client.ping()
+                return RedisVectorStore(client, namespace)
+        
+        except Exception as e:
+            logger.warning(f"Shared student vector store unavailable ({backend}): {e}")
+        
+        return None
+    
     def has_internships(self) -> bool:
         """Check if internship data is loaded"""
         return self._index_manager is not None and self._index_manager.is_ready
@@ -1604,17 +2855,30 @@ class YuvaSetuRecommendationEngine:
                 return False
             
             # Initialize managers
-            self._skill_manager = SkillSignatureManager(self._model, self.config)
-            self._student_cache = StudentProfileCache(self._skill_manager, self.config)
+            vocabulary = SkillVocabulary(
+                self._model,
+                self.cache_dir / "skill_vocabulary.npz",
+                batch_size=self.config.BATCH_ENCODING_SIZE
+            )
+            vocabulary.load(self.embedding_dim)
+            vocabulary.encoder = self._encoder
+            self._skill_manager = SkillSignatureManager(self._model, self.config, vocabulary)
+            await asyncio.get_event_loop().run_in_executor(_thread_pool, self._skill_manager.graph.update)
+            self._student_cache = StudentProfileCache(
+                self._skill_manager, self.config, self._create_student_vector_store()
+            )
             self._index_manager = InternshipIndexManager(self.embedding_dim, self.cache_dir)
             self._explanation_generator = MatchExplanationGenerator(self._skill_manager, self.config)
             
+            # One worker per cache_dir builds snapshots; the rest map them
+            if self.config.SHARED_SNAPSHOT_ENABLED:
+                self._index_manager.acquire_builder_lock()
+            
             # Try to load cached indices
             cache_loaded = self._index_manager.load_from_disk()
             
-            if cache_loaded:
-                await self._load_internship_metadata_only()
-            else:
+            if not cache_loaded:
+                # Without a snapshot a follower builds a private index (it is not saved)
                 self._index_manager.init_indices()
                 await self.load_employer_data()
             
@@ -1623,6 +2887,10 @@ class YuvaSetuRecommendationEngine:
             self._initializing = False
             self.last_refresh = datetime.utcnow()
             
+            if self._index_manager.is_builder:
+                self._start_index_maintenance(reconcile=cache_loaded)
+            self._vocabulary_task = asyncio.create_task(self._save_vocabulary_periodically())
+            
             logger.info(f"✅ Engine initialized in {elapsed:.2f}s")
             logger.info(f"   - Model: {self.model_name}")
             logger.info(f"   - Internships: {self._index_manager.total_internships}")
@@ -1637,16 +2905,42 @@ class YuvaSetuRecommendationEngine:
             self._initializing = False
             return False
     
+    def _start_index_maintenance(self, reconcile: bool):
+        """
+        Keep the index live without per-request DB round trips (builder only).
+        With reconcile, a cached snapshot is also brought up to date with the
+        database in the background.
+        """
+        if self.config.CHANGE_STREAM_ENABLED:
+            self._change_watcher = InternshipChangeWatcher(self, self.config)
+            self._change_watcher.start()
+        elif reconcile:
+            self._sync_task = asyncio.create_task(self._sync_internship_changes())
+    
+    async def _save_vocabulary_periodically(self):
+        """Persist skills appended by requests, off the request path"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(SkillVocabulary.SAVE_INTERVAL_SECONDS)
+            await loop.run_in_executor(_thread_pool, self._skill_manager.vocabulary.save)
+    
     async def _load_model(self):
-        """Load model in thread pool"""
+        """Load model in thread pool (PyTorch, or ONNX Runtime per EMBEDDING_BACKEND)"""
         import os
+        from app.config import settings
         os.environ['TOKENIZERS_PARALLELISM'] = 'false'
         
         loop = asyncio.get_event_loop()
         
         def load_sync():
             try:
-                model = SentenceTransformer(self.model_name, device='cpu')
+                model = load_sentence_encoder(
+                    self.model_name,
+                    backend=settings.EMBEDDING_BACKEND,
+                    device='cpu',
+                    cache_dir=settings.EMBEDDING_ONNX_CACHE_DIR,
+                    quantize=settings.EMBEDDING_ONNX_QUANTIZE
+                )
                 # Warmup
                 model.encode("warmup text", convert_to_numpy=True)
                 return model
@@ -1658,8 +2952,26 @@ class YuvaSetuRecommendationEngine:
         
         if self._model:
             self.embedding_dim = self._model.get_sentence_embedding_dimension()
+            self._encoder = self._create_encoder()
             logger.info(f"✅ Model loaded: dim={self.embedding_dim}")
     
+    def _create_encoder(self) -> Optional[MicroBatchEncoder]:
+        """Micro-batcher for per-request encodes (None when disabled)"""
+        if not self.config.EMBEDDING_BATCHING_ENABLED:
+            return None
+        return MicroBatchEncoder(
+            lambda texts: self._model.encode(
+                texts,
+                batch_size=self.config.EMBEDDING_BATCH_MAX_SIZE,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ),
+            max_batch_size=self.config.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=self.config.EMBEDDING_BATCH_MAX_WAIT_MS,
+            max_queue_size=self.config.EMBEDDING_QUEUE_MAX_SIZE,
+            name="student-embeddings"
+        )
+    
     async def load_employer_data(self) -> bool:
         """Load internships from employer database"""
         try:
@@ -1680,35 +2992,11 @@ class YuvaSetuRecommendationEngine:
                 return False
             
             logger.info("Fetching internships from database...")
-            # First check count to avoid loading too many at once
+            # Count only sizes the column buffers; the stream reads until exhausted
             total_count = await collection.count_documents({})
             logger.info(f"Found {total_count} total internships in database")
             
-            cursor = collection.find({})
-            # Add timeout and limit to prevent hanging on large datasets
-            try:
-                logger.info("Loading all internships from cursor...")
-                internships = await asyncio.wait_for(cursor.to_list(length=None), timeout=60.0)
-                logger.info(f"✅ Successfully loaded {len(internships)} internships")
-            except asyncio.TimeoutError:
-                logger.error("❌ Database query timed out after 60s")
-                # Try to get at least some internships with a limit
-                logger.info("Attempting to load limited set of internships...")
-                try:
-                    limited_cursor = collection.find({}).limit(100)
-                    internships = await limited_cursor.to_list(length=100)
-                    logger.warning(f"⚠️ Loaded only {len(internships)} internships due to timeout")
-                except Exception as e2:
-                    logger.error(f"❌ Failed to load even limited set: {e2}")
-                    return False
-            
-            if not internships:
-                logger.warning("No internships found")
-                return False
-            
-            logger.info(f"Found {len(internships)} internships, processing...")
-            
-            return await self._process_internships_batch(internships)
+            return await self._stream_internships(collection, total_count)
             
         except Exception as e:
             logger.error(f"Failed to load employer data: {e}")
@@ -1716,6 +3004,57 @@ class YuvaSetuRecommendationEngine:
             logger.error(traceback.format_exc())
             return False
     
+    async def _stream_internships(self, collection, expected_count: int) -> bool:
+        """
+        Build the index from a cursor, one batch at a time.
+        
+        Only INTERNSHIP_PROJECTION fields are fetched. While one batch is being
+        normalized and embedded, the next is fetched; rows go straight into
+        preallocated column buffers. A stalled batch aborts the load instead of
+        publishing a truncated catalogue.
+        """
+        batch_size = self.config.LOAD_CURSOR_BATCH_SIZE
+        buffer = InternshipColumnBuffer(self.embedding_dim, expected_count)
+        sync_marks: List[Dict] = []
+        pending: Optional[asyncio.Future] = None
+        
+        cursor = collection.find({}, INTERNSHIP_PROJECTION).batch_size(batch_size)
+        try:
+            while True:
+                try:
+                    batch = await asyncio.wait_for(
+                        cursor.to_list(length=batch_size),
+                        timeout=self.config.LOAD_BATCH_TIMEOUT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    logger.error(
+                        f"❌ Internship batch timed out after {self.config.LOAD_BATCH_TIMEOUT_SECONDS}s "
+                        f"({len(buffer)} loaded), keeping the current index"
+                    )
+                    return False
+                
+                if pending is not None:
+                    buffer.append(*await pending)
+                    pending = None
+                
+                if not batch:
+                    break
+                
+                sync_marks.extend({"_id": doc.get("_id"), "updated_at": doc.get("updated_at")} for doc in batch)
+                pending = asyncio.ensure_future(self._prepare_internship_rows(batch))
+                logger.info(f"Fetched {len(buffer) + len(batch)}/{expected_count} internships")
+        finally:
+            if pending is not None:
+                pending.cancel()
+            await cursor.close()
+        
+        if not len(buffer):
+            logger.warning("No internships found")
+            return False
+        
+        logger.info(f"✅ Streamed {len(buffer)} internships")
+        return await self._install_buffer(buffer, sync_marks)
+    
     async def _find_internships_collection(self, db):
         """Find the internships collection"""
         collection_names = ["internships", "jobs", "postings", "opportunities"]
@@ -1747,126 +3086,137 @@ class YuvaSetuRecommendationEngine:
         
         return None
     
-    async def _process_internships_batch(self, internships: List[Dict]) -> bool:
-        """Process internships with batch embedding generation"""
-        try:
-            with_embedding = []
-            without_embedding = []
-            
-            for internship in internships:
-                stored = internship.get("embedding")
-                if stored and isinstance(stored, list) and len(stored) == self.embedding_dim:
-                    with_embedding.append(internship)
-                else:
-                    without_embedding.append(internship)
-            
-            logger.info(f"Embeddings: {len(with_embedding)} pre-computed, {len(without_embedding)} to generate")
-            
-            internship_ids = []
-            internship_data = {}
-            internship_vectors = {}
-            skill_vectors = []
-            location_vectors = []
-            stipend_vectors = []
-            timeline_vectors = []
-            
-            # Process with pre-computed embeddings
-            for internship in with_embedding:
-                internship_id = str(internship["_id"])
+    async def _process_internships_batch(self, internships: List[Dict]) -> bool:
+        """Process internships with batch embedding generation"""
+        try:
+            buffer = InternshipColumnBuffer(self.embedding_dim, len(internships))
+            buffer.append(*await self._prepare_internship_rows(internships))
+            return await self._install_buffer(buffer, internships)
+            
+        except Exception as e:
+            logger.error(f"Batch processing failed: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return False
+    
+    async def _install_buffer(self, buffer: InternshipColumnBuffer, sync_marks: List[Dict]) -> bool:
+        """Build and publish indices from loaded rows, reset the sync mark and persist them"""
+        skill_matrix, location_matrix, stipend_column, timeline_column = buffer.columns()
+        
+        loop = asyncio.get_event_loop()
+        success = await loop.run_in_executor(
+            _thread_pool, self._index_manager.build_indices,
+            skill_matrix, location_matrix, stipend_column, timeline_column,
+            buffer.internship_ids, buffer.internship_data
+        )
+        
+        if success:
+            self._index_manager.sync_state = {"updated_at": None, "last_id": None}
+            self._index_manager.advance_sync_state(sync_marks)
+            self.last_refresh = datetime.utcnow()
+            await self._persist_index(save_vocabulary=True)
+        
+        return success
+    
+    async def _persist_index(self, save_vocabulary: bool = False):
+        """Write the published snapshot (and optionally the skill vocabulary) in the thread pool"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(_thread_pool, self._index_manager.save_to_disk)
+        if save_vocabulary and self._skill_manager is not None:
+            await loop.run_in_executor(_thread_pool, self._skill_manager.vocabulary.save)
+    
+    async def _prepare_internship_rows(
+        self,
+        internships: List[Dict]
+    ) -> Tuple[List[str], Dict[str, Dict], Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Normalize internships and compute their per-dimension vectors.
+        Documents without a stored embedding are encoded in one batch.
+        """
+        with_embedding = []
+        without_embedding = []
+        
+        for internship in internships:
+            stored = internship.get("embedding")
+            if stored and isinstance(stored, list) and len(stored) == self.embedding_dim:
+                with_embedding.append(internship)
+            else:
+                without_embedding.append(internship)
+        
+        logger.info(f"Embeddings: {len(with_embedding)} pre-computed, {len(without_embedding)} to generate")
+        
+        skill_vectors: Dict[str, np.ndarray] = {}
+        normalized_by_id: Dict[str, Dict] = {}
+        
+        # Process with pre-computed embeddings
+        for internship in with_embedding:
+            internship_id = str(internship["_id"])
+            normalized_by_id[internship_id] = self._normalize_employer_internship(internship)
+            skill_vectors[internship_id] = np.array(internship["embedding"], dtype='float32').reshape(1, -1)
+        
+        # Batch process without embeddings
+        if without_embedding:
+            texts_to_encode = []
+            for internship in without_embedding:
                 normalized = self._normalize_employer_internship(internship)
+                normalized_by_id[str(internship["_id"])] = normalized
                 
-                internship_ids.append(internship_id)
-                internship_data[internship_id] = normalized
-                
-                skill_vec = np.array(internship["embedding"], dtype='float32').reshape(1, -1)
-                loc_vec = self._get_location_vector(normalized)
-                stip_vec = self._get_stipend_vector(normalized)
-                time_vec = self._get_timeline_vector(normalized)
-                
-                internship_vectors[internship_id] = {
-                    "skill_vector": skill_vec,
-                    "location_vector": loc_vec,
-                    "stipend_vector": stip_vec,
-                    "timeline_vector": time_vec
-                }
-                
-                skill_vectors.append(skill_vec)
-                location_vectors.append(loc_vec)
-                stipend_vectors.append(stip_vec)
-                timeline_vectors.append(time_vec)
-            
-            # Batch process without embeddings
-            if without_embedding:
-                texts_to_encode = []
-                for internship in without_embedding:
-                    normalized = self._normalize_employer_internship(internship)
-                    
-                    skills = normalized.get("skills", [])
-                    title = normalized.get("title", "")
-                    description = str(normalized.get("description", ""))[:300]
-                    category = normalized.get("category", "")
-                    
-                    text = f"{title} {' '.join(skills) if isinstance(skills, list) else skills} {description} {category}"
-                    texts_to_encode.append(text.strip() or "internship opportunity")
+                skills = normalized.get("skills", [])
+                title = normalized.get("title", "")
+                description = str(normalized.get("description", ""))[:300]
+                category = normalized.get("category", "")
                 
-                # Batch encode
-                loop = asyncio.get_event_loop()
-                embeddings = await loop.run_in_executor(
-                    _thread_pool,
-                    lambda: self._model.encode(
-                        texts_to_encode,
-                        batch_size=self.config.BATCH_ENCODING_SIZE,
-                        convert_to_numpy=True,
-                        show_progress_bar=False
-                    )
+                text = f"{title} {' '.join(skills) if isinstance(skills, list) else skills} {description} {category}"
+                texts_to_encode.append(text.strip() or "internship opportunity")
+            
+            # Batch encode
+            loop = asyncio.get_event_loop()
+            embeddings = await loop.run_in_executor(
+                _thread_pool,
+                lambda: self._model.encode(
+                    texts_to_encode,
+                    batch_size=self.config.BATCH_ENCODING_SIZE,
+                    convert_to_numpy=True,
+                    show_progress_bar=False
                 )
-                
-                for i, internship in enumerate(without_embedding):
-                    internship_id = str(internship["_id"])
-                    normalized = self._normalize_employer_internship(internship)
-                    
-                    internship_ids.append(internship_id)
-                    internship_data[internship_id] = normalized
-                    
-                    skill_vec = embeddings[i].reshape(1, -1).astype('float32')
-                    loc_vec = self._get_location_vector(normalized)
-                    stip_vec = self._get_stipend_vector(normalized)
-                    time_vec = self._get_timeline_vector(normalized)
-                    
-                    internship_vectors[internship_id] = {
-                        "skill_vector": skill_vec,
-                        "location_vector": loc_vec,
-                        "stipend_vector": stip_vec,
-                        "timeline_vector": time_vec
-                    }
-                    
-                    skill_vectors.append(skill_vec)
-                    location_vectors.append(loc_vec)
-                    stipend_vectors.append(stip_vec)
-                    timeline_vectors.append(time_vec)
-            
-            # Build indices
-            skill_matrix = np.vstack(skill_vectors).astype('float32')
-            location_matrix = np.vstack(location_vectors).astype('float32')
-            stipend_matrix = np.vstack(stipend_vectors).astype('float32')
-            timeline_matrix = np.vstack(timeline_vectors).astype('float32')
-            
-            success = self._index_manager.build_indices(
-                skill_matrix, location_matrix, stipend_matrix, timeline_matrix,
-                internship_ids, internship_data, internship_vectors
             )
             
-            if success:
-                self._index_manager.save_to_disk()
-                self.last_refresh = datetime.utcnow()
-            
-            return success
+            for i, internship in enumerate(without_embedding):
+                skill_vectors[str(internship["_id"])] = embeddings[i].reshape(1, -1).astype('float32')
+        
+        internship_ids = []
+        internship_data = {}
+        internship_vectors = {}
+        
+        # Keep the original document order
+        for internship in internships:
+            internship_id = str(internship["_id"])
+            if internship_id in internship_data:
+                continue
+            normalized = normalized_by_id[internship_id]
             
-        except Exception as e:
-            logger.error(f"Batch processing failed: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            return False
+            internship_ids.append(internship_id)
+            internship_data[internship_id] = normalized
+            internship_vectors[internship_id] = {
+                "skill_vector": skill_vectors[internship_id],
+                "location_vector": self._get_location_vector(normalized),
+                "stipend_vector": self._get_stipend_vector(normalized),
+                "timeline_vector": self._get_timeline_vector(normalized)
+            }
+        
+        # Keep the skill vocabulary covering every catalogue skill
+        if self._skill_manager is not None:
+            catalogue_skills = [
+                skill
+                for data in internship_data.values()
+                for skill in (data.get("skills") or [])
+                if isinstance(skill, str)
+            ]
+            if catalogue_skills:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(_thread_pool, self._skill_manager.graph.add, catalogue_skills)
+        
+        return internship_ids, internship_data, internship_vectors
     
     def _normalize_employer_internship(self, internship: Dict) -> Dict:
         """Normalize internship data"""
@@ -1944,6 +3294,7 @@ class YuvaSetuRecommendationEngine:
             "applications": internship.get("applications", 0),
             "saves": internship.get("saves", 0),
             "created_at": internship.get("created_at").isoformat() if internship.get("created_at") and isinstance(internship.get("created_at"), datetime) else (internship.get("created_at") if internship.get("created_at") else None),
+            "updated_at": internship.get("updated_at").isoformat() if isinstance(internship.get("updated_at"), datetime) else internship.get("updated_at"),
             "location_coordinates": internship.get("location_coordinates"),
             "employer_uid": internship.get("employer_uid"),
         }
@@ -2054,11 +3405,38 @@ class YuvaSetuRecommendationEngine:
             "preferred_stipend": getattr(user, 'preferred_stipend', None)
         }
     
-    def _generate_student_vectors(self, user: User, profile_data: Dict) -> Dict[str, np.ndarray]:
-        """Generate vectors for a student"""
-        vectors = {}
+    def _generate_student_vectors(
+        self,
+        profile_data: Dict,
+        skill_vector: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """Generate vectors for a student, encoding the skill text unless already encoded"""
+        if skill_vector is None:
+            skill_vector = self._model.encode(self._student_skill_text(profile_data), convert_to_numpy=True)
+        skill_vector = np.array(skill_vector, dtype='float32').reshape(1, -1)
+        faiss.normalize_L2(skill_vector)
+        return self._student_vectors_from(skill_vector.astype('float32'), profile_data)
+    
+    def _generate_student_vectors_batch(self, profiles: List[Dict]) -> List[Dict[str, np.ndarray]]:
+        """Generate vectors for many students with one batched encode"""
+        if not profiles:
+            return []
         
-        # Build skill text
+        skill_vectors = np.asarray(self._model.encode(
+            [self._student_skill_text(profile_data) for profile_data in profiles],
+            batch_size=self.config.BATCH_ENCODING_SIZE,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ), dtype='float32').reshape(len(profiles), -1)
+        faiss.normalize_L2(skill_vectors)
+        
+        return [
+            self._student_vectors_from(skill_vectors[i:i + 1].copy(), profile_data)
+            for i, profile_data in enumerate(profiles)
+        ]
+    
+    def _student_skill_text(self, profile_data: Dict) -> str:
+        """Text encoded into a student's skill vector"""
         skill_texts = []
         
         for skill in profile_data.get("skills", []):
@@ -2083,11 +3461,11 @@ class YuvaSetuRecommendationEngine:
         if profile_data.get("career_objective"):
             skill_texts.append(profile_data["career_objective"])
         
-        combined_text = " ".join(skill_texts) if skill_texts else "student seeking internship"
-        
-        skill_vector = self._model.encode(combined_text, convert_to_numpy=True).reshape(1, -1)
-        faiss.normalize_L2(skill_vector)
-        vectors["skill_vector"] = skill_vector.astype('float32')
+        return " ".join(skill_texts) if skill_texts else "student seeking internship"
+    
+    def _student_vectors_from(self, skill_vector: np.ndarray, profile_data: Dict) -> Dict[str, np.ndarray]:
+        """Student vectors around an encoded (normalized) skill vector"""
+        vectors = {"skill_vector": skill_vector}
         
         # Location vector
         loc_coords = profile_data.get("location_coordinates")
@@ -2120,9 +3498,63 @@ class YuvaSetuRecommendationEngine:
         user: User,
         top_k: int = 10,
         filters: Optional[Dict] = None,
-        weights: Optional[Dict[str, float]] = None
+        weights: Optional[Dict[str, float]] = None,
+        include_explanations: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Get personalized recommendations.
+        
+        With include_explanations=False only ranking and scoring is done;
+        callers that paginate should explain the served page afterwards with
+        explain_recommendations().
+        
+        Concurrent identical requests (same user, profile, filters and
+        options) share one computation; each caller gets its own copies of
+        the recommendation dicts.
+        """
+        request_key = ":".join([
+            "recs",
+            str(user.id),
+            self._profile_hash(self._extract_user_profile(user)),
+            self._filters_hash(self._active_filters(filters)),
+            str(top_k),
+            str(include_explanations),
+            json.dumps(weights, sort_keys=True) if weights else ""
+        ])
+        
+        recommendations = await self._single_flight(
+            request_key,
+            lambda: self._compute_recommendations_for_student(user, top_k, filters, weights, include_explanations)
+        )
+        return [dict(rec) for rec in recommendations]
+    
+    async def _single_flight(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Await compute() once for all concurrent callers with the same key.
+        The shared task is shielded, so one caller timing out or being
+        cancelled does not cancel it for the others.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(
+                lambda done: self._in_flight.pop(key, None) if self._in_flight.get(key) is done else None
+            )
+        else:
+            self.coalesced_calls += 1
+        
+        return await asyncio.shield(task)
+    
+    async def _compute_recommendations_for_student(
+        self,
+        user: User,
+        top_k: int,
+        filters: Optional[Dict],
+        weights: Optional[Dict[str, float]],
+        include_explanations: bool
     ) -> List[Dict[str, Any]]:
-        """Get personalized recommendations with detailed explanations"""
+        """Recommendation pipeline behind get_recommendations_for_student"""
         logger.info(f"🎯 get_recommendations_for_student called for user {user.id}, top_k={top_k}")
         
         if not self.is_initialized():
@@ -2165,11 +3597,12 @@ class YuvaSetuRecommendationEngine:
         except Exception as e:
             logger.warning(f"⚠️ Refresh check error: {e}, continuing anyway...")
         
-        logger.info("⚖️ Loading weights...")
-        # Load weights
-        if not weights:
-            weights = await self.load_feedback_adjusted_weights()
-        logger.info("✅ Weights loaded")
+        # Weights come from memory; the version is reported on every recommendation
+        if weights:
+            weights_version = "custom"
+        else:
+            active_weights = self._weights_registry.get()
+            weights, weights_version = dict(active_weights.weights), active_weights.version
         
         try:
             logger.info("👤 Extracting user profile...")
@@ -2177,172 +3610,97 @@ class YuvaSetuRecommendationEngine:
             profile_data = self._extract_user_profile(user)
             logger.info("✅ Profile extracted")
             
-            logger.info("🔢 Getting student vectors (cached)...")
-            # Get vectors (with caching)
-            student_vectors = await self._get_student_vectors_cached(user, profile_data)
-            logger.info("✅ Student vectors obtained")
-            
-            if student_vectors is None:
-                logger.warning("❌ Student vectors are None, returning empty list")
-                return []
+            active_filters = self._active_filters(filters)
             
-            logger.info(f"🔍 Starting FAISS search (search_k={min(top_k * self.config.MAX_SEARCH_K_MULTIPLIER, self._index_manager.total_internships)})...")
-            # Search
-            search_k = min(top_k * self.config.MAX_SEARCH_K_MULTIPLIER, self._index_manager.total_internships)
+            # Pin one snapshot for the whole request; refreshes publish new ones
+            snapshot = self._index_manager.snapshot
+            self._sync_result_cache(snapshot)
             
-            skill_scores, skill_indices = self._index_manager.search(
-                student_vectors["skill_vector"], "skill", search_k
-            )
-            logger.info("✅ Skill search complete")
+            # Repeat visits and later pages reuse the ranked list for this
+            # (profile, catalogue contents, weights version, filters)
+            result_key = None
+            if weights_version != "custom":
+                result_key = self._result_cache_key(user, profile_data, snapshot, active_filters, weights_version)
+            cached_ranking = self._result_cache.get(result_key) if result_key else None
             
-            location_scores, location_indices = self._index_manager.search(
-                student_vectors["location_vector"], "location", search_k
-            )
-            logger.info("✅ Location search complete")
+            # Default (unfiltered) dashboards may have been ranked by the batch job
+            if cached_ranking is None and result_key and not active_filters and self.config.PRECOMPUTED_ENABLED:
+                cached_ranking = await self._get_precomputed_ranking(
+                    user, profile_data, snapshot, weights_version, top_k
+                )
+                if cached_ranking is not None:
+                    logger.info("✅ Using precomputed ranking")
+                    self._result_cache.set(result_key, cached_ranking)
             
-            logger.info("📊 Aggregating scores from search results...")
-            # Aggregate scores
-            candidates = {}
+            missing_data_count = filtered_count = threshold_filtered_count = 0
+            sorted_candidates: List[Tuple[str, Dict[str, float]]] = []
             
-            for i in range(skill_indices.shape[1]):
-                idx = int(skill_indices[0][i])
-                if idx < 0 or idx >= len(self._index_manager.internship_ids):
-                    continue
-                
-                internship_id = self._index_manager.internship_ids[idx]
-                
-                skill_score = self._clamp(float(skill_scores[0][i]))
-                # Ensure minimum skill score to avoid zero matches
-                if skill_score < 0.1:
-                    skill_score = 0.1  # Minimum 10% skill match
-                
-                loc_score = self._find_score_for_index(idx, location_indices[0], location_scores[0])
-                if loc_score == 0:
-                    loc_score = 0.5  # Default location score
-                
-                # Improved default scores to ensure reasonable matches
-                stipend_score = 0.7  # Increased from 0.6
-                timeline_score = 0.6  # Increased from 0.5
+            if cached_ranking is not None and (cached_ranking["top_k"] >= top_k or cached_ranking["exhausted"]):
+                logger.info("✅ Ranking served from result cache")
+                selected = []
+                for internship_id, scores, match_percentage in cached_ranking["selected"]:
+                    internship = snapshot.internship_data.get(internship_id)
+                    if not internship:
+                        continue
+                    selected.append((internship_id, internship, scores, match_percentage))
+                    if len(selected) >= top_k:
+                        break
+            else:
+                logger.info("🔢 Getting student vectors (cached)...")
+                # Get vectors (with caching)
+                student_vectors = await self._get_student_vectors_cached(user, profile_data)
+                logger.info("✅ Student vectors obtained")
                 
-                # Apply filter adjustments
-                internship = self._index_manager.internship_data.get(internship_id)
-                if internship and filters:
-                    filter_boost = self._calculate_filter_boost(internship, filters)
-                    skill_score = min(1.0, skill_score * filter_boost)
+                if student_vectors is None:
+                    logger.warning("❌ Student vectors are None, returning empty list")
+                    return []
                 
-                weighted_score = (
-                    skill_score * weights["skills"] +
-                    loc_score * weights["location"] +
-                    stipend_score * weights["stipend"] +
-                    timeline_score * weights["timeline"]
+                # Scoring is O(catalogue); keep it off the event loop
+                loop = asyncio.get_event_loop()
+                selected, sorted_candidates, counts = await loop.run_in_executor(
+                    _thread_pool,
+                    self._rank_candidates,
+                    student_vectors, weights, snapshot, active_filters, top_k
                 )
+                missing_data_count, filtered_count, threshold_filtered_count = counts
                 
-                if internship_id not in candidates or weighted_score > candidates[internship_id]["weighted_score"]:
-                    candidates[internship_id] = {
-                        "weighted_score": weighted_score,
-                        "skill_score": skill_score,
-                        "location_score": loc_score,
-                        "stipend_score": stipend_score,
-                        "timeline_score": timeline_score
-                    }
-            
-            # Sort
-            sorted_candidates = sorted(
-                candidates.items(),
-                key=lambda x: x[1]["weighted_score"],
-                reverse=True
-            )
+                if result_key and selected:
+                    self._result_cache.set(result_key, {
+                        "top_k": top_k,
+                        "exhausted": len(selected) < top_k,
+                        "selected": [(internship_id, scores, match_percentage) for internship_id, _, scores, match_percentage in selected],
+                    })
             
-            logger.info(f"🏗️ Building recommendations from {len(sorted_candidates)} candidates...")
-            # Build recommendations
             recommendations = []
-            filtered_count = 0
-            missing_data_count = 0
-            threshold_filtered_count = 0
             
-            for internship_id, scores in sorted_candidates:
-                match_percentage = self._score_to_percentage(scores["weighted_score"])
-                
-                # Check threshold
-                if match_percentage < self.config.MIN_MATCH_THRESHOLD:
-                    threshold_filtered_count += 1
-                    if threshold_filtered_count == 1:  # Log first one
-                        logger.debug(f"First candidate below threshold: {internship_id} = {match_percentage}% (threshold: {self.config.MIN_MATCH_THRESHOLD}%)")
-                    continue
-                
-                internship = self._index_manager.internship_data.get(internship_id)
-                if not internship:
-                    missing_data_count += 1
-                    if missing_data_count == 1:  # Log first one
-                        logger.warning(f"Internship data missing for ID: {internship_id} (match: {match_percentage}%)")
-                    continue
-                
-                # Apply filters (only if filters are provided and not empty)
-                if filters:
-                    # Remove empty/None filters
-                    active_filters = {k: v for k, v in filters.items() if v is not None and v != "" and v != 0}
-                    if active_filters and not self._apply_filters(internship, active_filters):
-                        filtered_count += 1
-                        if filtered_count == 1:  # Log first one
-                            logger.debug(f"Filtered out {internship_id}: {match_percentage}% (active filters: {active_filters})")
-                        continue
-                
-                # Generate explanation (with timeout protection)
-                try:
-                    logger.debug(f"Generating explanation for {internship_id}...")
-                    explanation = self._explanation_generator.generate_explanation(
-                        user, internship, scores, profile_data
+            if selected and not include_explanations:
+                for internship_id, internship, scores, match_percentage in selected:
+                    recommendations.append(
+                        self._build_recommendation(internship_id, internship, scores, match_percentage, None, weights_version)
                     )
-                    logger.debug(f"✅ Explanation generated for {internship_id}")
-                except Exception as exc:
-                    logger.warning(f"Failed to generate explanation for {internship_id}: {exc}")
-                    # Create a basic explanation instead
-                    explanation = MatchExplanation(
-                        recommendation_reasons=[f"Match score: {match_percentage}%"],
-                        summary=f"Good match based on your profile"
+            
+            # Generate all explanations in one batched pass off the event loop
+            elif selected:
+                logger.info(f"🧠 Generating explanations for {len(selected)} candidates...")
+                await self._ensure_skills(profile_data.get("skills", []))
+                loop = asyncio.get_event_loop()
+                explanations = await loop.run_in_executor(
+                    _thread_pool,
+                    lambda: self._explanation_generator.generate_explanations_batch(
+                        user,
+                        [(internship, scores) for _, internship, scores, _ in selected],
+                        profile_data
                     )
+                )
                 
-                recommendation = {
-                    "id": internship_id,
-                    "title": internship.get("title", "Untitled Internship"),
-                    "company": internship.get("company", "Unknown Company"),
-                    "location": internship.get("location", "Remote"),
-                    "city": internship.get("city", ""),
-                    "state": internship.get("state", ""),
-                    "stipend": internship.get("stipend", 0),
-                    "stipend_currency": internship.get("stipend_currency", "INR"),
-                    "duration": internship.get("duration", "Flexible"),
-                    "duration_months": internship.get("duration_months", 3),
-                    "work_type": internship.get("work_type", "Remote"),
-                    "description": internship.get("description", ""),
-                    "requirements": internship.get("requirements", []),
-                    "skills": internship.get("skills", []),
-                    "is_remote": internship.get("is_remote", False),
-                    "category": internship.get("category", "General"),
-                    "sector": internship.get("sector", ""),
-                    "apply_url": internship.get("apply_url", "#"),
-                    "match_percentage": match_percentage,
-                    "score_breakdown": {
-                        "skills": self._score_to_percentage(scores["skill_score"], 1),
-                        "location": self._score_to_percentage(scores["location_score"], 1),
-                        "stipend": self._score_to_percentage(scores["stipend_score"], 1),
-                        "timeline": self._score_to_percentage(scores["timeline_score"], 1)
-                    },
-                    "match_reasons": explanation.recommendation_reasons,
-                    "detailed_explanation": self._explanation_generator.to_dict(explanation),
-                    "has_applied": False,
-                    "status": internship.get("status", "active"),
-                    "is_featured": internship.get("is_featured", False),
-                    "is_verified": internship.get("is_verified", False),
-                    "views": internship.get("views", 0),
-                    "applications": internship.get("applications", 0),
-                    "created_at": internship.get("created_at").isoformat() if internship.get("created_at") and isinstance(internship.get("created_at"), datetime) else (internship.get("created_at") if internship.get("created_at") else None),
-                }
-                
-                recommendations.append(recommendation)
-                
-                if len(recommendations) >= top_k:
-                    break
+                for (internship_id, internship, scores, match_percentage), explanation in zip(selected, explanations):
+                    if explanation is None:
+                        # Create a basic explanation instead
+                        explanation = self._basic_explanation(match_percentage)
+                    
+                    recommendations.append(
+                        self._build_recommendation(internship_id, internship, scores, match_percentage, explanation, weights_version)
+                    )
             
             logger.info(f"✅ Generated {len(recommendations)} recommendations (threshold: {self.config.MIN_MATCH_THRESHOLD}%, from {len(sorted_candidates)} candidates)")
             logger.info(f"📊 Filtering stats: {threshold_filtered_count} below threshold, {missing_data_count} missing data, {filtered_count} filtered by active filters")
@@ -2364,7 +3722,7 @@ class YuvaSetuRecommendationEngine:
                     for internship_id, scores in sorted_candidates[:top_k]:
                         match_percentage = self._score_to_percentage(scores["weighted_score"])
                         if match_percentage >= self.config.MIN_MATCH_THRESHOLD:
-                            internship = self._index_manager.internship_data.get(internship_id)
+                            internship = snapshot.internship_data.get(internship_id)
                             if internship:
                                 # Create basic recommendation without explanation
                                 basic_rec = {
@@ -2395,6 +3753,7 @@ class YuvaSetuRecommendationEngine:
                                     "explanation_summary": f"Good match based on your profile",
                                     "has_applied": False,
                                     "status": internship.get("status", "active"),
+                                    "weights_version": weights_version,
                                 }
                                 recommendations.append(basic_rec)
                                 if len(recommendations) >= top_k:
@@ -2419,31 +3778,657 @@ class YuvaSetuRecommendationEngine:
     ) -> Optional[Dict[str, np.ndarray]]:
         """Get student vectors with smart caching"""
         try:
-            cached = self._student_cache.get_cached_vectors(user)
+            # New skills are compared by embedding; encode them here through
+            # the batcher, then run the comparison in the pool
+            await self._ensure_skills(profile_data.get("skills", []))
+            loop = asyncio.get_event_loop()
+            cached = await loop.run_in_executor(
+                _thread_pool, self._student_cache.get_cached_vectors, user
+            )
+            
+            if cached is not None:
+                logger.debug(f"Using cached vectors for user {user.id}")
+                return cached
+            
+            # Concurrent misses for the same profile share one lookup/encode
+            return await self._single_flight(
+                f"vectors:{user.id}:{self._profile_hash(profile_data)}",
+                lambda: self._load_student_vectors(user, profile_data)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error getting student vectors: {e}")
+            return None
+    
+    async def _ensure_skills(self, skills: List[str]):
+        """Add a student's unknown skills to the vocabulary before pool work compares them"""
+        if self._skill_manager is not None and skills:
+            await self._skill_manager.vocabulary.ensure_async(skills)
+    
+    async def _load_student_vectors(self, user: User, profile_data: Dict) -> Dict[str, np.ndarray]:
+        """Student vectors from the shared store, else encoded and stored in both tiers"""
+        loop = asyncio.get_event_loop()
+        shared = await loop.run_in_executor(
+            _thread_pool, self._student_cache.get_shared_vectors, user, profile_data
+        )
+        if shared is not None:
+            logger.debug(f"Using shared cached vectors for user {user.id}")
+            return shared
+        
+        # Encode on the loop through the micro-batcher so concurrent misses
+        # share a batch; only the cheap vector assembly runs in the pool
+        skill_vector = None
+        if self._encoder is not None:
+            try:
+                skill_vector = await self._encoder.encode_async(self._student_skill_text(profile_data))
+            except EmbeddingQueueFullError:
+                logger.debug("Encode queue full, encoding student directly")
+        
+        vectors = await loop.run_in_executor(
+            _thread_pool, self._generate_student_vectors, profile_data, skill_vector
+        )
+        
+        await loop.run_in_executor(
+            _thread_pool, self._student_cache.store_vectors, user, vectors, profile_data
+        )
+        logger.debug(f"Generated and cached vectors for user {user.id}")
+        
+        return vectors
+    
+    def _build_recommendation(
+        self,
+        internship_id: str,
+        internship: Dict,
+        scores: Dict[str, float],
+        match_percentage: float,
+        explanation: Optional[MatchExplanation],
+        weights_version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the API recommendation payload for a scored internship"""
+        return {
+            "id": internship_id,
+            "title": internship.get("title", "Untitled Internship"),
+            "company": internship.get("company", "Unknown Company"),
+            "location": internship.get("location", "Remote"),
+            "city": internship.get("city", ""),
+            "state": internship.get("state", ""),
+            "stipend": internship.get("stipend", 0),
+            "stipend_currency": internship.get("stipend_currency", "INR"),
+            "duration": internship.get("duration", "Flexible"),
+            "duration_months": internship.get("duration_months", 3),
+            "work_type": internship.get("work_type", "Remote"),
+            "description": internship.get("description", ""),
+            "requirements": internship.get("requirements", []),
+            "skills": internship.get("skills", []),
+            "is_remote": internship.get("is_remote", False),
+            "category": internship.get("category", "General"),
+            "sector": internship.get("sector", ""),
+            "apply_url": internship.get("apply_url", "#"),
+            "match_percentage": match_percentage,
+            "score_breakdown": {
+                "skills": self._score_to_percentage(scores["skill_score"], 1),
+                "location": self._score_to_percentage(scores["location_score"], 1),
+                "stipend": self._score_to_percentage(scores["stipend_score"], 1),
+                "timeline": self._score_to_percentage(scores["timeline_score"], 1)
+            },
+            "match_reasons": explanation.recommendation_reasons if explanation else [],
+            "detailed_explanation": self._explanation_generator.to_dict(explanation) if explanation else None,
+            "has_applied": False,
+            "status": internship.get("status", "active"),
+            "is_featured": internship.get("is_featured", False),
+            "is_verified": internship.get("is_verified", False),
+            "views": internship.get("views", 0),
+            "applications": internship.get("applications", 0),
+            "created_at": internship.get("created_at").isoformat() if internship.get("created_at") and isinstance(internship.get("created_at"), datetime) else (internship.get("created_at") if internship.get("created_at") else None),
+            "weights_version": weights_version,
+        }
+    
+    def _explanation_cache_key(self, user: User, profile_data: Dict, internship_id: str) -> str:
+        """Cache key for an explanation; includes skills so any profile edit misses"""
+        data_str = json.dumps(profile_data, sort_keys=True, default=str)
+        profile_hash = hashlib.md5(data_str.encode()).hexdigest()
+        return f"{user.id}:{profile_hash}:{internship_id}"
+    
+    def _score_internship(
+        self,
+        student_vectors: Dict[str, np.ndarray],
+        internship_id: str,
+        weights: Dict[str, float]
+    ) -> Optional[Dict[str, float]]:
+        """Score a single indexed internship the same way the ranking pass does"""
+        snapshot = self._index_manager.snapshot
+        idx = snapshot.internship_id_to_index.get(internship_id)
+        if idx is None or idx >= len(snapshot.skill_matrix):
+            return None
+        
+        row_scores = self._score_rows(student_vectors, weights, snapshot, rows=np.array([idx]))
+        return {name: float(values[0]) for name, values in row_scores.items()}
+    
+    def _score_rows(
+        self,
+        student_vectors: Dict[str, np.ndarray],
+        weights: Dict[str, float],
+        snapshot: IndexSnapshot,
+        rows: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized scoring over the snapshot's column store.
+        
+        Scores all internships (or only `rows`) in one pass: a matmul for skills
+        and location, distance to the student's preference for stipend and
+        timeline, then the weighted sum. Returns one array per score name.
+        """
+        skill_matrix = snapshot.skill_matrix
+        location_matrix = snapshot.location_matrix
+        stipend_column = snapshot.stipend_column
+        timeline_column = snapshot.timeline_column
+        if rows is not None:
+            skill_matrix = skill_matrix[rows]
+            location_matrix = location_matrix[rows]
+            stipend_column = stipend_column[rows]
+            timeline_column = timeline_column[rows]
+        
+        skill_query = student_vectors["skill_vector"].astype('float32').reshape(-1).copy()
+        query_norm = np.linalg.norm(skill_query)
+        if query_norm > 0:
+            skill_query /= query_norm
+        
+        # Minimum 10% skill match to avoid zero matches
+        skill_scores = np.clip(skill_matrix @ skill_query, 0.1, 1.0)
+        
+        location_scores = np.clip(location_matrix @ student_vectors["location_vector"].reshape(-1), 0.0, 1.0)
+        location_scores[location_scores == 0] = 0.5  # Default location score
+        
+        # Full marks at or above the preferred stipend, linear penalty below it
+        preferred_stipend = float(student_vectors["stipend_vector"].reshape(-1)[0])
+        stipend_scores = 1.0 - np.clip(preferred_stipend - stipend_column, 0.0, 1.0)
+        
+        preferred_timeline = float(student_vectors["timeline_vector"].reshape(-1)[0])
+        timeline_scores = 1.0 - np.clip(np.abs(timeline_column - preferred_timeline), 0.0, 1.0)
+        
+        weighted_scores = (
+            skill_scores * weights["skills"] +
+            location_scores * weights["location"] +
+            stipend_scores * weights["stipend"] +
+            timeline_scores * weights["timeline"]
+        )
+        
+        return {
+            "weighted_score": weighted_scores,
+            "skill_score": skill_scores,
+            "location_score": location_scores,
+            "stipend_score": stipend_scores,
+            "timeline_score": timeline_scores
+        }
+    
+    def _rank_candidates(
+        self,
+        student_vectors: Dict[str, np.ndarray],
+        weights: Dict[str, float],
+        snapshot: IndexSnapshot,
+        active_filters: Dict[str, Any],
+        top_k: int
+    ) -> Tuple[List[Tuple[str, Dict, Dict[str, float], float]], List[Tuple[str, Dict[str, float]]], Tuple[int, int, int]]:
+        """
+        Score, filter and rank a snapshot for one student.
+        Returns the selected (id, internship, scores, match %) rows above the
+        match threshold, all sorted candidates, and the (missing data,
+        filtered, below threshold) counts.
+        """
+        logger.info(f"🔍 Scoring {snapshot.size} internships...")
+        # Score every internship in one vectorized pass
+        all_scores = self._score_rows(student_vectors, weights, snapshot)
+        weighted_scores = all_scores["weighted_score"]
+        eligible = snapshot.has_data.copy()
+        missing_data_count = int(len(eligible) - eligible.sum())
+        filtered_count = 0
+        
+        if active_filters:
+            # Filters become row masks applied before top-k, so restrictive
+            # filters still yield top_k results without over-fetching
+            filter_mask, filter_boost = self._compile_filters(active_filters, snapshot)
+            filtered_count = int((eligible & ~filter_mask).sum())
+            eligible &= filter_mask
+            
+            all_scores["skill_score"] = np.minimum(1.0, all_scores["skill_score"] * filter_boost)
+            weighted_scores = (
+                all_scores["skill_score"] * weights["skills"] +
+                all_scores["location_score"] * weights["location"] +
+                all_scores["stipend_score"] * weights["stipend"] +
+                all_scores["timeline_score"] * weights["timeline"]
+            )
+        
+        weighted_scores = np.where(eligible, weighted_scores, -np.inf)
+        top_rows = self._top_rows(weighted_scores, min(top_k, int(eligible.sum())))
+        logger.info("✅ Scoring complete")
+        
+        candidates = {}
+        for idx in top_rows:
+            idx = int(idx)
+            internship_id = snapshot.internship_ids[idx]
+            candidates[internship_id] = {
+                "weighted_score": float(weighted_scores[idx]),
+                "skill_score": float(all_scores["skill_score"][idx]),
+                "location_score": float(all_scores["location_score"][idx]),
+                "stipend_score": float(all_scores["stipend_score"][idx]),
+                "timeline_score": float(all_scores["timeline_score"][idx])
+            }
+        
+        # Sort
+        sorted_candidates = sorted(
+            candidates.items(),
+            key=lambda x: x[1]["weighted_score"],
+            reverse=True
+        )
+        
+        logger.info(f"🏗️ Building recommendations from {len(sorted_candidates)} candidates...")
+        selected: List[Tuple[str, Dict, Dict[str, float], float]] = []
+        threshold_filtered_count = 0
+        
+        for internship_id, scores in sorted_candidates:
+            match_percentage = self._score_to_percentage(scores["weighted_score"])
+            
+            # Check threshold
+            if match_percentage < self.config.MIN_MATCH_THRESHOLD:
+                threshold_filtered_count += 1
+                if threshold_filtered_count == 1:  # Log first one
+                    logger.debug(f"First candidate below threshold: {internship_id} = {match_percentage}% (threshold: {self.config.MIN_MATCH_THRESHOLD}%)")
+                continue
+            
+            internship = snapshot.internship_data.get(internship_id)
+            if not internship:
+                continue
+            
+            selected.append((internship_id, internship, scores, match_percentage))
+            
+            if len(selected) >= top_k:
+                break
+        
+        return selected, sorted_candidates, (missing_data_count, filtered_count, threshold_filtered_count)
+    
+    def _result_cache_key(
+        self,
+        user: User,
+        profile_data: Dict,
+        snapshot: IndexSnapshot,
+        active_filters: Dict[str, Any],
+        weights_version: Optional[str]
+    ) -> str:
+        """Result cache key; any profile, catalogue, weights or filter change misses"""
+        return (
+            f"{user.id}:{self._profile_hash(profile_data)}:"
+            f"{snapshot.catalogue_id}:{weights_version}:"
+            f"{self._filters_hash(active_filters)}"
+        )
+    
+    @staticmethod
+    def _active_filters(filters: Optional[Dict]) -> Dict[str, Any]:
+        """Drop empty/None filters"""
+        return {k: v for k, v in (filters or {}).items() if v is not None and v != "" and v != 0}
+    
+    @staticmethod
+    def _filters_hash(active_filters: Dict[str, Any]) -> str:
+        """Hash of filters normalized for case and surrounding whitespace"""
+        normalized_filters = {
+            key: value.strip().lower() if isinstance(value, str) else value
+            for key, value in active_filters.items()
+        }
+        return hashlib.md5(json.dumps(normalized_filters, sort_keys=True, default=str).encode()).hexdigest()
+    
+    @staticmethod
+    def _profile_hash(profile_data: Dict) -> str:
+        """Hash of everything a student's ranking is computed from"""
+        return hashlib.md5(json.dumps(profile_data, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def _sync_result_cache(self, snapshot: IndexSnapshot):
+        """Drop cached rankings once a snapshot with different contents is published"""
+        if snapshot.catalogue_id != self._result_cache_catalogue:
+            if self._result_cache_catalogue is not None:
+                self._result_cache.clear()
+            self._result_cache_catalogue = snapshot.catalogue_id
+    
+    def _rank_students_batch(
+        self,
+        student_vectors: List[Dict[str, np.ndarray]],
+        weights: Dict[str, float],
+        snapshot: IndexSnapshot,
+        top_n: int
+    ) -> List[List[Tuple[str, Dict[str, float], float]]]:
+        """
+        Unfiltered top-N for many students at once, scoring blocks of students
+        against the snapshot with one matrix product per block.
+        Matches what _rank_candidates selects for each student without filters.
+        """
+        results: List[List[Tuple[str, Dict[str, float], float]]] = []
+        block_size = max(1, self.config.PRECOMPUTE_SCORE_BLOCK)
+        has_data = snapshot.has_data
+        
+        for start in range(0, len(student_vectors), block_size):
+            block = student_vectors[start:start + block_size]
+            
+            skill_queries = np.vstack([v["skill_vector"].reshape(1, -1) for v in block]).astype('float32')
+            norms = np.linalg.norm(skill_queries, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            skill_scores = np.clip((skill_queries / norms) @ snapshot.skill_matrix.T, 0.1, 1.0)
+            
+            location_queries = np.vstack([v["location_vector"].reshape(1, -1) for v in block])
+            location_scores = np.clip(location_queries @ snapshot.location_matrix.T, 0.0, 1.0)
+            location_scores[location_scores == 0] = 0.5
+            
+            preferred_stipends = np.array([float(v["stipend_vector"].reshape(-1)[0]) for v in block], dtype='float32')
+            stipend_scores = 1.0 - np.clip(preferred_stipends[:, None] - snapshot.stipend_column[None, :], 0.0, 1.0)
+            
+            preferred_timelines = np.array([float(v["timeline_vector"].reshape(-1)[0]) for v in block], dtype='float32')
+            timeline_scores = 1.0 - np.clip(np.abs(snapshot.timeline_column[None, :] - preferred_timelines[:, None]), 0.0, 1.0)
+            
+            weighted_scores = (
+                skill_scores * weights["skills"] +
+                location_scores * weights["location"] +
+                stipend_scores * weights["stipend"] +
+                timeline_scores * weights["timeline"]
+            )
+            weighted_scores = np.where(has_data[None, :], weighted_scores, -np.inf)
+            k = min(top_n, int(has_data.sum()))
+            
+            for i in range(len(block)):
+                ranked = []
+                for idx in self._top_rows(weighted_scores[i], k):
+                    idx = int(idx)
+                    scores = {
+                        "weighted_score": float(weighted_scores[i, idx]),
+                        "skill_score": float(skill_scores[i, idx]),
+                        "location_score": float(location_scores[i, idx]),
+                        "stipend_score": float(stipend_scores[i, idx]),
+                        "timeline_score": float(timeline_scores[i, idx])
+                    }
+                    match_percentage = self._score_to_percentage(scores["weighted_score"])
+                    if match_percentage < self.config.MIN_MATCH_THRESHOLD:
+                        break
+                    ranked.append((snapshot.internship_ids[idx], scores, match_percentage))
+                results.append(ranked)
+        
+        return results
+    
+    async def _get_precomputed_collection(self):
+        """Collection holding precomputed rankings in the student database, or None"""
+        if self._precomputed_collection is None:
+            try:
+                from app.database import get_database
+                db = await get_database()
+                self._precomputed_collection = db[self.config.PRECOMPUTED_COLLECTION]
+            except Exception as e:
+                logger.debug(f"Precomputed recommendations unavailable: {e}")
+        return self._precomputed_collection
+    
+    async def precompute_recommendations(self, users, top_n: Optional[int] = None) -> Dict[str, int]:
+        """
+        Batch job: rank the catalogue for every user in `users` (an async or
+        plain iterable of User) and store each top-N with the profile hash,
+        catalogue version and weights version it was computed against.
+        Users are processed in chunks: one batched encode and one blocked
+        scoring pass per chunk, then one bulk write.
+        """
+        from pymongo import ReplaceOne
+        
+        top_n = top_n or self.config.PRECOMPUTE_TOP_N
+        collection = await self._get_precomputed_collection()
+        if collection is None or not self.has_internships():
+            logger.error("❌ Cannot precompute recommendations: no store or no internships")
+            return {"students": 0, "chunks": 0}
+        
+        snapshot = self._index_manager.snapshot
+        active_weights = self._weights_registry.get()
+        weights = dict(active_weights.weights)
+        loop = asyncio.get_event_loop()
+        stats = {"students": 0, "chunks": 0}
+        
+        async def store_chunk(chunk: List[User]):
+            profiles = [self._extract_user_profile(user) for user in chunk]
+            vectors = await loop.run_in_executor(_thread_pool, self._generate_student_vectors_batch, profiles)
+            rankings = await loop.run_in_executor(
+                _thread_pool, self._rank_students_batch, vectors, weights, snapshot, top_n
+            )
+            
+            computed_at = datetime.utcnow()
+            await collection.bulk_write([
+                ReplaceOne({"_id": str(user.id)}, {
+                    "_id": str(user.id),
+                    "profile_hash": self._profile_hash(profile_data),
+                    "catalogue_id": snapshot.catalogue_id,
+                    "catalogue_version": snapshot.catalogue_version,
+                    "weights_version": active_weights.version,
+                    "top_n": top_n,
+                    "items": [
+                        {"id": internship_id, "scores": scores, "match_percentage": match_percentage}
+                        for internship_id, scores, match_percentage in ranking
+                    ],
+                    "computed_at": computed_at,
+                }, upsert=True)
+                for user, profile_data, ranking in zip(chunk, profiles, rankings)
+            ], ordered=False)
+            
+            stats["students"] += len(chunk)
+            stats["chunks"] += 1
+            logger.info(f"Precomputed recommendations for {stats['students']} students")
+        
+        chunk: List[User] = []
+        if hasattr(users, "__aiter__"):
+            async for user in users:
+                chunk.append(user)
+                if len(chunk) >= self.config.PRECOMPUTE_CHUNK_SIZE:
+                    await store_chunk(chunk)
+                    chunk = []
+        else:
+            for user in users:
+                chunk.append(user)
+                if len(chunk) >= self.config.PRECOMPUTE_CHUNK_SIZE:
+                    await store_chunk(chunk)
+                    chunk = []
+        if chunk:
+            await store_chunk(chunk)
+        
+        logger.info(f"✅ Precomputed catalogue v{snapshot.catalogue_version} rankings for {stats['students']} students")
+        return stats
+    
+    async def _get_precomputed_ranking(
+        self,
+        user: User,
+        profile_data: Dict,
+        snapshot: IndexSnapshot,
+        weights_version: Optional[str],
+        top_k: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Stored batch ranking for this user if it was computed for the same
+        profile, catalogue contents and weights version and is long enough.
+        Returned in the result cache format. Ids missing from the pinned
+        snapshot are dropped rather than trusted.
+        """
+        collection = await self._get_precomputed_collection()
+        if collection is None:
+            return None
+        
+        try:
+            doc = await collection.find_one({"_id": str(user.id)})
+        except Exception as e:
+            logger.warning(f"Precomputed recommendations lookup failed: {e}")
+            return None
+        
+        if (
+            not doc
+            or doc.get("catalogue_id") != snapshot.catalogue_id
+            or doc.get("weights_version") != weights_version
+            or doc.get("profile_hash") != self._profile_hash(profile_data)
+        ):
+            return None
+        
+        stored = doc.get("items", [])
+        items = [item for item in stored if item["id"] in snapshot.internship_id_to_index]
+        complete = len(items) == len(stored)
+        if not complete:
+            logger.warning(f"Precomputed ranking for {user.id} has {len(stored) - len(items)} unknown internships")
+        
+        # With ids dropped the ranking only covers the ranks it still holds
+        exhausted = complete and len(stored) < doc.get("top_n", 0)
+        if len(items) < top_k and not exhausted:
+            return None
+        
+        return {
+            "top_k": doc.get("top_n", len(items)) if complete else len(items),
+            "exhausted": exhausted,
+            "selected": [(item["id"], item["scores"], item["match_percentage"]) for item in items],
+        }
+    
+    @staticmethod
+    def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+        """Row indices of the k highest scores, best first"""
+        if k <= 0 or scores.size == 0:
+            return np.array([], dtype=np.int64)
+        if k < scores.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.size)
+        return top[np.argsort(-scores[top], kind='stable')]
+    
+    async def explain_recommendations(self, user: User, recommendations: List[Dict[str, Any]]):
+        """
+        Attach detailed explanations to already ranked recommendations in place.
+        
+        Meant for the page actually being served: cached explanations are
+        reused and the rest are generated in one batched executor call.
+        """
+        if not recommendations or not self._explanation_generator or not self._index_manager:
+            return
+        
+        profile_data = self._extract_user_profile(user)
+        pending: List[Tuple[Dict[str, Any], str, Dict, Dict[str, float]]] = []
+        
+        for rec in recommendations:
+            internship_id = rec.get("id")
+            internship = self._index_manager.internship_data.get(internship_id)
+            if not internship:
+                continue
             
-            if cached is not None:
-                logger.debug(f"Using cached vectors for user {user.id}")
-                return cached
+            cache_key = self._explanation_cache_key(user, profile_data, internship_id)
+            cached = self._explanation_cache.get(cache_key)
+            if cached and cached["match_percentage"] == rec.get("match_percentage"):
+                self._attach_explanation(rec, cached["explanation"])
+                continue
             
+            # Rebuild component scores from the served breakdown so the
+            # explanation agrees with what the student sees
+            breakdown = rec.get("score_breakdown", {})
+            scores = {
+                "weighted_score": rec.get("match_percentage", 0) / 100,
+                "skill_score": breakdown.get("skills", 0) / 100,
+                "location_score": breakdown.get("location", 0) / 100,
+                "stipend_score": breakdown.get("stipend", 0) / 100,
+                "timeline_score": breakdown.get("timeline", 0) / 100
+            }
+            pending.append((rec, cache_key, internship, scores))
+        
+        if not pending:
+            return
+        
+        try:
+            await self._ensure_skills(profile_data.get("skills", []))
             loop = asyncio.get_event_loop()
-            vectors = await loop.run_in_executor(
+            explanations = await loop.run_in_executor(
                 _thread_pool,
-                lambda: self._generate_student_vectors(user, profile_data)
+                lambda: self._explanation_generator.generate_explanations_batch(
+                    user,
+                    [(internship, scores) for _, _, internship, scores in pending],
+                    profile_data
+                )
             )
-            
-            self._student_cache.store_vectors(user, vectors, profile_data)
-            logger.debug(f"Generated and cached vectors for user {user.id}")
-            
-            return vectors
-            
         except Exception as e:
-            logger.error(f"Error getting student vectors: {e}")
+            logger.error(f"Error generating page explanations: {e}")
+            explanations = [None] * len(pending)
+        
+        for (rec, cache_key, _, _), explanation in zip(pending, explanations):
+            if explanation is None:
+                # Basic explanation instead; not cached, so a later request retries
+                basic = self._basic_explanation(rec.get("match_percentage", 0))
+                self._attach_explanation(rec, self._explanation_generator.to_dict(basic))
+                continue
+            explanation_dict = self._explanation_generator.to_dict(explanation)
+            self._explanation_cache.set(
+                cache_key,
+                {"match_percentage": rec.get("match_percentage"), "explanation": explanation_dict}
+            )
+            self._attach_explanation(rec, explanation_dict)
+    
+    @staticmethod
+    def _basic_explanation(match_percentage: float) -> MatchExplanation:
+        """Fallback when a detailed explanation could not be generated"""
+        return MatchExplanation(
+            recommendation_reasons=[f"Match score: {match_percentage}%"],
+            summary=f"Good match based on your profile"
+        )
+    
+    @staticmethod
+    def _attach_explanation(rec: Dict[str, Any], explanation: Dict[str, Any]):
+        """Copy an explanation dict onto a recommendation payload"""
+        rec["detailed_explanation"] = explanation
+        rec["match_reasons"] = explanation.get("recommendation_reasons", [])
+        rec["explanation_summary"] = explanation.get("summary", "")
+    
+    async def get_match_explanation(self, user: User, internship_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Compute the detailed explanation for one internship on demand.
+        Returns None if the internship is not in the index.
+        """
+        if not self.is_initialized() or not self.has_internships():
+            return None
+        
+        internship = self._index_manager.internship_data.get(internship_id)
+        if not internship:
             return None
+        
+        profile_data = self._extract_user_profile(user)
+        cache_key = self._explanation_cache_key(user, profile_data, internship_id)
+        cached = self._explanation_cache.get(cache_key)
+        
+        if cached is None:
+            student_vectors = await self._get_student_vectors_cached(user, profile_data)
+            if student_vectors is None:
+                return None
+            
+            weights = await self.load_feedback_adjusted_weights()
+            scores = self._score_internship(student_vectors, internship_id, weights)
+            if scores is None:
+                return None
+            
+            loop = asyncio.get_event_loop()
+            explanation = await loop.run_in_executor(
+                _thread_pool,
+                lambda: self._explanation_generator.generate_explanation(user, internship, scores, profile_data)
+            )
+            cached = {
+                "match_percentage": self._score_to_percentage(scores["weighted_score"]),
+                "explanation": self._explanation_generator.to_dict(explanation)
+            }
+            self._explanation_cache.set(cache_key, cached)
+        
+        return {
+            "internship_id": internship_id,
+            "internship_title": internship.get("title", "Untitled Internship"),
+            "match_percentage": cached["match_percentage"],
+            "explanation": cached["explanation"]
+        }
     
-    def _calculate_filter_boost(self, internship: Dict, filters: Dict) -> float:
-        """Calculate score boost based on filter matches"""
-        boost = 1.0
-        matches = 0
+    def _compile_filters(self, filters: Dict, snapshot: IndexSnapshot) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compile active filters into per-row arrays over the index columns.
+        
+        Each predicate is evaluated once per distinct facet value (e.g. each
+        unique location/city/state combination) and broadcast to every row via
+        the facet codes, so cost no longer scales with candidates x filters.
+        Returns (eligible mask, skill boost factor).
+        """
+        n = snapshot.size
+        eligible = np.ones(n, dtype=bool)
+        matches = np.zeros(n, dtype='float32')
         total = 0
         
         for key, value in filters.items():
@@ -2451,271 +4436,296 @@ class YuvaSetuRecommendationEngine:
                 continue
             
             total += 1
-            matched = False
-            
-            if key == "location":
-                loc_lower = str(value).lower().strip()
-                intern_loc = str(internship.get("location", "")).lower().strip()
-                intern_city = str(internship.get("city", "")).lower().strip()
-                intern_state = str(internship.get("state", "")).lower().strip()
-                
-                if loc_lower == "remote":
-                    if internship.get("is_remote", False):
-                        matched = True
-                else:
-                    # Check if location matches
-                    all_locs = [intern_loc, intern_city, intern_state]
-                    for loc in all_locs:
-                        if loc and (loc_lower in loc or loc in loc_lower):
-                            matched = True
-                            break
-                    # Check comma-separated parts
-                    if not matched:
-                        for loc in all_locs:
-                            if loc:
-                                parts = [p.strip().lower() for p in loc.split(",")]
-                                if loc_lower in parts or any(loc_lower in p or p in loc_lower for p in parts):
-                                    matched = True
-                                    break
             
-            elif key == "work_type":
-                filter_types = [wt.strip().lower() for wt in str(value).split(',') if wt.strip()]
-                intern_wt = str(internship.get("work_type", "")).lower()
-                intern_is_remote = internship.get("is_remote", False)
-                
-                for ft in filter_types:
-                    if ft in intern_wt or intern_wt in ft:
-                        matched = True
-                        break
-                    if ft == "remote" and intern_is_remote:
-                        matched = True
-                        break
+            if key in ("min_stipend", "max_stipend"):
+                # NaN marks non-numeric stipends: they pass strict checks but never boost
+                stipend = snapshot.stipend_values
+                with np.errstate(invalid='ignore'):
+                    if key == "min_stipend":
+                        eligible &= ~(stipend < value)
+                        matches += stipend >= value
+                    else:
+                        eligible &= ~(stipend > value)
+                        matches += stipend <= value
             
-            elif key == "min_stipend":
-                stipend = internship.get("stipend") or 0
-                if isinstance(stipend, (int, float)) and stipend >= value:
-                    matched = True
+            elif key in FILTER_FACETS:
+                eligible &= snapshot.facet_mask(key, lambda internship: self._passes_filter(internship, key, value))
+                matches += snapshot.facet_mask(key, lambda internship: self._matches_filter(internship, key, value))
+        
+        boost = np.ones(n, dtype='float32')
+        if total > 0:
+            ratio = matches / total
+            boost[ratio >= 0.5] = self.config.FILTER_PARTIAL_BOOST
+            boost[ratio >= 0.75] = self.config.FILTER_MATCH_BOOST
+        
+        return eligible, boost
+    
+    def _matches_filter(self, internship: Dict, key: str, value: Any) -> bool:
+        """Lenient single-filter match used for score boosting"""
+        if key == "location":
+            loc_lower = str(value).lower().strip()
+            intern_loc = str(internship.get("location", "")).lower().strip()
+            intern_city = str(internship.get("city", "")).lower().strip()
+            intern_state = str(internship.get("state", "")).lower().strip()
             
-            elif key == "max_stipend":
-                stipend = internship.get("stipend") or 0
-                if isinstance(stipend, (int, float)) and stipend <= value:
-                    matched = True
+            if loc_lower == "remote":
+                return bool(internship.get("is_remote", False))
             
-            elif key == "duration":
-                dur_lower = str(value).lower().strip()
-                intern_dur = str(internship.get("duration", "")).lower().strip()
-                
-                if intern_dur and dur_lower in intern_dur:
-                    matched = True
-                elif internship.get("duration_months"):
-                    duration_map = {
-                        "45 days": 1.5, "1 month": 1, "2 months": 2,
-                        "3 months": 3, "6 months": 6
-                    }
-                    filter_months = duration_map.get(dur_lower)
-                    if filter_months:
-                        intern_months = internship.get("duration_months")
-                        if intern_months and abs(intern_months - filter_months) <= 0.5:
-                            matched = True
+            # Check if location matches
+            all_locs = [intern_loc, intern_city, intern_state]
+            for loc in all_locs:
+                if loc and (loc_lower in loc or loc in loc_lower):
+                    return True
+            # Check comma-separated parts
+            for loc in all_locs:
+                if loc:
+                    parts = [p.strip().lower() for p in loc.split(",")]
+                    if loc_lower in parts or any(loc_lower in p or p in loc_lower for p in parts):
+                        return True
+            return False
+        
+        elif key == "work_type":
+            filter_types = [wt.strip().lower() for wt in str(value).split(',') if wt.strip()]
+            intern_wt = str(internship.get("work_type", "")).lower()
+            intern_is_remote = internship.get("is_remote", False)
             
-            if matched:
-                matches += 1
+            for ft in filter_types:
+                if ft in intern_wt or intern_wt in ft:
+                    return True
+                if ft == "remote" and intern_is_remote:
+                    return True
+            return False
         
-        if total > 0:
-            ratio = matches / total
-            if ratio >= 0.75:
-                boost = self.config.FILTER_MATCH_BOOST
-            elif ratio >= 0.5:
-                boost = self.config.FILTER_PARTIAL_BOOST
+        elif key == "min_stipend":
+            stipend = internship.get("stipend") or 0
+            return isinstance(stipend, (int, float)) and stipend >= value
+        
+        elif key == "max_stipend":
+            stipend = internship.get("stipend") or 0
+            return isinstance(stipend, (int, float)) and stipend <= value
+        
+        elif key == "duration":
+            dur_lower = str(value).lower().strip()
+            intern_dur = str(internship.get("duration", "")).lower().strip()
+            
+            if intern_dur and dur_lower in intern_dur:
+                return True
+            elif internship.get("duration_months"):
+                duration_map = {
+                    "45 days": 1.5, "1 month": 1, "2 months": 2,
+                    "3 months": 3, "6 months": 6
+                }
+                filter_months = duration_map.get(dur_lower)
+                if filter_months:
+                    intern_months = internship.get("duration_months")
+                    if intern_months and abs(intern_months - filter_months) <= 0.5:
+                        return True
+            return False
         
-        return boost
+        return False
     
-    def _find_score_for_index(
-        self,
-        target_idx: int,
-        indices: np.ndarray,
-        scores: np.ndarray
-    ) -> float:
-        """Find score for a specific index"""
-        matches = np.where(indices == target_idx)[0]
-        if matches.size > 0:
-            return self._clamp(float(scores[matches[0]]))
-        return 0.0
-    
-    def _apply_filters(self, internship: Dict, filters: Dict) -> bool:
-        """Apply strict filters - returns True if internship passes all filters"""
-        for key, value in filters.items():
-            # Skip empty/None/zero values
-            if value is None or value == "" or value == 0:
-                continue
+    def _passes_filter(self, internship: Dict, key: str, value: Any) -> bool:
+        """Strict single-filter check, evaluated once per facet value by _compile_filters"""
+        if key == "location":
+            loc_lower = str(value).lower().strip()
+            if not loc_lower or loc_lower in ["all locations", "all", ""]:
+                return True
             
-            if key == "location":
-                loc_lower = str(value).lower().strip()
-                if loc_lower and loc_lower not in ["all locations", "all", ""]:
-                    intern_loc = str(internship.get("location", "")).lower().strip()
-                    intern_city = str(internship.get("city", "")).lower().strip()
-                    intern_state = str(internship.get("state", "")).lower().strip()
-                    is_remote = internship.get("is_remote", False)
-                    
-                    # Handle remote filter
-                    if loc_lower == "remote":
-                        if not is_remote:
-                            return False
-                    else:
-                        # Check if location matches any part of internship location
-                        matched = False
-                        
-                        # Check exact match
-                        if (loc_lower == intern_loc or 
-                            loc_lower == intern_city or 
-                            loc_lower == intern_state):
-                            matched = True
-                        
-                        # Check if filter is contained in location strings
-                        if not matched:
-                            all_locations = [intern_loc, intern_city, intern_state]
-                            for loc_str in all_locations:
-                                if loc_str and (loc_lower in loc_str or loc_str in loc_lower):
-                                    matched = True
-                                    break
-                        
-                        # Check individual parts (comma-separated)
-                        if not matched:
-                            for loc_str in [intern_loc, intern_city, intern_state]:
-                                if loc_str:
-                                    parts = [p.strip().lower() for p in loc_str.split(",")]
-                                    if loc_lower in parts or any(loc_lower in part or part in loc_lower for part in parts):
-                                        matched = True
-                                        break
-                        
-                        if not matched:
-                            return False
-            
-            elif key == "work_type":
-                filter_types = [wt.strip().upper() for wt in str(value).split(',') if wt.strip()]
-                if not filter_types:
-                    continue
-                    
-                intern_wt = str(internship.get("work_type", "")).upper()
-                intern_is_remote = internship.get("is_remote", False)
-                
-                matched = False
-                for ft in filter_types:
-                    ft_clean = ft.strip()
-                    # Exact match
-                    if ft_clean == intern_wt or intern_wt == ft_clean:
-                        matched = True
-                        break
-                    # Contains match
-                    if ft_clean in intern_wt or intern_wt in ft_clean:
-                        matched = True
-                        break
-                    # Special cases
-                    if ft_clean == "REMOTE" and intern_is_remote:
-                        matched = True
-                        break
-                    if ft_clean in ["WFH", "WORK FROM HOME"] and ("WFH" in intern_wt or "HOME" in intern_wt):
-                        matched = True
-                        break
-                    if ft_clean in ["WFO", "WORK FROM OFFICE", "ONSITE"] and ("WFO" in intern_wt or "OFFICE" in intern_wt or "ONSITE" in intern_wt):
-                        matched = True
-                        break
-                    if ft_clean == "HYBRID" and "HYBRID" in intern_wt:
-                        matched = True
-                        break
-                
-                if not matched:
-                    return False
+            intern_loc = str(internship.get("location", "")).lower().strip()
+            intern_city = str(internship.get("city", "")).lower().strip()
+            intern_state = str(internship.get("state", "")).lower().strip()
+            is_remote = internship.get("is_remote", False)
             
-            elif key == "min_stipend":
-                stipend = internship.get("stipend") or 0
-                if isinstance(stipend, (int, float)):
-                    if stipend < value:
-                        return False
-            
-            elif key == "max_stipend":
-                stipend = internship.get("stipend") or 0
-                if isinstance(stipend, (int, float)):
-                    if stipend > value:
-                        return False
-            
-            elif key == "duration":
-                dur_lower = str(value).lower().strip()
-                if not dur_lower:
-                    continue
-                    
-                intern_dur = str(internship.get("duration", "")).lower().strip()
-                intern_months = internship.get("duration_months")
-                
-                # Try exact string match first
-                matched = False
-                if intern_dur:
-                    # Exact match
-                    if dur_lower == intern_dur:
-                        matched = True
-                    # Substring match with word boundaries
-                    elif dur_lower in intern_dur:
-                        import re
-                        pattern = r'\b' + re.escape(dur_lower) + r'\b'
-                        if re.search(pattern, intern_dur):
-                            matched = True
-                
-                # Try numeric comparison if string match failed
-                if not matched:
-                    duration_map = {
-                        "45 days": 1.5, "45 day": 1.5,
-                        "1 month": 1, "1 months": 1,
-                        "2 months": 2, "2 month": 2,
-                        "3 months": 3, "3 month": 3,
-                        "6 months": 6, "6 month": 6
-                    }
-                    filter_months = duration_map.get(dur_lower)
-                    
-                    if filter_months is not None and intern_months is not None:
-                        # Allow flexibility of ±0.5 months
-                        if abs(intern_months - filter_months) <= 0.5:
-                            matched = True
-                
-                if not matched:
-                    return False
+            # Handle remote filter
+            if loc_lower == "remote":
+                return bool(is_remote)
+            
+            # Check exact match
+            if (loc_lower == intern_loc or
+                loc_lower == intern_city or
+                loc_lower == intern_state):
+                return True
+            
+            # Check if filter is contained in location strings
+            all_locations = [intern_loc, intern_city, intern_state]
+            for loc_str in all_locations:
+                if loc_str and (loc_lower in loc_str or loc_str in loc_lower):
+                    return True
+            
+            # Check individual parts (comma-separated)
+            for loc_str in all_locations:
+                if loc_str:
+                    parts = [p.strip().lower() for p in loc_str.split(",")]
+                    if loc_lower in parts or any(loc_lower in part or part in loc_lower for part in parts):
+                        return True
+            
+            return False
+        
+        elif key == "work_type":
+            filter_types = [wt.strip().upper() for wt in str(value).split(',') if wt.strip()]
+            if not filter_types:
+                return True
+            
+            intern_wt = str(internship.get("work_type", "")).upper()
+            intern_is_remote = internship.get("is_remote", False)
+            
+            for ft in filter_types:
+                ft_clean = ft.strip()
+                # Exact match
+                if ft_clean == intern_wt or intern_wt == ft_clean:
+                    return True
+                # Contains match
+                if ft_clean in intern_wt or intern_wt in ft_clean:
+                    return True
+                # Special cases
+                if ft_clean == "REMOTE" and intern_is_remote:
+                    return True
+                if ft_clean in ["WFH", "WORK FROM HOME"] and ("WFH" in intern_wt or "HOME" in intern_wt):
+                    return True
+                if ft_clean in ["WFO", "WORK FROM OFFICE", "ONSITE"] and ("WFO" in intern_wt or "OFFICE" in intern_wt or "ONSITE" in intern_wt):
+                    return True
+                if ft_clean == "HYBRID" and "HYBRID" in intern_wt:
+                    return True
+            
+            return False
+        
+        elif key == "min_stipend":
+            stipend = internship.get("stipend") or 0
+            return not (isinstance(stipend, (int, float)) and stipend < value)
+        
+        elif key == "max_stipend":
+            stipend = internship.get("stipend") or 0
+            return not (isinstance(stipend, (int, float)) and stipend > value)
+        
+        elif key == "duration":
+            dur_lower = str(value).lower().strip()
+            if not dur_lower:
+                return True
+            
+            intern_dur = str(internship.get("duration", "")).lower().strip()
+            intern_months = internship.get("duration_months")
+            
+            # Try exact string match first
+            if intern_dur:
+                # Exact match
+                if dur_lower == intern_dur:
+                    return True
+                # Substring match with word boundaries
+                if dur_lower in intern_dur:
+                    import re
+                    pattern = r'\b' + re.escape(dur_lower) + r'\b'
+                    if re.search(pattern, intern_dur):
+                        return True
+            
+            # Try numeric comparison if string match failed
+            duration_map = {
+                "45 days": 1.5, "45 day": 1.5,
+                "1 month": 1, "1 months": 1,
+                "2 months": 2, "2 month": 2,
+                "3 months": 3, "3 month": 3,
+                "6 months": 6, "6 month": 6
+            }
+            filter_months = duration_map.get(dur_lower)
+            
+            # Allow flexibility of ±0.5 months
+            return (
+                filter_months is not None and intern_months is not None
+                and abs(intern_months - filter_months) <= 0.5
+            )
         
         return True
     
     async def _check_refresh_needed(self):
-        """Check if background refresh is needed"""
+        """
+        Schedule an incremental sync if the last one is old enough; workers
+        that do not build the shared snapshot instead map a newer one if the
+        builder has published it. Never waits on the database.
+        """
         if self.last_refresh is None:
             return
+        if self._change_watcher is not None and self._change_watcher.is_running:
+            return
+        
+        manager = self._index_manager
+        interval = self.config.INDEX_SYNC_INTERVAL_SECONDS if manager.is_builder else self.config.SNAPSHOT_POLL_INTERVAL_SECONDS
+        now = datetime.utcnow()
+        if self._last_sync_check and (now - self._last_sync_check).total_seconds() < interval:
+            return
+        if self._sync_task is not None and not self._sync_task.done():
+            return
         
-        # Always check for new internships, but only refresh if count changed
-        # This allows immediate detection of new internships without waiting 1 hour
+        self._last_sync_check = now
+        
+        if not manager.is_builder:
+            if manager.acquire_builder_lock():
+                # The previous builder exited; take over keeping the snapshot live
+                logger.info("Took over as index snapshot builder")
+                self._start_index_maintenance(reconcile=True)
+            else:
+                # Followers only pick up snapshots published by the builder
+                manager.reload_if_changed()
+            return
+        
+        self._sync_task = asyncio.create_task(self._sync_internship_changes())
+    
+    async def _sync_internship_changes(self) -> bool:
+        """
+        Incrementally bring the index up to date with the employer collection.
+        
+        Fetches only documents updated or created past the high-water mark,
+        upserts them (closed internships included, as a full reload would) and
+        reconciles ids to drop deleted ones when the counts disagree.
+        """
         try:
             from app.database.multi_cluster import get_employer_database
             employer_db = await get_employer_database()
             collection = await self._find_internships_collection(employer_db)
+            if collection is None:
+                return False
             
-            if collection:
-                current_count = await collection.count_documents({})
-                cached_count = self._index_manager.internship_count
-                
-                if current_count != cached_count:
-                    logger.info(f"🔄 New internships detected! Cached: {cached_count}, Current: {current_count}, scheduling refresh...")
-                    # Trigger immediate refresh
-                    asyncio.create_task(self._background_refresh())
-                    # Update last_refresh to avoid immediate re-check
-                    self.last_refresh = datetime.utcnow()
-                else:
-                    # Update last_refresh only if enough time has passed to avoid constant DB queries
-                    elapsed = datetime.utcnow() - self.last_refresh
-                    if elapsed > timedelta(minutes=5):  # Check every 5 minutes instead of every request
-                        self.last_refresh = datetime.utcnow()
+            query = self._index_manager.changes_query()
+            if query is None:
+                # No high-water mark yet (e.g. legacy cache), fall back to a full reload
+                await self._background_refresh()
+                return True
+            
+            changed = await collection.find(query, INTERNSHIP_PROJECTION).to_list(length=None)
+            
+            upserts: Dict[str, Tuple[Dict, Dict[str, np.ndarray]]] = {}
+            if changed:
+                ids, data, vectors = await self._prepare_internship_rows(changed)
+                upserts = {id_: (data[id_], vectors[id_]) for id_ in ids}
+            
+            removed_ids: Set[str] = set()
+            known_ids = set(self._index_manager.internship_ids) | set(upserts)
+            current_count = await collection.count_documents({})
+            if current_count != len(known_ids):
+                live_ids = {str(doc["_id"]) async for doc in collection.find({}, {"_id": 1})}
+                removed_ids = known_ids - live_ids
+            
+            if not upserts and not removed_ids:
+                return True
+            
+            logger.info(f"🔄 Syncing {len(upserts)} changed and {len(removed_ids)} removed internships")
+            loop = asyncio.get_event_loop()
+            success = await loop.run_in_executor(
+                _thread_pool, self._index_manager.apply_changes, upserts, removed_ids
+            )
+            if success:
+                self._index_manager.advance_sync_state(changed)
+                self.last_refresh = datetime.utcnow()
+                await self._persist_index()
+            return success
+        
         except Exception as e:
-            logger.debug(f"Refresh check error: {e}")
+            logger.error(f"Incremental sync error: {e}")
+            return False
     
     async def _background_refresh(self):
         """Background refresh of data"""
         try:
             logger.info("Starting background refresh...")
-            self._index_manager.init_indices()
+            # build_indices replaces the index wholesale; don't empty it while requests read it
             success = await self.load_employer_data()
             
             if success:
@@ -2725,64 +4735,17 @@ class YuvaSetuRecommendationEngine:
         except Exception as e:
             logger.error(f"Background refresh error: {e}")
     
-    async def _load_internship_metadata_only(self) -> bool:
-        """Load only metadata when indices are cached"""
-        try:
-            from app.database.multi_cluster import get_employer_database
-            employer_db = await get_employer_database()
-            collection = await self._find_internships_collection(employer_db)
-            
-            if collection is None:
-                return False
-            
-            # Exclude embedding field to speed up query
-            cursor = collection.find({}, {"embedding": 0})
-            # Add timeout to prevent hanging
-            try:
-                internships = await asyncio.wait_for(cursor.to_list(length=None), timeout=15.0)
-            except asyncio.TimeoutError:
-                logger.error("❌ Metadata query timed out after 15s")
-                return False
-            
-            for internship in internships:
-                internship_id = str(internship["_id"])
-                normalized = self._normalize_employer_internship(internship)
-                self._index_manager.internship_data[internship_id] = normalized
-            
-            logger.info(f"✅ Loaded metadata for {len(internships)} internships")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Metadata loading error: {e}")
-            return False
-    
     async def load_feedback_adjusted_weights(self) -> Dict[str, float]:
-        """Load weights from feedback or use defaults"""
-        try:
-            weights_path = Path("models/feedback_adjusted_weights.json")
-            if weights_path.exists():
-                with open(weights_path) as f:
-                    data = json.load(f)
-                weights = data.get('weights')
-                if weights:
-                    logger.debug(f"Loaded feedback weights: {weights}")
-                    return weights
-        except Exception:
-            pass
-        
-        try:
-            trained_path = Path("models/trained_weights.json")
-            if trained_path.exists():
-                with open(trained_path) as f:
-                    data = json.load(f)
-                weights = data.get('final_weights')
-                if weights:
-                    logger.debug(f"Loaded trained weights: {weights}")
-                    return weights
-        except Exception:
-            pass
-        
-        return self.config.DEFAULT_WEIGHTS.copy()
+        """Current scoring weights (in memory; files are only re-read when they change)"""
+        return dict(self._weights_registry.get().weights)
+    
+    def publish_weights(self, weights: Dict[str, float], version: Optional[str] = None) -> str:
+        """Swap in new scoring weights for subsequent requests; returns the new version"""
+        return self._weights_registry.publish(weights, version).version
+    
+    @property
+    def weights_version(self) -> str:
+        return self._weights_registry.current.version
     
     async def get_trending_internships(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get trending internships"""
@@ -2841,17 +4804,18 @@ class YuvaSetuRecommendationEngine:
     async def refresh_data(self) -> bool:
         """Force refresh of data"""
         logger.info("Forcing data refresh...")
-        self._index_manager.init_indices()
+        # The current snapshot keeps serving until the rebuilt one is published
         success = await self.load_employer_data()
         if success:
             self.last_refresh = datetime.utcnow()
-            self._index_manager.save_to_disk()
         return success
     
     def invalidate_user_cache(self, user_id: str):
         """Invalidate cache for a specific user"""
         if self._student_cache:
-            self._student_cache.invalidate(user_id)
+            self._student_cache.invalidate(user_id, shared=True)
+            self._explanation_cache.invalidate_prefix(f"{user_id}:")
+            self._result_cache.invalidate_prefix(f"{user_id}:")
             logger.info(f"Invalidated cache for user {user_id}")
     
     def get_engine_stats(self) -> Dict[str, Any]:
@@ -2863,14 +4827,241 @@ class YuvaSetuRecommendationEngine:
             "min_match_threshold": self.config.MIN_MATCH_THRESHOLD,
             "internship_count": self._index_manager.total_internships if self._index_manager else 0,
             "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "weights_version": self.weights_version,
+            "in_flight": len(self._in_flight),
+            "coalesced_calls": self.coalesced_calls,
         }
         
         if self._student_cache:
             stats["cache_stats"] = self._student_cache.get_cache_stats()
+            stats["cache_stats"]["cached_explanations"] = self._explanation_cache.size()
+            stats["cache_stats"]["explanations"] = self._explanation_cache.get_stats()
+            stats["cache_stats"]["results"] = self._result_cache.get_stats()
+        
+        if self._encoder:
+            stats["embedding_batcher"] = self._encoder.get_stats()
+        
+        if self._skill_manager:
+            stats["skill_graph"] = {
+                "skills": self._skill_manager.graph.size,
+                "edges": self._skill_manager.graph.edge_count,
+            }
+        
+        if self._index_manager:
+            stats["index_sync"] = {
+                "role": "builder" if self._index_manager.is_builder else "follower",
+                "catalogue_version": self._index_manager.catalogue_version,
+                "catalogue_id": self._index_manager.catalogue_id,
+            }
+        if self._change_watcher:
+            stats["index_sync"].update({
+                "mode": self._change_watcher.mode,
+                "running": self._change_watcher.is_running,
+                "events_applied": self._change_watcher.events_applied,
+            })
         
         return stats
 
 
+# ============================================================================
+# CHANGE STREAM WATCHER
+# ============================================================================
+
+class InternshipChangeWatcher:
+    """
+    Keeps the internship index live from a MongoDB change stream on the
+    employer internships collection.
+    
+    The resume token is persisted next to the index snapshot so a restart resumes
+    where it left off instead of reloading everything. When change streams are
+    unavailable (standalone mongod) it falls back to polling the updated_at
+    high-water mark.
+    """
+    
+    TOKEN_FILE = "change_stream_token.json"
+    
+    # Server error codes
+    NOT_REPLICA_SET_CODES = {40573}
+    RESUME_FAILED_CODES = {260, 280, 286}
+    
+    def __init__(self, engine: "YuvaSetuRecommendationEngine", config = None):
+        self.engine = engine
+        self.config = config or _load_recommendation_config()
+        self.token_path = engine.cache_dir / self.TOKEN_FILE
+        self.mode: Optional[str] = None  # "change_stream" or "polling"
+        self.events_applied = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = False
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Start watching in a background task"""
+        if self.is_running:
+            return
+        self._stopped = False
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop watching"""
+        self._stopped = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+    
+    def _load_resume_token(self) -> Optional[Dict]:
+        """Read the persisted resume token, if any"""
+        try:
+            if self.token_path.exists():
+                from bson import json_util
+                return json_util.loads(self.token_path.read_text())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable resume token: {e}")
+        return None
+    
+    def _save_resume_token(self, token: Optional[Dict]):
+        """Persist the resume token atomically"""
+        if token is None:
+            return
+        try:
+            from bson import json_util
+            tmp_path = self.token_path.with_suffix(".tmp")
+            tmp_path.write_text(json_util.dumps(token))
+            os.replace(tmp_path, self.token_path)
+        except Exception as e:
+            logger.warning(f"Failed to persist resume token: {e}")
+    
+    def _clear_resume_token(self):
+        try:
+            self.token_path.unlink()
+        except FileNotFoundError:
+            pass
+    
+    async def _run(self):
+        """Watch the change stream, reconnecting on errors, or fall back to polling"""
+        from pymongo.errors import OperationFailure
+        
+        backoff = 1.0
+        while not self._stopped:
+            try:
+                from app.database.multi_cluster import get_employer_database
+                employer_db = await get_employer_database()
+                collection = await self.engine._find_internships_collection(employer_db)
+                if collection is None:
+                    await asyncio.sleep(self.config.CHANGE_POLL_INTERVAL_SECONDS)
+                    continue
+                
+                await self._watch(collection)
+                backoff = 1.0
+            
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in self.NOT_REPLICA_SET_CODES or "replica set" in str(e).lower():
+                    logger.info("Change streams unavailable, polling for internship changes instead")
+                    await self._poll()
+                    return
+                if e.code in self.RESUME_FAILED_CODES:
+                    logger.warning(f"Resume token rejected ({e.code}), catching up from high-water mark")
+                    self._clear_resume_token()
+                    continue
+                logger.warning(f"Change stream error: {e}, reconnecting in {backoff:.0f}s")
+            except Exception as e:
+                logger.warning(f"Change stream error: {e}, reconnecting in {backoff:.0f}s")
+            
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+    
+    async def _watch(self, collection):
+        """Consume the change stream, applying events in small batches"""
+        resume_token = self._load_resume_token()
+        
+        async with collection.watch(
+            full_document="updateLookup",
+            resume_after=resume_token,
+            max_await_time_ms=1000
+        ) as stream:
+            self.mode = "change_stream"
+            logger.info(f"👀 Watching internship changes (resumed: {resume_token is not None})")
+            
+            if resume_token is None:
+                # Stream is open, so anything changed during catch-up is also replayed
+                await self.engine._sync_internship_changes()
+                self._save_resume_token(stream.resume_token)
+            
+            pending: List[Dict] = []
+            while not self._stopped and stream.alive:
+                change = await stream.try_next()
+                if change is not None:
+                    pending.append(change)
+                    if len(pending) < self.config.CHANGE_BATCH_MAX_EVENTS:
+                        continue
+                
+                if pending:
+                    await self.apply_events(pending)
+                    pending = []
+                    self._save_resume_token(stream.resume_token)
+    
+    async def _poll(self):
+        """Fallback: tail the updated_at high-water mark"""
+        self.mode = "polling"
+        while not self._stopped:
+            await self.engine._sync_internship_changes()
+            await asyncio.sleep(self.config.CHANGE_POLL_INTERVAL_SECONDS)
+    
+    async def apply_events(self, events: List[Dict]) -> bool:
+        """Apply a batch of change events to the index"""
+        upserted: Dict[str, Dict] = {}
+        removed_ids: Set[str] = set()
+        
+        for change in events:
+            operation = change.get("operationType")
+            document_id = str(change.get("documentKey", {}).get("_id"))
+            
+            if operation in ("insert", "update", "replace"):
+                document = change.get("fullDocument")
+                if document is None:
+                    # Deleted before the lookup ran
+                    upserted.pop(document_id, None)
+                    removed_ids.add(document_id)
+                else:
+                    upserted[document_id] = document
+                    removed_ids.discard(document_id)
+            elif operation == "delete":
+                upserted.pop(document_id, None)
+                removed_ids.add(document_id)
+            elif operation in ("drop", "rename", "dropDatabase", "invalidate"):
+                logger.warning(f"Internship collection {operation}, reloading index")
+                await self.engine._background_refresh()
+                return True
+        
+        manager = self.engine._index_manager
+        removed_ids &= set(manager.internship_id_to_index)
+        
+        upserts: Dict[str, Tuple[Dict, Dict[str, np.ndarray]]] = {}
+        if upserted:
+            ids, data, vectors = await self.engine._prepare_internship_rows(list(upserted.values()))
+            upserts = {id_: (data[id_], vectors[id_]) for id_ in ids}
+        
+        if not upserts and not removed_ids:
+            return True
+        
+        loop = asyncio.get_event_loop()
+        success = await loop.run_in_executor(_thread_pool, manager.apply_changes, upserts, removed_ids)
+        if success:
+            manager.advance_sync_state(list(upserted.values()))
+            self.engine.last_refresh = datetime.utcnow()
+            await self.engine._persist_index()
+            self.events_applied += len(events)
+        return success
+
+
 # ============================================================================
 # GLOBAL INSTANCE MANAGEMENT
 # ============================================================================
@@ -2927,6 +5118,22 @@ async def reset_recommendation_engine() -> None:
             # Clear caches
             if _recommendation_engine._student_cache:
                 _recommendation_engine._student_cache.embedding_cache.clear()
+                if _recommendation_engine._student_cache.shared_store:
+                    _recommendation_engine._student_cache.shared_store.close()
+            _recommendation_engine._explanation_cache.clear()
+            _recommendation_engine._result_cache.clear()
+            if _recommendation_engine._encoder:
+                _recommendation_engine._encoder.close()
+            if _recommendation_engine._change_watcher:
+                await _recommendation_engine._change_watcher.stop()
+            if _recommendation_engine._index_manager:
+                _recommendation_engine._index_manager.release_builder_lock()
+            if _recommendation_engine._vocabulary_task:
+                _recommendation_engine._vocabulary_task.cancel()
+            if _recommendation_engine._skill_manager:
+                await asyncio.get_event_loop().run_in_executor(
+                    _thread_pool, _recommendation_engine._skill_manager.vocabulary.save
+                )
         
         _recommendation_engine = None
         _initialization_started = False
@@ -0,0 +1,323 @@
+# app/services/sentence_encoder.py
+"""
+Sentence-transformer loading with an optional ONNX Runtime backend.
+
+load_sentence_encoder() returns either a PyTorch SentenceTransformer or an
+OnnxSentenceEncoder exposing the same encode() surface. The ONNX graph is
+exported once per model (optionally int8 dynamically quantized) and cached on
+disk; after that, loading needs only onnxruntime, tokenizers and numpy, so
+torch is never imported. The module has no app imports so both backends ship
+the same file.
+"""
+import inspect
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:  # optional dependency
+    onnxruntime = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+
+# Used only when no cache_dir is configured; exports are slow, so this must
+# survive reboots (unlike the system tempdir)
+DEFAULT_ONNX_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "onnx_models"
+
+_POOLING_MODES = (
+    "pooling_mode_cls_token",
+    "pooling_mode_mean_tokens",
+    "pooling_mode_max_tokens",
+    "pooling_mode_mean_sqrt_len_tokens",
+)
+# Newer sentence-transformers releases store pooling as a mode name
+_POOLING_MODE_NAMES = {
+    "cls": "pooling_mode_cls_token",
+    "mean": "pooling_mode_mean_tokens",
+    "max": "pooling_mode_max_tokens",
+    "mean_sqrt_len_tokens": "pooling_mode_mean_sqrt_len_tokens",
+}
+
+
+def load_sentence_encoder(
+    model_name: str,
+    backend: str = BACKEND_TORCH,
+    device: Optional[str] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+    quantize: bool = True,
+):
+    """
+    Load model_name with the requested backend.
+    
+    The ONNX backend falls back to PyTorch (with a warning) when onnxruntime
+    is not installed or the export fails, so a misconfigured host still serves.
+    """
+    if backend == BACKEND_ONNX:
+        if onnxruntime is None:
+            logger.warning("onnxruntime is not installed; falling back to the PyTorch backend")
+        else:
+            try:
+                return OnnxSentenceEncoder(model_name, cache_dir=cache_dir, quantize=quantize)
+            except Exception as e:
+                logger.error(f"ONNX backend unavailable for {model_name}, falling back to PyTorch: {e}")
+    elif backend != BACKEND_TORCH:
+        logger.warning(f"Unknown embedding backend '{backend}', using PyTorch")
+    
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=device)
+
+
+def pool_embeddings(
+    token_embeddings: np.ndarray,
+    attention_mask: np.ndarray,
+    modes: List[str],
+) -> np.ndarray:
+    """
+    Sentence-transformers Pooling over (batch, seq, dim) token embeddings;
+    several modes are concatenated in the same order Pooling uses.
+    """
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    token_counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    pooled = []
+    
+    if "pooling_mode_cls_token" in modes:
+        pooled.append(token_embeddings[:, 0])
+    if "pooling_mode_max_tokens" in modes:
+        masked = np.where(mask > 0, token_embeddings, -1e9)
+        pooled.append(masked.max(axis=1))
+    if "pooling_mode_mean_tokens" in modes:
+        pooled.append((token_embeddings * mask).sum(axis=1) / token_counts)
+    if "pooling_mode_mean_sqrt_len_tokens" in modes:
+        pooled.append((token_embeddings * mask).sum(axis=1) / np.sqrt(token_counts))
+    
+    return np.concatenate(pooled, axis=1)
+
+
+class OnnxSentenceEncoder:
+    """
+    ONNX Runtime stand-in for SentenceTransformer.encode().
+    
+    Tokenization, truncation length, pooling and normalization are read from
+    the model's sentence-transformers config files, so outputs match the
+    PyTorch pipeline up to numerical (and, when quantized, int8) error.
+    """
+    
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[Union[str, Path]] = None,
+        quantize: bool = True,
+        intra_op_threads: Optional[int] = None,
+    ):
+        if onnxruntime is None:
+            raise ImportError("onnxruntime is required for the ONNX backend")
+        
+        from tokenizers import Tokenizer
+        
+        self.model_name = model_name
+        self.quantize = quantize
+        self.model_dir = self._resolve_model_dir(model_name)
+        self._read_pipeline_config()
+        
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.no_padding()
+        
+        export_dir = Path(cache_dir or DEFAULT_ONNX_CACHE_DIR) / model_name.replace("/", "__")
+        self.onnx_path = self._ensure_exported(export_dir)
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(
+            str(self.onnx_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {node.name for node in self.session.get_inputs()}
+        logger.info(f"ONNX encoder ready: {self.onnx_path.name} (dim={self.dimension})")
+    
+    # ------------------------------------------------------------------
+    # Model files
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _resolve_model_dir(model_name: str) -> Path:
+        """Local directory, else the Hugging Face cache (downloaded on first use)"""
+        if Path(model_name).is_dir():
+            return Path(model_name)
+        
+        from huggingface_hub import snapshot_download
+        repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        try:
+            return Path(snapshot_download(repo_id, local_files_only=True))
+        except Exception:
+            return Path(snapshot_download(repo_id))
+    
+    def _read_pipeline_config(self):
+        modules = self._read_json("modules.json", default=[])
+        module_types = {module.get("type", "").rsplit(".", 1)[-1]: module.get("path", "") for module in modules}
+        self.normalize = "Normalize" in module_types
+        
+        pooling = self._read_json(f"{module_types.get('Pooling', '1_Pooling')}/config.json", default={})
+        modes = pooling.get("pooling_mode")
+        if modes:
+            modes = [modes] if isinstance(modes, str) else modes
+            self.pooling_modes = [_POOLING_MODE_NAMES[mode] for mode in modes if mode in _POOLING_MODE_NAMES]
+        else:
+            self.pooling_modes = [mode for mode in _POOLING_MODES if pooling.get(mode)]
+        self.pooling_modes = self.pooling_modes or ["pooling_mode_mean_tokens"]
+        
+        model_config = self._read_json("config.json", default={})
+        word_dimension = (
+            pooling.get("word_embedding_dimension")
+            or pooling.get("embedding_dimension")
+            or model_config.get("hidden_size", 0)
+        )
+        self.dimension = int(word_dimension) * len(self.pooling_modes)
+        
+        # Truncation length: sentence-transformers config, else the tokenizer's, else the model's
+        st_config = self._read_json("sentence_bert_config.json", default={})
+        tokenizer_config = self._read_json("tokenizer_config.json", default={})
+        tokenizer_max_length = tokenizer_config.get("model_max_length") or 0
+        self.max_seq_length = int(
+            st_config.get("max_seq_length")
+            or (tokenizer_max_length if 0 < tokenizer_max_length < 100000 else 0)
+            or model_config.get("max_position_embeddings", 512)
+        )
+        self.do_lower_case = bool(st_config.get("do_lower_case", False))
+    
+    def _read_json(self, relative_path: str, default: Any) -> Any:
+        path = self.model_dir / relative_path
+        if not path.exists():
+            return default
+        with open(path) as f:
+            return json.load(f)
+    
+    def _ensure_exported(self, export_dir: Path) -> Path:
+        """Path of the (quantized) graph, exporting it first if missing"""
+        fp32_path = export_dir / "model.onnx"
+        int8_path = export_dir / "model.int8.onnx"
+        
+        if not fp32_path.exists():
+            export_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Exporting {self.model_name} to ONNX (one-time)")
+            self._export(fp32_path)
+        
+        if not self.quantize:
+            return fp32_path
+        
+        if not int8_path.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            
+            tmp_path = int8_path.with_suffix(f".{os.getpid()}.tmp")
+            quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+            logger.info(f"Quantized ONNX graph written to {int8_path}")
+        
+        return int8_path
+    
+    def _export(self, output_path: Path):
+        """Trace the transformer with torch; the only step that imports it"""
+        import torch
+        from transformers import AutoModel
+        
+        model = AutoModel.from_pretrained(str(self.model_dir))
+        model.eval()
+        use_token_types = "token_type_ids" in inspect.signature(model.forward).parameters
+        
+        class _Wrapper(torch.nn.Module):
+            def __init__(self, transformer):
+                super().__init__()
+                self.transformer = transformer
+            
+            def forward(self, input_ids, attention_mask, token_type_ids=None):
+                inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+                if token_type_ids is not None:
+                    inputs["token_type_ids"] = token_type_ids
+                return self.transformer(**inputs)[0]
+        
+        sample = self._tokenize(["export sample text", "a second, somewhat longer export sample"])
+        input_names = ["input_ids", "attention_mask"] + (["token_type_ids"] if use_token_types else [])
+        args = tuple(torch.from_numpy(sample[name]) for name in input_names)
+        
+        export_kwargs = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            export_kwargs["dynamo"] = False
+        
+        tmp_path = output_path.with_suffix(f".{os.getpid()}.tmp")
+        with torch.no_grad():
+            torch.onnx.export(
+                _Wrapper(model),
+                args,
+                str(tmp_path),
+                input_names=input_names,
+                output_names=["token_embeddings"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]},
+                opset_version=14,
+                do_constant_folding=True,
+                **export_kwargs
+            )
+        os.replace(tmp_path, output_path)
+    
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    
+    def _tokenize(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        # Same preprocessing as the sentence-transformers Transformer module
+        texts = [text.strip().lower() if self.do_lower_case else text.strip() for text in texts]
+        encodings = self.tokenizer.encode_batch(texts)
+        length = max(len(encoding.ids) for encoding in encodings)
+        batch = {
+            "input_ids": np.zeros((len(texts), length), dtype=np.int64),
+            "attention_mask": np.zeros((len(texts), length), dtype=np.int64),
+            "token_type_ids": np.zeros((len(texts), length), dtype=np.int64),
+        }
+        for row, encoding in enumerate(encodings):
+            n = len(encoding.ids)
+            batch["input_ids"][row, :n] = encoding.ids
+            batch["attention_mask"][row, :n] = encoding.attention_mask
+            batch["token_type_ids"][row, :n] = encoding.type_ids
+        return batch
+    
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        show_progress_bar: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """Same contract as SentenceTransformer.encode (numpy output only)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        
+        # Length-sorted batches pad less, as in sentence-transformers
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        
+        for start in range(0, len(texts), max(1, batch_size)):
+            indices = order[start:start + batch_size]
+            batch = self._tokenize([texts[i] for i in indices])
+            feed = {name: value for name, value in batch.items() if name in self._input_names}
+            token_embeddings = self.session.run(None, feed)[0]
+            embeddings[indices] = pool_embeddings(token_embeddings, batch["attention_mask"], self.pooling_modes)
+        
+        if self.normalize or normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        
+        return embeddings[0] if single else embeddings
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
@@ -0,0 +1,314 @@
+"""
+Sharded in-memory TTL cache and shared (cross-process) vector stores
+"""
+import sys
+import json
+import time
+import sqlite3
+import struct
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    if _depth > 4:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v, _depth + 1) for v in value)
+    if is_dataclass(value) or hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + estimate_size(vars(value), _depth + 1)
+    return sys.getsizeof(value)
+
+
+class _CacheShard:
+    """One LRU partition with its own lock, byte budget and counters"""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def _remove(self, key: str):
+        _, _, nbytes = self.entries.pop(key)
+        self.bytes -= nbytes
+
+
+class ShardedTTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL, bounded by approximate memory.
+    
+    Keys are spread over independently locked shards so concurrent requests
+    rarely contend. Expiry uses time.monotonic(), and entries are evicted
+    least-recently-used first once a shard exceeds its share of max_bytes.
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int,
+        shards: int = 16,
+        default_ttl_seconds: float = 3600,
+        name: str = "cache"
+    ):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.default_ttl_seconds = default_ttl_seconds
+        self._shards = [_CacheShard(max(1, max_bytes // shards)) for _ in range(max(1, shards))]
+    
+    def _shard(self, key: str) -> _CacheShard:
+        return self._shards[hash(key) % len(self._shards)]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get item if present and not expired"""
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                shard.misses += 1
+                return default
+            
+            value, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                shard._remove(key)
+                shard.expirations += 1
+                shard.misses += 1
+                return default
+            
+            shard.entries.move_to_end(key)
+            shard.hits += 1
+            return value
+    
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Set item with a TTL (defaults to default_ttl_seconds)"""
+        nbytes = estimate_size(key) + estimate_size(value)
+        ttl = self.default_ttl_seconds if ttl_seconds is None else ttl_seconds
+        shard = self._shard(key)
+        
+        with shard.lock:
+            if key in shard.entries:
+                shard._remove(key)
+            
+            if nbytes > shard.max_bytes:
+                logger.debug(f"{self.name}: entry of {nbytes} bytes exceeds shard budget, not cached")
+                return
+            
+            while shard.entries and shard.bytes + nbytes > shard.max_bytes:
+                shard._remove(next(iter(shard.entries)))
+                shard.evictions += 1
+            
+            shard.entries[key] = (value, time.monotonic() + ttl, nbytes)
+            shard.bytes += nbytes
+    
+    def is_valid(self, key: str) -> bool:
+        """Check if key exists and has not expired (does not count as a hit)"""
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+    
+    def invalidate(self, key: str) -> bool:
+        """Remove item from cache"""
+        shard = self._shard(key)
+        with shard.lock:
+            if key not in shard.entries:
+                return False
+            shard._remove(key)
+            return True
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Remove every item whose key starts with prefix; returns how many"""
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                for key in [k for k in shard.entries if k.startswith(prefix)]:
+                    shard._remove(key)
+                    removed += 1
+        return removed
+    
+    def clear(self):
+        """Clear entire cache (counters are kept)"""
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.bytes = 0
+    
+    def size(self) -> int:
+        """Get current number of entries"""
+        return sum(len(shard.entries) for shard in self._shards)
+    
+    def __len__(self) -> int:
+        return self.size()
+    
+    def __contains__(self, key: str) -> bool:
+        return self.is_valid(key)
+    
+    @property
+    def memory_bytes(self) -> int:
+        return sum(shard.bytes for shard in self._shards)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry count, memory use and hit/miss/eviction/expiry counters"""
+        hits = sum(shard.hits for shard in self._shards)
+        misses = sum(shard.misses for shard in self._shards)
+        return {
+            "entries": self.size(),
+            "memory_bytes": self.memory_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "evictions": sum(shard.evictions for shard in self._shards),
+            "expirations": sum(shard.expirations for shard in self._shards),
+        }
+
+
+# ============================================================================
+# SHARED VECTOR STORES
+# ============================================================================
+
+def pack_vectors(vectors: Dict[str, np.ndarray]) -> bytes:
+    """Serialize named arrays as a small JSON header followed by raw float32 bytes"""
+    arrays = {name: np.ascontiguousarray(vector, dtype='float32') for name, vector in vectors.items()}
+    header = json.dumps([[name, list(array.shape)] for name, array in arrays.items()]).encode()
+    return struct.pack("<I", len(header)) + header + b"".join(array.tobytes() for array in arrays.values())
+
+
+def unpack_vectors(data: bytes) -> Dict[str, np.ndarray]:
+    """Inverse of pack_vectors"""
+    (header_length,) = struct.unpack_from("<I", data)
+    offset = 4 + header_length
+    vectors = {}
+    for name, shape in json.loads(data[4:offset]):
+        count = int(np.prod(shape))
+        vectors[name] = np.frombuffer(data, dtype='float32', count=count, offset=offset).reshape(shape).copy()
+        offset += count * 4
+    return vectors
+
+
+class VectorStore(ABC):
+    """
+    Byte store shared by all workers, used as the second tier behind an
+    in-process cache. Keys are namespaced so several models can share one store.
+    """
+    
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Stored bytes for key, or None if missing or expired"""
+    
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        """Store value under key for ttl_seconds"""
+    
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix; returns how many"""
+    
+    def close(self):
+        pass
+
+
+class SQLiteVectorStore(VectorStore):
+    """
+    Local store in a WAL-mode SQLite file; shared by workers on one host.
+    
+    Reads ignore expired rows, so they are deleted lazily: once every
+    purge_every writes, through an index on expires_at.
+    """
+    
+    def __init__(self, path: Path, namespace: str = "", purge_every: int = 256):
+        super().__init__(namespace)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.purge_every = max(1, purge_every)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_expires_at ON vectors (expires_at)")
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM vectors WHERE key = ? AND expires_at > ?",
+                (self.namespace + key, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+    
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vectors (key, value, expires_at) VALUES (?, ?, ?)",
+                (self.namespace + key, sqlite3.Binary(value), now + ttl_seconds)
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._conn.execute("DELETE FROM vectors WHERE expires_at <= ?", (now,))
+    
+    def purge_expired(self) -> int:
+        """Delete expired rows now; returns how many"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM vectors WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+    
+    def delete_prefix(self, prefix: str) -> int:
+        start = self.namespace + prefix
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM vectors WHERE key >= ? AND key < ?", (start, start + "\uffff")
+            )
+        return cursor.rowcount
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisVectorStore(VectorStore):
+    """Store on a Redis-protocol server; shared across hosts and restarts"""
+    
+    def __init__(self, client, namespace: str = ""):
+        super().__init__(namespace)
+        self.client = client
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.namespace + key)
+    
+    def set(self, key: str, value: bytes, ttl_seconds: float):
+        self.client.set(self.namespace + key, value, px=max(1, int(ttl_seconds * 1000)))
+    
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self.client.scan_iter(match=self.namespace + prefix + "*"))
+        return self.client.delete(*keys) if keys else 0
+    
+    def close(self):
+        self.client.close()